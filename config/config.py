@@ -1,5 +1,6 @@
 import os
 import json
+import time
 from pathlib import Path
 
 # Project paths
@@ -7,6 +8,14 @@ ROOT_DIR = Path(__file__).parent.parent
 REPORTS_DIR = ROOT_DIR / 'reports'
 SCREENSHOTS_DIR = REPORTS_DIR / 'screenshots'
 LOGS_DIR = ROOT_DIR / 'logs'
+FEATURE_CACHE_DIR = ROOT_DIR / '.feature_cache'
+VISUAL_DIFFS_DIR = REPORTS_DIR / 'visual_diffs'
+BROWSER_PIDS_DIR = LOGS_DIR / 'browser_pids'
+TRACES_DIR = REPORTS_DIR / 'traces'
+ARTEFACTS_DIR = REPORTS_DIR / 'artefacts'
+PERF_DIR = REPORTS_DIR / 'perf'
+BASELINES_DIR = ROOT_DIR / 'baselines'
+HISTORY_DIR = ROOT_DIR / '.history'
 
 # Ensure directories exist
 REPORTS_DIR.mkdir(exist_ok=True)
@@ -49,6 +58,13 @@ TEST_DATA = {
     }
 }
 
+# Account pool: a JSON file of {dataset: [accounts]} whose accounts are leased to one test at a time,
+# so parallel workers never share a login (see utils/account_pool.py)
+ACCOUNTS_FILE = os.environ.get('ACCOUNTS_FILE', '')
+ACCOUNT_LEASES_DB = os.environ.get('ACCOUNT_LEASES_DB', str(HISTORY_DIR / 'account_leases.sqlite'))
+ACCOUNT_LEASE_TIMEOUT = float(os.environ.get('ACCOUNT_LEASE_TIMEOUT', 120))
+ACCOUNT_LEASE_MAX_AGE = float(os.environ.get('ACCOUNT_LEASE_MAX_AGE', 3600))
+
 # For backward compatibility
 VALID_USERNAME = TEST_DATA['valid_user']['username']
 VALID_PASSWORD = TEST_DATA['valid_user']['password']
@@ -57,12 +73,116 @@ VALID_PASSWORD = TEST_DATA['valid_user']['password']
 IMPLICIT_WAIT = int(os.environ.get('IMPLICIT_WAIT', 10))
 EXPLICIT_WAIT = int(os.environ.get('EXPLICIT_WAIT', 20))
 
+# Page readiness: 'ready_state' waits for document.readyState == 'complete', 'network_idle' for
+# no fetch/XHR in flight and no DOM changes for READINESS_QUIET_MS; page objects can override it
+PAGE_READINESS = os.environ.get('PAGE_READINESS', 'ready_state').lower()
+READINESS_QUIET_MS = int(os.environ.get('READINESS_QUIET_MS', 500))
+
+# Form filling: 'faithful' types with native key events, 'fast' sets values by script
+FORM_FILL_MODE = os.environ.get('FORM_FILL_MODE', 'faithful').lower()
+
+# Element input: 'webdriver' uses element commands, 'cdp' uses DevTools Input events on Chrome
+INPUT_MODE = os.environ.get('INPUT_MODE', 'webdriver').lower()
+
+# Animation freezing: no CSS animations, transitions, smooth scrolling or jQuery effects
+FREEZE_ANIMATIONS = os.environ.get('FREEZE_ANIMATIONS', 'False').lower() == 'true'
+TIMER_SPEEDUP = float(os.environ.get('TIMER_SPEEDUP', 1))
+
 # Retry configuration
 MAX_RETRIES = int(os.environ.get('MAX_RETRIES', 3))
 RETRY_DELAY = int(os.environ.get('RETRY_DELAY', 2))
 
 # Logging configuration
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+
+# Artefact retention, enforced over reports/ and logs/ by a background pruning pass (opt-in, since it
+# deletes files; python -m utils.artefact_store prune runs it by hand)
+ARTEFACT_PRUNE = os.environ.get('ARTEFACT_PRUNE', 'False').lower() == 'true'
+ARTEFACT_MAX_AGE_DAYS = float(os.environ.get('ARTEFACT_MAX_AGE_DAYS', 14))
+ARTEFACT_MAX_SIZE_MB = float(os.environ.get('ARTEFACT_MAX_SIZE_MB', 2048))
+
+# Failure artefacts
+DOM_SNAPSHOTS = os.environ.get('DOM_SNAPSHOTS', 'True').lower() == 'true'
+# Cookie values (including HttpOnly session cookies) are redacted in snapshots unless this is set
+SNAPSHOT_COOKIE_VALUES = os.environ.get('SNAPSHOT_COOKIE_VALUES', 'False').lower() == 'true'
+
+# Cache parsed feature files on disk between runs and workers
+FEATURE_CACHE = os.environ.get('FEATURE_CACHE', 'True').lower() == 'true'
+
+# Browser session lifecycle
+SESSION_REUSE = os.environ.get('SESSION_REUSE', 'False').lower() == 'true'
+SESSION_MAX_RSS_MB = int(os.environ.get('SESSION_MAX_RSS_MB', 1500))
+SESSION_MAX_TESTS = int(os.environ.get('SESSION_MAX_TESTS', 50))
+# Set by run_tests.py --watch: the session outlives each pytest run and is closed by the watcher
+WATCH_MODE = os.environ.get('WATCH_MODE', 'False').lower() == 'true'
+
+# Launch sessions on copies of a profile template built once per run
+PROFILE_TEMPLATE = os.environ.get('PROFILE_TEMPLATE', 'False').lower() == 'true'
+# Comma-separated URLs loaded while building the template, so sessions start with a warm cache
+PROFILE_WARM_URLS = [url for url in os.environ.get('PROFILE_WARM_URLS', '').split(',') if url]
+
+# Browser contexts: one long-lived Chromium browser, a fresh isolated context per test
+BROWSER_CONTEXTS = os.environ.get('BROWSER_CONTEXTS', 'False').lower() == 'true'
+# DevTools address (host:port) of a browser shared by all workers, set by run_tests.py --shared-browser
+SHARED_BROWSER = os.environ.get('SHARED_BROWSER', '')
+
+# Browser console/network log collection
+BROWSER_LOGS = os.environ.get('BROWSER_LOGS', 'False').lower() == 'true'
+BROWSER_LOG_BUFFER_SIZE = int(os.environ.get('BROWSER_LOG_BUFFER_SIZE', 1000))
+
+# WebDriver command tracking
+COMMAND_TRACKING = os.environ.get('COMMAND_TRACKING', 'False').lower() == 'true'
+COMMAND_BUDGET = int(os.environ.get('COMMAND_BUDGET', 0))
+COMMAND_BUDGET_ENFORCE = os.environ.get('COMMAND_BUDGET_ENFORCE', 'False').lower() == 'true'
+
+# Identifies the current run across worker processes; run_tests.py sets TEST_RUN_ID,
+# xdist workers otherwise share the controller's test run uid
+RUN_ID = (os.environ.get('TEST_RUN_ID') or os.environ.get('PYTEST_XDIST_TESTRUNUID')
+          or time.strftime('%Y%m%d_%H%M%S'))
+
+# Run history database (kept outside reports/ and logs/ so --clean does not erase it)
+RUN_HISTORY = os.environ.get('RUN_HISTORY', 'True').lower() == 'true'
+RUN_HISTORY_DB = os.environ.get('RUN_HISTORY_DB', str(HISTORY_DIR / 'runs.sqlite'))
+
+# Cross-machine sharding: every shard must see the same timings file to agree on the split
+# (commit it or share it between CI jobs); --merge-shards updates it from the shard results
+SHARD_TIMINGS = os.environ.get('SHARD_TIMINGS', str(ROOT_DIR / 'shard_timings.json'))
+SHARDS_DIR = os.environ.get('SHARDS_DIR', str(REPORTS_DIR / 'shards'))
+
+# Failure-only screencast recording (Chromium): frames kept in memory, encoded on failure
+SCREENCAST = os.environ.get('SCREENCAST', 'False').lower() == 'true'
+SCREENCAST_SECONDS = float(os.environ.get('SCREENCAST_SECONDS', 10))
+SCREENCAST_MAX_FRAMES = int(os.environ.get('SCREENCAST_MAX_FRAMES', 300))
+SCREENCAST_QUALITY = int(os.environ.get('SCREENCAST_QUALITY', 50))
+SCREENCAST_MAX_WIDTH = int(os.environ.get('SCREENCAST_MAX_WIDTH', 800))
+
+# Chrome Trace Event (Perfetto) timeline export
+TRACE = os.environ.get('TRACE', 'False').lower() == 'true'
+
+# Front-end performance budgets per URL path (milliseconds unless noted);
+# "default" applies to every page. Override with a JSON file in PERF_BUDGETS_FILE.
+PERF_BUDGETS = {
+    'default': {
+        'load': 5000,
+        'first_contentful_paint': 3000,
+    },
+    '/login': {
+        'ttfb': 1500,
+    },
+    '/secure': {
+        'ttfb': 1500,
+    },
+}
+if os.environ.get('PERF_BUDGETS_FILE'):
+    with open(os.environ['PERF_BUDGETS_FILE'], 'r') as f:
+        PERF_BUDGETS = json.load(f)
+
+# Visual regression configuration
+VISUAL_TOLERANCE = float(os.environ.get('VISUAL_TOLERANCE', 0.001))
+VISUAL_PIXEL_THRESHOLD = float(os.environ.get('VISUAL_PIXEL_THRESHOLD', 16))
+VISUAL_CACHE_SIZE = int(os.environ.get('VISUAL_CACHE_SIZE', 64))
+UPDATE_BASELINES = os.environ.get('UPDATE_BASELINES', 'False').lower() == 'true'
 
 
 def get_test_data(data_file=None):
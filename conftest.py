@@ -1,48 +1,222 @@
 import pytest
-import os
-import datetime
+import html
 from pytest_bdd import given
-from utils.driver_factory import DriverFactory
+from utils.session_supervisor import SessionSupervisor, reap_orphans
 from utils.logger import get_logger
-from pytest_html import extras
-from config.config import SCREENSHOTS_DIR, LOGS_DIR
+from utils.dom_snapshot import DomSnapshotWriter
+from utils import feature_cache
+from utils.tracing import tracer, merge_parts
+from utils.run_history import HistoryRecorder, current_worker
+from utils.artefact_store import store, start_background_prune
+from utils.screencast import ScreencastEncoder
+from utils import sharding
+from utils.account_pool import AccountPool, AccountLeases
+from config.config import (
+    LOGS_DIR, DOM_SNAPSHOTS, COMMAND_BUDGET, COMMAND_BUDGET_ENFORCE, FEATURE_CACHE, ARTEFACT_PRUNE,
+    PROFILE_TEMPLATE, WATCH_MODE, RUN_ID
+)
+
+# Register step definitions once for the whole suite instead of per test module
+pytest_plugins = ["features.steps.login_steps"]
 
 # Initialize logger
 logger = get_logger()
 
+# Serve parsed feature files from the on-disk cache (must happen before test modules are imported)
+if FEATURE_CACHE:
+    feature_cache.install()
+
+# Shared writer so unchanged DOMs are deduplicated across the whole run
+snapshot_writer = DomSnapshotWriter()
+
+# One supervisor per worker process owns browser sessions and their memory
+session_supervisor = SessionSupervisor()
+
+# Encodes failure screencasts in a background process, started on the first failure
+screencast_encoder = ScreencastEncoder()
+
+# Buffers results of this worker and writes them to the run history in batches
+history = HistoryRecorder()
+
+# Leases pooled test accounts so parallel tests never log in with the same account
+account_pool = AccountPool()
+
+# Scenarios left out of the functional run unless their option or a marker expression naming them is given
+OPT_IN_MARKERS = {
+    "perf": "timing budget scenario, only run with --perf or -m perf",
+    "visual": "visual baseline scenario, only run with --visual or -m visual",
+}
+
+
+def pytest_addoption(parser):
+    """Register the sharding option."""
+    parser.addoption("--shard", default=None, metavar="I/N",
+                     help="Run the I-th of N shards of the selected tests, balanced by the SHARD_TIMINGS durations")
+    parser.addoption("--perf", action="store_true", default=False,
+                     help="Also run @perf scenarios, which assert timing budgets against the target site")
+    parser.addoption("--visual", action="store_true", default=False,
+                     help="Also run @visual scenarios, which compare pages against their baselines")
+
+
+def pytest_configure(config):
+    """Leave history recording to the workers when running under pytest-xdist and set up sharding."""
+    for marker, description in OPT_IN_MARKERS.items():
+        config.addinivalue_line("markers", f"{marker}: {description}")
+    # The xdist controller also receives every worker's reports
+    if config.getoption("dist", "no") != "no" and not hasattr(config, "workerinput"):
+        history.enabled = False
+        # Without TEST_RUN_ID, workers take the xdist run uid as their run id; make it this process's,
+        # so the controller finds the workers' trace parts
+        if config.getoption("testrunuid", None) is None:
+            config.option.testrunuid = RUN_ID
+    shard = config.getoption("shard")
+    if shard:
+        try:
+            config.shard = sharding.parse_shard(shard)
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+        # Results are recorded once, by the process that sees every report
+        if not hasattr(config, "workerinput") and not config.option.collectonly:
+            config.pluginmanager.register(sharding.ShardRecorder(*config.shard), "shard_recorder")
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    """Leave out @perf and @visual scenarios unless requested, then keep only the tests of this shard."""
+    # Timing budgets depend on the network and the target site, and visual baselines on the browser and
+    # platform that recorded them, so neither is part of the functional run.
+    # Node ids named explicitly (e.g. by the pool runner's workers) always run.
+    requested = set(config.args)
+    for marker in OPT_IN_MARKERS:
+        if config.getoption(marker) or marker in config.getoption("markexpr", ""):
+            continue
+        opt_in = [item for item in items if item.get_closest_marker(marker) and item.nodeid not in requested]
+        if opt_in:
+            config.hook.pytest_deselected(items=opt_in)
+            opt_in = set(opt_in)
+            items[:] = [item for item in items if item not in opt_in]
+    if not hasattr(config, "shard"):
+        return
+    index, total = config.shard
+    expected, selected = sharding.select([item.nodeid for item in items], index, total)
+    selected = set(selected)
+    deselected = [item for item in items if item.nodeid not in selected]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item.nodeid in selected]
+    if not hasattr(config, "workerinput"):
+        logger.info(f"Shard {index}/{total}: {len(items)} tests, expected {expected:.1f}s")
+
 
 @pytest.fixture(scope="function")
 def driver(request):
     """
     Initialize WebDriver instance for tests.
     
-    This fixture is used for each test function and sets up a fresh browser
-    instance for each test. The browser closes automatically after the test.
+    This fixture is used for each test function. By default it sets up a fresh
+    browser instance for each test and closes it after the test; with
+    SESSION_REUSE enabled the session supervisor keeps the browser alive
+    between tests until it needs recycling. With BROWSER_CONTEXTS the driver
+    is switched to a fresh isolated browser context for each test.
+    driver.accounts holds the test's leased accounts from the account pool.
     """
     logger.info(f"Starting test: {request.node.name}")
     
-    driver = DriverFactory.get_driver()
+    driver = session_supervisor.acquire()
     
     # Add driver to request for accessing in hook
     request.node.driver = driver
     
+    # Accounts are leased on first use by a step and returned after the test
+    driver.accounts = AccountLeases(account_pool, request.node.nodeid)
+    
+    # A failure screencast should only show this test
+    screencast = getattr(driver, "screencast", None)
+    if screencast:
+        screencast.clear()
+    
     yield driver
     
     # Teardown
     if driver:
-        logger.info(f"Closing browser for test: {request.node.name}")
-        driver.quit()
+        logger.info(f"Releasing browser for test: {request.node.name}")
+        accounts = driver.accounts
+        try:
+            session_supervisor.release(driver, failed=getattr(request.node, "test_failed", False))
+        finally:
+            accounts.release()
+
+
+@pytest.fixture(scope="function")
+def pages(driver):
+    """
+    Page object registry bound to the test's browser session.
+    
+    Page objects are created on first use and shared between steps, e.g.
+    pages.login or pages.get(LoginPage).
+    """
+    return driver.pages
 
 
 # Add hooks for pytest-bdd
+def pytest_bdd_before_step_call(request, feature, scenario, step, step_func, step_func_args):
+    """Start counting WebDriver commands, timing and the trace span for the step."""
+    history.start_step(request.node.nodeid)
+    tracer.begin(("step", request.node.nodeid), step.name, "step",
+                 {"keyword": step.keyword, "scenario": scenario.name})
+    counter = getattr(step_func_args.get('driver'), "command_counter", None)
+    if counter:
+        budget = getattr(step_func, "_command_budget", COMMAND_BUDGET or None)
+        counter.begin_step(step.name, budget)
+
+
+def pytest_bdd_after_step(request, feature, scenario, step, step_func, step_func_args):
+    """Move browser log entries into the session ring buffer at each step boundary."""
+    tracer.end(("step", request.node.nodeid), outcome="passed")
+    history.end_step(request.node.nodeid, step.name, "passed")
+    driver = step_func_args.get('driver')
+    drain_browser_logs(driver)
+    
+    counter = getattr(driver, "command_counter", None)
+    if counter:
+        step_commands = counter.end_step()
+        if step_commands and step_commands.over_budget:
+            message = (f"Step '{step.name}' issued {step_commands.total} WebDriver commands, "
+                       f"over its budget of {step_commands.budget}")
+            if COMMAND_BUDGET_ENFORCE:
+                pytest.fail(message)
+            logger.warning(message)
+
+
+def pytest_bdd_before_scenario(request, feature, scenario):
+    """Record the scenario name with the test's history entry."""
+    history.set_scenario(request.node.nodeid, scenario.name)
+
+
+def pytest_bdd_after_scenario(request, feature, scenario):
+    """Log the browser console/network summary for the scenario."""
+    collector = getattr(getattr(request.node, "driver", None), "log_collector", None)
+    if collector:
+        logger.info(f"Browser log summary for scenario '{scenario.name}':\n{collector.format_summary()}")
+
+
 def pytest_bdd_step_error(request, feature, scenario, step, step_func, step_func_args, exception):
     """Hook for test failures."""
     logger.error(f"Step failed in scenario '{scenario.name}', step: '{step.name}'")
     logger.error(f"Error: {str(exception)}")
+    tracer.end(("step", request.node.nodeid), outcome="failed", error=type(exception).__name__)
+    history.end_step(request.node.nodeid, step.name, "failed")
     
     driver = step_func_args.get('driver')
+    counter = getattr(driver, "command_counter", None)
+    if counter:
+        counter.end_step()
     if driver:
         take_screenshot(driver, f"step_error_{scenario.name}_{step.name}")
+        drain_browser_logs(driver)
+        if DOM_SNAPSHOTS:
+            snapshot_writer.capture(driver, f"step_error_{scenario.name}_{step.name}",
+                                    extra=browser_log_entries(driver))
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -52,9 +226,15 @@ def pytest_runtest_makereport(item, call):
     
     This hook will capture screenshots on test failures and attach them to the HTML report.
     """
+    # Imported lazily: pytest-html is only needed once there is something to attach
+    from pytest_html import extras
+    
     outcome = yield
     report = outcome.get_result()
     
+    if report.failed:
+        item.test_failed = True
+    
     if report.when == "call":
         if hasattr(item, "driver"):
             # Log test result
@@ -62,37 +242,192 @@ def pytest_runtest_makereport(item, call):
                 logger.info(f"Test passed: {item.name}")
             elif report.failed:
                 logger.error(f"Test failed: {item.name}")
-                screenshot_path = take_screenshot(item.driver, f"test_failed_{item.name}")
+                screenshot = take_screenshot(item.driver, f"test_failed_{item.name}")
                 
-                # Add screenshot to the HTML report
+                # Add screenshot to the HTML report, referenced by its content hash
                 report.extras = getattr(report, "extras", [])
-                report.extras.append(extras.image(screenshot_path))
-                report.extras.append(extras.html(f"<div>Screenshot saved to: {screenshot_path}</div>"))
+                report.extras.append(extras.image(screenshot.path))
+                report.extras.append(extras.html(
+                    f"<div>Screenshot sha256:{screenshot.digest[:12]} saved to: {screenshot.path}</div>"
+                ))
+                screencast = getattr(item.driver, "screencast", None)
+                if screencast:
+                    video_name = f"test_failed_{item.name}_screencast"
+                    if screencast_encoder.submit(screencast.snapshot(), video_name):
+                        # Encoded in the background; the object's hash is only known afterwards
+                        report.extras.append(extras.html(
+                            f"<div>Screencast (last seconds before the failure) stored as {html.escape(video_name)}: "
+                            f"python -m utils.artefact_store find {html.escape(video_name)}</div>"
+                        ))
+                drain_browser_logs(item.driver)
+                if DOM_SNAPSHOTS:
+                    snapshot = snapshot_writer.capture(item.driver, f"test_failed_{item.name}",
+                                                       extra=browser_log_entries(item.driver))
+                    if snapshot:
+                        report.extras.append(extras.html(
+                            f"<div>DOM snapshot sha256:{snapshot.digest[:12]} saved to: {snapshot.path} "
+                            f"(view with: python -m utils.dom_snapshot {snapshot.path})</div>"
+                        ))
             elif report.skipped:
                 logger.info(f"Test skipped: {item.name}")
+            
+            # Attach the browser console/network summary to the HTML report
+            collector = getattr(item.driver, "log_collector", None)
+            if collector:
+                report.extras = getattr(report, "extras", [])
+                report.extras.append(extras.html(
+                    f"<pre>{html.escape(collector.format_summary())}</pre>"
+                ))
 
 
-def take_screenshot(driver, name):
+def pytest_runtest_logstart(nodeid, location):
+    """Start a run history entry for each test attempt."""
+    history.start_test(nodeid)
+
+
+def pytest_runtest_logreport(report):
+    """Fold setup/call/teardown results into the run history entry."""
+    history.add_report(report)
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    """Queue the finished attempt for the next history batch."""
+    history.finish_test(nodeid)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    """Record fixture setup (including browser acquisition) in the trace."""
+    with tracer.span(f"fixture {fixturedef.argname}", "fixture", {"scope": fixturedef.scope}):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    """Record the setup phase in the trace."""
+    with tracer.span(f"setup {item.name}", "pytest", {"nodeid": item.nodeid, "worker": tracer.worker}):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Record the call phase in the trace."""
+    with tracer.span(f"call {item.name}", "pytest", {"nodeid": item.nodeid, "worker": tracer.worker}):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    """Record the teardown phase in the trace."""
+    with tracer.span(f"teardown {item.name}", "pytest", {"nodeid": item.nodeid, "worker": tracer.worker}):
+        yield
+
+
+def pytest_sessionstart(session):
+    """Reap browser processes and profile copies left behind by crashed workers and start pruning old artefacts."""
+    reap_orphans()
+    if PROFILE_TEMPLATE:
+        from utils.browser_profiles import remove_stale
+        remove_stale()
+    # One pruning pass per run, from the controlling process only (not xdist or pool workers)
+    if ARTEFACT_PRUNE and current_worker() == "main":
+        session.config.artefact_prune = start_background_prune()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Close sessions, return leased accounts, flush pending artefacts and write the trace."""
+    # In watch mode the warm session is kept for the next run; the watcher shuts it down on exit
+    if not WATCH_MODE:
+        session_supervisor.shutdown()
+    # Worker processes hand their session stats to the controller (see pytest_testnodedown)
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["browser_sessions"] = session_supervisor.sessions
+    account_pool.release_all()
+    snapshot_writer.flush()
+    screencast_encoder.flush()
+    prune_thread = getattr(session.config, "artefact_prune", None)
+    if prune_thread:
+        prune_thread.join()
+    try:
+        history.flush()
+    except Exception as e:
+        logger.warning(f"Failed to write run history: {e}")
+    tracer.write_part()
+    # xdist and pool workers only write parts; the controlling process merges them
+    if tracer.enabled and tracer.worker == "main":
+        trace_path = merge_parts()
+        if trace_path:
+            logger.info(f"Trace written to {trace_path} (open in https://ui.perfetto.dev)")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collect the browser sessions of a finished xdist worker for the summary."""
+    workeroutput = getattr(node, "workeroutput", None) or {}
+    session_supervisor.add_worker_sessions(node.gateway.id, workeroutput.get("browser_sessions", []))
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Add browser launch times and memory usage to the terminal summary."""
+    lines = session_supervisor.summary_lines()
+    if lines:
+        terminalreporter.section("browser sessions")
+        for line in lines:
+            terminalreporter.write_line(line)
+
+
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    """Add browser launch times and memory usage to the HTML report summary."""
+    lines = session_supervisor.summary_lines()
+    if lines:
+        prefix.append(f"<pre>{html.escape(chr(10).join(lines))}</pre>")
+
+
+def drain_browser_logs(driver):
     """
-    Take a screenshot and save it to the reports/screenshots directory.
+    Drain pending browser log entries if log collection is enabled.
+    
+    Args:
+        driver: WebDriver instance, or None
+    """
+    collector = getattr(driver, "log_collector", None)
+    if collector:
+        try:
+            collector.drain()
+        except Exception as e:
+            logger.warning(f"Failed to drain browser logs: {e}")
+
+
+def browser_log_entries(driver):
+    """
+    Get the collected browser log entries for inclusion in failure artefacts.
     
     Args:
         driver: WebDriver instance
-        name: Base name for the screenshot
     
     Returns:
-        str: Path to the saved screenshot
+        dict: Console and network entries, empty if log collection is disabled
+    """
+    collector = getattr(driver, "log_collector", None)
+    if not collector:
+        return {}
+    return {"browser_console": list(collector.console), "network": list(collector.network)}
+
+
+def take_screenshot(driver, name):
     """
-    # Ensure screenshots directory exists
-    SCREENSHOTS_DIR.mkdir(exist_ok=True)
+    Take a screenshot and save it to the artefact store.
     
-    # Create timestamp for unique filename
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{name}_{timestamp}.png"
-    filepath = os.path.join(SCREENSHOTS_DIR, filename)
+    Identical screenshots are stored once; the store records the name.
     
-    # Take screenshot
-    driver.save_screenshot(filepath)
-    logger.info(f"Screenshot saved: {filepath}")
+    Args:
+        driver: WebDriver instance
+        name: Name recorded for the screenshot
     
-    return filepath 
\ No newline at end of file
+    Returns:
+        Artefact: (hash, path) of the stored screenshot
+    """
+    screenshot = store.put(driver.get_screenshot_as_png(), ".png", name=name)
+    logger.info(f"Screenshot saved: sha256:{screenshot.digest[:12]} ({screenshot.path})")
+    return screenshot
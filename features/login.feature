@@ -17,4 +17,25 @@ Feature: Login Functionality
     And I enter "$invalid_user.password" as password
     And I click the login button
     Then I should see an error message
-    And The error message should contain "Your username is invalid!" 
\ No newline at end of file
+    And The error message should contain "Your username is invalid!" 
+
+  @perf
+  Scenario: Login flow pages load within their performance budgets
+    Given I am on the login page
+    Then the login page should load within 5000 ms
+    And the login page should meet its performance budget
+    When I enter "$valid_user.username" as username
+    And I enter "$valid_user.password" as password
+    And I click the login button
+    Then I should be logged in successfully
+    And the secure page should meet its performance budget
+
+  @visual
+  Scenario: Login flow pages match their visual baselines
+    Given I am on the login page
+    Then the login page should match its visual baseline
+    When I enter "$valid_user.username" as username
+    And I enter "$valid_user.password" as password
+    And I click the login button
+    Then I should be logged in successfully
+    And the secure page should match its visual baseline
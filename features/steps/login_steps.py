@@ -1,8 +1,7 @@
 from pytest_bdd import given, when, then, parsers
-from pages.login_page import LoginPage
-from pages.secure_page import SecurePage
 from utils.logger import get_logger
-from config.config import TEST_DATA
+from utils.command_counter import command_budget
+from utils.account_pool import resolve
 
 # Initialize logger
 logger = get_logger()
@@ -12,7 +11,7 @@ logger = get_logger()
 def on_login_page(driver):
     """Navigate to the login page."""
     logger.info("Navigating to the login page")
-    login_page = LoginPage(driver)
+    login_page = driver.pages.login
     login_page.navigate()
 
 
@@ -27,17 +26,12 @@ def enter_username(driver, username):
     """
     logger.info(f"Entering username: {username}")
     
-    # Check if the username is a reference to test data
+    # Resolve test data references, e.g. $valid_user.username (pooled datasets lease an account)
     if username.startswith('$'):
-        # Format: $dataset.key, e.g., $valid_user.username
-        parts = username[1:].split('.')
-        if len(parts) == 2:
-            dataset, key = parts
-            if dataset in TEST_DATA and key in TEST_DATA[dataset]:
-                username = TEST_DATA[dataset][key]
-                logger.info(f"Resolved username from test data: {username}")
+        username = resolve(username, getattr(driver, "accounts", None))
+        logger.info(f"Resolved username from test data: {username}")
     
-    login_page = LoginPage(driver)
+    login_page = driver.pages.login
     login_page.enter_username(username)
 
 
@@ -52,17 +46,12 @@ def enter_password(driver, password):
     """
     logger.info(f"Entering password: {'*' * len(password)}")
     
-    # Check if the password is a reference to test data
+    # Resolve test data references, e.g. $valid_user.password (pooled datasets lease an account)
     if password.startswith('$'):
-        # Format: $dataset.key, e.g., $valid_user.password
-        parts = password[1:].split('.')
-        if len(parts) == 2:
-            dataset, key = parts
-            if dataset in TEST_DATA and key in TEST_DATA[dataset]:
-                password = TEST_DATA[dataset][key]
-                logger.info(f"Resolved password from test data")
+        password = resolve(password, getattr(driver, "accounts", None))
+        logger.info(f"Resolved password from test data")
     
-    login_page = LoginPage(driver)
+    login_page = driver.pages.login
     login_page.enter_password(password)
 
 
@@ -70,16 +59,17 @@ def enter_password(driver, password):
 def click_login_button(driver):
     """Click the login button."""
     logger.info("Clicking login button")
-    login_page = LoginPage(driver)
+    login_page = driver.pages.login
     login_page.click_login_button()
 
 
 @then("I should be logged in successfully")
+@command_budget(5)
 def verify_successful_login(driver):
     """Verify that login was successful."""
     logger.info("Verifying successful login")
-    secure_page = SecurePage(driver)
-    assert secure_page.is_element_visible(secure_page.SUCCESS_MESSAGE), "Success message is not displayed"
+    secure_page = driver.pages.secure
+    # get_success_message already waits for visibility; a separate check would look the element up twice
     success_message = secure_page.get_success_message()
     assert "You logged into a secure area!" in success_message, f"Unexpected success message: {success_message}"
     logger.info(f"Success message verified: {success_message}")
@@ -89,7 +79,7 @@ def verify_successful_login(driver):
 def verify_secure_area_page(driver):
     """Verify that the secure area page is displayed."""
     logger.info("Verifying secure area page is displayed")
-    secure_page = SecurePage(driver)
+    secure_page = driver.pages.secure
     assert secure_page.is_secure_page_displayed(), "Secure page is not displayed"
     logger.info("Secure area page verified")
 
@@ -98,7 +88,7 @@ def verify_secure_area_page(driver):
 def verify_error_message(driver):
     """Verify that an error message is displayed."""
     logger.info("Verifying error message is displayed")
-    login_page = LoginPage(driver)
+    login_page = driver.pages.login
     assert login_page.is_element_visible(login_page.LOGIN_ERROR_MESSAGE), "Error message is not displayed"
     logger.info("Error message verified")
 
@@ -114,17 +104,57 @@ def verify_error_message_text(driver, expected_text):
     """
     logger.info(f"Verifying error message contains: {expected_text}")
     
-    # Check if the expected_text is a reference to test data
+    # Resolve test data references, e.g. $error_messages.invalid_username
     if expected_text.startswith('$'):
-        # Format: $error_messages.invalid_username
-        parts = expected_text[1:].split('.')
-        if len(parts) == 2:
-            dataset, key = parts
-            if dataset in TEST_DATA and key in TEST_DATA[dataset]:
-                expected_text = TEST_DATA[dataset][key]
-                logger.info(f"Resolved expected text from test data: {expected_text}")
+        expected_text = resolve(expected_text, getattr(driver, "accounts", None))
+        logger.info(f"Resolved expected text from test data: {expected_text}")
     
-    login_page = LoginPage(driver)
+    login_page = driver.pages.login
     error_message = login_page.get_error_message()
     assert expected_text in error_message, f"Error message '{error_message}' does not contain '{expected_text}'"
-    logger.info(f"Error message verified: {error_message}") 
\ No newline at end of file
+    logger.info(f"Error message verified: {error_message}") 
+
+@then(parsers.parse('the {page_name} page should load within {budget_ms:d} ms'))
+def verify_page_load_time(driver, page_name, budget_ms):
+    """
+    Verify that the current page finished loading within the given time.
+    
+    Args:
+        driver: WebDriver instance
+        page_name: Registered page name, e.g. "login" or "secure"
+        budget_ms: Maximum time from navigation start to the end of the load event
+    """
+    logger.info(f"Verifying the {page_name} page loads within {budget_ms} ms")
+    page = getattr(driver.pages, page_name)
+    metrics = page.assert_performance_budget({"load": budget_ms})
+    logger.info(f"The {page_name} page loaded in {metrics['load']} ms")
+
+
+@then(parsers.parse('the {page_name} page should meet its performance budget'))
+def verify_performance_budget(driver, page_name):
+    """
+    Verify the current page against its configured budget in PERF_BUDGETS.
+    
+    Args:
+        driver: WebDriver instance
+        page_name: Registered page name, e.g. "login" or "secure"
+    """
+    logger.info(f"Verifying the {page_name} page meets its performance budget")
+    page = getattr(driver.pages, page_name)
+    page.assert_performance_budget()
+    logger.info(f"The {page_name} page is within its performance budget")
+
+
+@then(parsers.parse('the {page_name} page should match its visual baseline'))
+def verify_visual_baseline(driver, page_name):
+    """
+    Verify the current page against its baseline in baselines/<page_name>_page.png.
+    
+    Args:
+        driver: WebDriver instance
+        page_name: Registered page name, e.g. "login" or "secure"
+    """
+    logger.info(f"Verifying the {page_name} page matches its visual baseline")
+    page = getattr(driver.pages, page_name)
+    result = page.assert_matches_baseline(f"{page_name}_page")
+    logger.info(f"The {page_name} page matches its baseline ({result['mismatch']:.2%} of pixels differ)")
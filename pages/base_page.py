@@ -1,15 +1,50 @@
+import os
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from utils.logger import get_logger
-from config.config import EXPLICIT_WAIT
+from utils.tracing import tracer
+from pages import scripts
+from config.config import EXPLICIT_WAIT, FORM_FILL_MODE, PAGE_READINESS, READINESS_QUIET_MS
+
+# Wait poll intervals: Selenium's default, and the one used when animations are frozen
+# and state changes therefore take effect without a settle time
+POLL_FREQUENCY = 0.5
+FROZEN_POLL_FREQUENCY = 0.05
+
+
+class CountedWait(WebDriverWait):
+    """WebDriverWait whose polls are counted as one by the driver's command counter."""
+    
+    def __init__(self, counter, driver, timeout, **kwargs):
+        super().__init__(driver, timeout, **kwargs)
+        self.counter = counter
+    
+    def until(self, method, message=""):
+        with self.counter.polling():
+            return super().until(method, message)
+    
+    def until_not(self, method, message=""):
+        with self.counter.polling():
+            return super().until_not(method, message)
 
 
 class BasePage:
     """Base class for all page objects."""
     
+    # How wait_for_page_load decides the page is ready: "ready_state" or "network_idle"
+    # (see utils.readiness); None uses PAGE_READINESS. READINESS_QUIET_MS overrides the
+    # network-idle quiet window for the page.
+    READINESS = None
+    READINESS_QUIET_MS = None
+    
+    def __init_subclass__(cls, **kwargs):
+        """Record page methods of subclasses in the trace when tracing is enabled."""
+        super().__init_subclass__(**kwargs)
+        tracer.instrument_class(cls)
+    
     def __init__(self, driver):
         """
         Initialize the BasePage with a driver.
@@ -21,6 +56,43 @@ class BasePage:
         self.wait = WebDriverWait(driver, EXPLICIT_WAIT)
         self.logger = get_logger()
     
+    def _wait(self, timeout):
+        """
+        Create an explicit wait for this page's driver.
+        
+        With frozen animations nothing fades or slides, so conditions hold as soon
+        as the page updates and the wait polls at FROZEN_POLL_FREQUENCY. Against
+        the fake driver (utils.fake_driver) conditions are checked once. With
+        command tracking, the repeated polls count as one set of commands.
+        
+        Args:
+            timeout: Maximum time to wait
+        
+        Returns:
+            WebDriverWait: The wait
+        """
+        if getattr(self.driver, "static_dom", False):
+            # The fake driver's DOM only changes in response to commands; polling cannot help
+            timeout = 0
+        frozen = getattr(self.driver, "animation_freezer", None) is not None
+        poll_frequency = FROZEN_POLL_FREQUENCY if frozen else POLL_FREQUENCY
+        counter = getattr(self.driver, "command_counter", None)
+        if counter is not None:
+            return CountedWait(counter, self.driver, timeout, poll_frequency=poll_frequency)
+        return WebDriverWait(self.driver, timeout, poll_frequency=poll_frequency)
+    
+    def _after_navigation(self):
+        """
+        Freeze animations and record console output in the new document where the
+        browser cannot do it for every document.
+        """
+        freezer = getattr(self.driver, "animation_freezer", None)
+        if freezer is not None and not freezer.persistent:
+            freezer.apply()
+        console_hook = getattr(self.driver, "console_hook", None)
+        if console_hook is not None and not console_hook.persistent:
+            console_hook.apply()
+    
     def navigate_to(self, url):
         """
         Navigate to a specified URL.
@@ -29,7 +101,15 @@ class BasePage:
             url: The URL to navigate to
         """
         self.logger.info(f"Navigating to {url}")
+        network_idle = self._readiness() == "network_idle"
+        if network_idle:
+            # Registered before the navigation so requests made while loading are counted
+            self._readiness_tracker()
         self.driver.get(url)
+        self._after_navigation()
+        if network_idle:
+            # The load event has passed; wait for the requests and rendering that follow it
+            self.wait_for_page_load()
     
     def find_element(self, locator):
         """
@@ -71,7 +151,7 @@ class BasePage:
             bool: True if element is visible, False otherwise
         """
         try:
-            WebDriverWait(self.driver, timeout).until(
+            self._wait(timeout).until(
                 EC.visibility_of_element_located(locator)
             )
             return True
@@ -91,7 +171,7 @@ class BasePage:
             bool: True if element is present, False otherwise
         """
         try:
-            WebDriverWait(self.driver, timeout).until(
+            self._wait(timeout).until(
                 EC.presence_of_element_located(locator)
             )
             return True
@@ -112,7 +192,7 @@ class BasePage:
         """
         try:
             self.logger.debug(f"Waiting for element to be visible: {locator}")
-            return WebDriverWait(self.driver, timeout).until(
+            return self._wait(timeout).until(
                 EC.visibility_of_element_located(locator)
             )
         except TimeoutException as e:
@@ -132,7 +212,7 @@ class BasePage:
         """
         try:
             self.logger.debug(f"Waiting for element to be clickable: {locator}")
-            return WebDriverWait(self.driver, timeout).until(
+            return self._wait(timeout).until(
                 EC.element_to_be_clickable(locator)
             )
         except TimeoutException as e:
@@ -152,21 +232,38 @@ class BasePage:
         """
         try:
             self.logger.debug(f"Waiting for element to disappear: {locator}")
-            return WebDriverWait(self.driver, timeout).until(
+            return self._wait(timeout).until(
                 EC.invisibility_of_element_located(locator)
             )
         except TimeoutException as e:
             self.logger.error(f"Element still visible after {timeout} seconds: {locator}")
             raise e
     
-    def click(self, locator, timeout=EXPLICIT_WAIT):
+    def _cdp_input(self, fidelity):
+        """Return the session's CDP input fast path, or None when WebDriver input should be used."""
+        cdp_input = getattr(self.driver, "cdp_input", None)
+        if cdp_input is None or fidelity or cdp_input.in_frame:
+            return None
+        return cdp_input
+    
+    def click(self, locator, timeout=EXPLICIT_WAIT, fidelity=False):
         """
         Click on an element after ensuring it's clickable.
         
         Args:
             locator: Tuple containing (By, value)
             timeout: Maximum time to wait
-        """
+            fidelity: Always use the WebDriver element click, even with INPUT_MODE=cdp
+        """
+        cdp_input = self._cdp_input(fidelity)
+        if cdp_input:
+            self.logger.debug(f"Clicking element via CDP: {locator}")
+            # Wait only when the element is not clickable yet, then try once more
+            if cdp_input.click(locator) or (self.wait_for_element_clickable(locator, timeout)
+                                            and cdp_input.click(locator)):
+                return
+            self.logger.error(f"Failed to click element: {locator}")
+            raise NoSuchElementException(f"Element not clickable: {locator}")
         try:
             element = self.wait_for_element_clickable(locator, timeout)
             self.logger.debug(f"Clicking element: {locator}")
@@ -186,16 +283,30 @@ class BasePage:
         self.logger.debug(f"JavaScript clicking element: {locator}")
         self.driver.execute_script("arguments[0].click();", element)
     
-    def send_keys(self, locator, text, clear_first=True, timeout=EXPLICIT_WAIT):
+    def send_keys(self, locator, text, clear_first=True, timeout=EXPLICIT_WAIT, fidelity=False):
         """
         Send text to an element after ensuring it's visible.
         
+        With INPUT_MODE=cdp the text is inserted with a single input event
+        instead of per-character key events; text containing special keys
+        (Keys.ENTER etc.) is always sent through WebDriver.
+        
         Args:
             locator: Tuple containing (By, value)
             text: Text to send to the element
             clear_first: Whether to clear the field first
             timeout: Maximum time to wait
-        """
+            fidelity: Always use WebDriver key events, even with INPUT_MODE=cdp
+        """
+        cdp_input = self._cdp_input(fidelity)
+        if cdp_input and cdp_input.can_type(str(text)):
+            self.logger.debug(f"Inserting text via CDP into {locator}: {text}")
+            if cdp_input.type_text(locator, str(text), clear_first) or (
+                    self.wait_for_element_visible(locator, timeout)
+                    and cdp_input.type_text(locator, str(text), clear_first)):
+                return
+            self.logger.error(f"Failed to send text to element: {locator}")
+            raise NoSuchElementException(f"Element not visible: {locator}")
         try:
             element = self.wait_for_element_visible(locator, timeout)
             if clear_first:
@@ -222,6 +333,78 @@ class BasePage:
         element.send_keys(Keys.DELETE)
         element.send_keys(text)
     
+    def fill_form(self, fields, submit=None, mode=None, timeout=EXPLICIT_WAIT):
+        """
+        Fill several form fields, and optionally submit, in a batched operation.
+        
+        Modes:
+            fast: one script call sets every value through the native setter and
+                  dispatches input/change events (no real keystrokes)
+            faithful: one script call resolves all elements, then a single
+                      actions command clicks, clears and types into each field
+        
+        Args:
+            fields: Mapping of locator tuples (By, value) to the text to enter
+            submit: Locator tuple of the element to click afterwards, or None
+            mode: "fast" or "faithful", or None for FORM_FILL_MODE
+            timeout: Maximum time to wait for fields that are not yet present
+        """
+        mode = mode or FORM_FILL_MODE
+        locators = list(fields)
+        self.logger.debug(f"Filling form ({mode}): {locators}" + (f", submit {submit}" if submit else ""))
+        
+        if mode == "fast":
+            field_args = [[by, value, str(text)] for (by, value), text in fields.items()]
+            submit_arg = list(submit) if submit else None
+            result = self.driver.execute_script(scripts.FILL_FORM, field_args, submit_arg)
+            if result["missing"] or result["submitMissing"]:
+                # Wait only when something is not there yet, then try once more
+                for index in result["missing"]:
+                    self.wait_for_element_visible(locators[index], timeout)
+                if result["submitMissing"]:
+                    self.wait_for_element_visible(submit, timeout)
+                result = self.driver.execute_script(scripts.FILL_FORM, field_args, submit_arg)
+            if result["missing"] or result["submitMissing"]:
+                self.logger.error(f"Form fields not found: {locators}")
+                raise NoSuchElementException(f"Form fields not found: {locators}")
+        elif mode == "faithful":
+            all_locators = locators + ([submit] if submit else [])
+            elements = self._find_all(all_locators, timeout)
+            actions = ActionChains(self.driver)
+            for element, text in zip(elements, fields.values()):
+                actions.click(element)
+                actions.key_down(Keys.CONTROL).send_keys("a").key_up(Keys.CONTROL).send_keys(Keys.DELETE)
+                actions.send_keys(str(text))
+            if submit:
+                actions.click(elements[-1])
+            actions.perform()
+        else:
+            raise ValueError(f"Unsupported form fill mode: {mode}")
+    
+    def _find_all(self, locators, timeout=EXPLICIT_WAIT):
+        """
+        Resolve several locators with a single script call.
+        
+        Args:
+            locators: List of locator tuples (By, value)
+            timeout: Maximum time to wait for locators that match nothing yet
+        
+        Returns:
+            List[WebElement]: One element per locator, in order
+        """
+        locator_args = [list(locator) for locator in locators]
+        elements = self.driver.execute_script(scripts.FIND_ALL, locator_args)
+        missing = [locator for locator, element in zip(locators, elements) if element is None]
+        if missing:
+            for locator in missing:
+                self.wait_for_element_visible(locator, timeout)
+            elements = self.driver.execute_script(scripts.FIND_ALL, locator_args)
+            missing = [locator for locator, element in zip(locators, elements) if element is None]
+            if missing:
+                self.logger.error(f"Elements not found: {missing}")
+                raise NoSuchElementException(f"Elements not found: {missing}")
+        return elements
+    
     def get_text(self, locator, timeout=EXPLICIT_WAIT):
         """
         Get text from an element after ensuring it's visible.
@@ -292,6 +475,10 @@ class BasePage:
             self.driver.switch_to.frame(frame)
         else:
             self.driver.switch_to.default_content()
+        cdp_input = getattr(self.driver, "cdp_input", None)
+        if cdp_input:
+            # The fast path only reaches the top-level document
+            cdp_input.in_frame = bool(locator)
     
     def switch_to_window(self, window_index=0):
         """
@@ -300,7 +487,9 @@ class BasePage:
         Args:
             window_index: Index of the window to switch to
         """
-        windows = self.driver.window_handles
+        contexts = getattr(self.driver, "browser_contexts", None)
+        # In a shared browser, only this test's context windows count
+        windows = contexts.window_handles() if contexts else self.driver.window_handles
         if window_index < len(windows):
             self.driver.switch_to.window(windows[window_index])
         else:
@@ -318,18 +507,56 @@ class BasePage:
         element = self.wait_for_element_present(locator, timeout)
         self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
     
-    def wait_for_page_load(self, timeout=EXPLICIT_WAIT):
+    def _readiness(self, readiness=None):
+        """Return the readiness mode used for this page."""
+        readiness = readiness or self.READINESS or PAGE_READINESS
+        if readiness not in ("ready_state", "network_idle"):
+            raise ValueError(f"Unknown page readiness '{readiness}'; use 'ready_state' or 'network_idle'")
+        return readiness
+    
+    def _readiness_tracker(self):
+        """Get the session's readiness tracker, starting it on first use."""
+        tracker = getattr(self.driver, "readiness_tracker", None)
+        if tracker is None:
+            from utils.readiness import ReadinessTracker
+            tracker = self.driver.readiness_tracker = ReadinessTracker(self.driver).start()
+        return tracker
+    
+    def wait_for_page_load(self, timeout=EXPLICIT_WAIT, readiness=None):
         """
-        Wait for page to completely load.
+        Wait for page to be ready.
+        
+        With "network_idle" readiness the page is ready once no fetch/XHR request
+        is in flight and the DOM has been quiet for the page's quiet window; the
+        time the page went quiet is recorded with the run's performance metrics.
         
         Args:
             timeout: Maximum time to wait
+            readiness: "ready_state" or "network_idle" (default: the page's READINESS)
+        
+        Returns:
+            dict: url, readiness and waited times in ms for "network_idle", otherwise None
         """
         self.logger.debug("Waiting for page to load")
-        WebDriverWait(self.driver, timeout).until(
+        if self._readiness(readiness) == "network_idle":
+            return self._wait_for_network_idle(timeout)
+        self._wait(timeout).until(
             lambda d: d.execute_script("return document.readyState") == "complete"
         )
     
+    def _wait_for_network_idle(self, timeout):
+        """Wait for network idle and record the readiness time."""
+        from utils import perf_metrics
+        
+        quiet_ms = self.READINESS_QUIET_MS if self.READINESS_QUIET_MS is not None else READINESS_QUIET_MS
+        result = self._readiness_tracker().wait(quiet_ms, timeout)
+        test = os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0] or None
+        perf_metrics.record({"url": result["url"], "readiness": result["readiness"],
+                             "readiness_wait": result["waited"]}, test=test)
+        self.logger.info(f"Page {result['url']} network idle at {result['readiness']} ms "
+                         f"(waited {result['waited']} ms)")
+        return result
+    
     def get_current_url(self):
         """
         Get the current URL.
@@ -353,18 +580,21 @@ class BasePage:
         self.logger.debug("Refreshing page")
         self.driver.refresh()
         self.wait_for_page_load()
+        self._after_navigation()
     
     def go_back(self):
         """Navigate back to the previous page."""
         self.logger.debug("Navigating back")
         self.driver.back()
         self.wait_for_page_load()
+        self._after_navigation()
     
     def go_forward(self):
         """Navigate forward to the next page."""
         self.logger.debug("Navigating forward")
         self.driver.forward()
         self.wait_for_page_load()
+        self._after_navigation()
     
     def is_element_enabled(self, locator, timeout=EXPLICIT_WAIT):
         """
@@ -407,9 +637,109 @@ class BasePage:
             bool: True if text is present, False otherwise
         """
         try:
-            return WebDriverWait(self.driver, timeout).until(
+            return self._wait(timeout).until(
                 EC.text_to_be_present_in_element(locator, text)
             )
         except TimeoutException:
             self.logger.info(f"Text '{text}' not present in element {locator} within {timeout} seconds")
-            return False 
\ No newline at end of file
+            return False
+    
+    def assert_matches_baseline(self, name, locator=None, tolerance=None, ignore_regions=None,
+                                timeout=EXPLICIT_WAIT):
+        """
+        Assert that the page, or an element region, matches its visual baseline.
+        
+        Args:
+            name: Baseline name, e.g. "login_page"
+            locator: Tuple containing (By, value) to compare a single element, or None for the page
+            tolerance: Maximum allowed ratio of differing pixels (default: VISUAL_TOLERANCE)
+            ignore_regions: List of (x, y, width, height) rectangles or (By, value) locators to skip
+            timeout: Maximum time to wait for the element
+        
+        Returns:
+            dict: The comparison result
+        """
+        # Imported here so NumPy/Pillow are only loaded by suites that use visual checks
+        from utils.visual import check_against_baseline
+        from config.config import VISUAL_TOLERANCE
+        
+        if locator:
+            element = self.wait_for_element_visible(locator, timeout)
+            png = element.screenshot_as_png
+            origin = element.rect
+        else:
+            png = self.driver.get_screenshot_as_png()
+            origin = {"x": 0, "y": 0}
+        
+        regions = []
+        for region in ignore_regions or ():
+            if len(region) == 2:
+                rect = self.find_element(region).rect
+                regions.append((int(rect["x"] - origin["x"]), int(rect["y"] - origin["y"]),
+                                int(rect["width"]), int(rect["height"])))
+            else:
+                regions.append(tuple(int(value) for value in region))
+        
+        tolerance = VISUAL_TOLERANCE if tolerance is None else tolerance
+        result = check_against_baseline(png, name, tolerance=tolerance, ignore_regions=regions)
+        assert not result["missing"], (
+            f"No visual baseline '{name}' at {result['baseline']}; screenshot saved to {result['diff']}, "
+            f"rerun with UPDATE_BASELINES=true to accept it"
+        )
+        assert result["passed"], (
+            f"Visual mismatch for '{name}': {result['mismatch']:.2%} of pixels differ "
+            f"(tolerance {tolerance:.2%}), diff saved to {result['diff']}"
+        )
+        return result
+    
+    def get_performance_metrics(self, timeout=EXPLICIT_WAIT):
+        """
+        Collect Navigation, Paint and Resource Timing metrics for the current page.
+        
+        The timing entries are read in one script call once the load event has
+        finished, and the metrics are appended to the run's metrics file.
+        
+        Args:
+            timeout: Maximum time to wait for the page to finish loading
+        
+        Returns:
+            dict: Metrics as returned by utils.perf_metrics.extract_metrics
+        """
+        from utils import perf_metrics
+        
+        def page_timing(driver):
+            timing = driver.execute_script(scripts.PAGE_TIMING)
+            return timing if timing["navigation"] else False
+        
+        timing = self._wait(timeout).until(page_timing)
+        metrics = perf_metrics.extract_metrics(timing)
+        test = os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0] or None
+        perf_metrics.record(metrics, test=test)
+        self.logger.info(f"Page timing for {metrics['url']}: load {metrics['load']} ms, "
+                         f"FCP {metrics['first_contentful_paint']} ms, {metrics['resource_count']} resources")
+        return metrics
+    
+    def assert_performance_budget(self, budget=None, timeout=EXPLICIT_WAIT):
+        """
+        Assert that the current page meets its performance budget.
+        
+        Args:
+            budget: {metric: limit} to check, or None for the PERF_BUDGETS entry of the page URL
+            timeout: Maximum time to wait for the page to finish loading
+        
+        Returns:
+            dict: The collected metrics
+        """
+        from utils import perf_metrics
+        
+        metrics = self.get_performance_metrics(timeout)
+        if budget is None:
+            budget = perf_metrics.budget_for(metrics["url"])
+        violations = perf_metrics.check_budgets(metrics, budget)
+        assert not violations, (
+            f"Performance budget exceeded for {metrics['url']}: {'; '.join(violations)}"
+        )
+        return metrics
+
+
+tracer.instrument_class(BasePage)
@@ -0,0 +1,304 @@
+"""
+Browserless HTTP backend for the login flow page objects.
+
+HttpDriver stands in for a WebDriver: it keeps a pooled requests session,
+the current URL and the parsed HTML of the last response, and exposes the
+same ``driver.pages`` registry as browser sessions. HttpLoginPage and
+HttpSecurePage implement the LoginPage/SecurePage methods used by the step
+definitions over plain HTTP, so Gherkin scenarios can run without a browser,
+e.g. as virtual users in utils.load_runner.
+"""
+
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.webdriver.common.by import By
+from pages.login_page import LoginPage
+from pages.secure_page import SecurePage
+from pages.registry import PageRegistry
+from config.config import BASE_URL
+
+# Elements that never have a closing tag
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                 "param", "source", "track", "wbr"}
+
+# tag.class1.class2[attr='value'] -- the compound selectors the page objects use
+SIMPLE_SELECTOR = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<id>#[\w-]+)?(?P<classes>(\.[\w-]+)*)"
+                             r"(\[(?P<attr>[\w-]+)=['\"]?(?P<value>[^'\"\]]*)['\"]?\])?$")
+
+
+class HtmlElement:
+    """A parsed element with its attributes and text content."""
+
+    __slots__ = ("tag", "attrs", "parent", "text_parts")
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = {name: value or "" for name, value in attrs}
+        self.parent = parent
+        self.text_parts = []
+
+    @property
+    def text(self):
+        """str: Whitespace-normalized text of the element and its descendants."""
+        return " ".join("".join(self.text_parts).split())
+
+    def get_attribute(self, name):
+        """Return an attribute value, or None if it is not set."""
+        return self.attrs.get(name)
+
+    def matches(self, by, value):
+        """
+        Check whether the element matches a Selenium locator.
+
+        Supports ID, NAME, TAG_NAME, CLASS_NAME and simple compound CSS
+        selectors (tag, #id, .class and one [attr=value]).
+        """
+        if by == By.ID:
+            return self.attrs.get("id") == value
+        if by == By.NAME:
+            return self.attrs.get("name") == value
+        if by == By.TAG_NAME:
+            return self.tag == value.lower()
+        if by == By.CLASS_NAME:
+            return value in self.attrs.get("class", "").split()
+        if by == By.CSS_SELECTOR:
+            match = SIMPLE_SELECTOR.match(value.strip())
+            if not match:
+                raise ValueError(f"Unsupported CSS selector for the HTTP backend: {value}")
+            if match["tag"] and self.tag != match["tag"].lower():
+                return False
+            if match["id"] and self.attrs.get("id") != match["id"][1:]:
+                return False
+            classes = self.attrs.get("class", "").split()
+            if any(name not in classes for name in match["classes"].split(".")[1:]):
+                return False
+            if match["attr"] and self.attrs.get(match["attr"]) != match["value"]:
+                return False
+            return True
+        raise ValueError(f"Unsupported locator strategy for the HTTP backend: {by}")
+
+
+class HtmlDocument(HTMLParser):
+    """Flat list of the elements in an HTML page, in document order."""
+
+    def __init__(self, html):
+        super().__init__(convert_charrefs=True)
+        self.elements = []
+        self._open = []
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        element = HtmlElement(tag, attrs, self._open[-1] if self._open else None)
+        self.elements.append(element)
+        if tag not in VOID_ELEMENTS:
+            self._open.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.elements.append(HtmlElement(tag, attrs, self._open[-1] if self._open else None))
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed elements by unwinding to the matching open tag
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index].tag == tag:
+                del self._open[index:]
+                break
+
+    def handle_data(self, data):
+        for element in self._open:
+            element.text_parts.append(data)
+
+    def find(self, locator):
+        """Return the first element matching a (By, value) locator, or None."""
+        return next((element for element in self.elements if element.matches(*locator)), None)
+
+    def find_all(self, locator):
+        """Return all elements matching a (By, value) locator."""
+        return [element for element in self.elements if element.matches(*locator)]
+
+
+class HttpDriver:
+    """WebDriver stand-in that loads pages over HTTP."""
+
+    def __init__(self, base_url=BASE_URL, session=None, pool_size=10, timeout=30):
+        """
+        Initialize the driver.
+
+        Args:
+            base_url: Base URL of the application
+            session: requests.Session to use (default: a new pooled session)
+            pool_size: Connections kept alive per host
+            timeout: Request timeout in seconds
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.current_url = None
+        self.document = None
+        self.status_code = None
+        self.requests_made = 0
+        self.pages = HttpPageRegistry(self)
+
+    def _load(self, response):
+        """Record a response (after redirects) as the current page."""
+        # Redirects followed by requests count as separate round trips
+        self.requests_made += len(response.history) + 1
+        self.status_code = response.status_code
+        self.current_url = response.url
+        self.document = HtmlDocument(response.text)
+
+    def get(self, url):
+        """Load a page, following redirects."""
+        self._load(self.session.get(urljoin(self.base_url, url), timeout=self.timeout))
+
+    def post(self, url, data):
+        """Submit form data, following the redirect to the resulting page."""
+        self._load(self.session.post(urljoin(self.current_url or self.base_url, url), data=data,
+                                     timeout=self.timeout))
+
+    def reset(self):
+        """Drop cookies and the current page, keeping pooled connections open."""
+        self.session.cookies.clear()
+        self.current_url = None
+        self.document = None
+        self.pages.clear()
+
+    def quit(self):
+        """Close pooled connections."""
+        self.session.close()
+
+
+class HttpPage:
+    """Base class for HTTP page objects; mirrors the BasePage query methods."""
+
+    def __init__(self, driver):
+        """
+        Initialize the page with an HttpDriver.
+
+        Args:
+            driver: HttpDriver instance
+        """
+        self.driver = driver
+
+    def find_element(self, locator):
+        """Return the matching element of the current page, raising if absent."""
+        element = self.driver.document.find(locator) if self.driver.document else None
+        if element is None:
+            raise LookupError(f"Element not found with locator: {locator} on {self.driver.current_url}")
+        return element
+
+    def is_element_visible(self, locator, timeout=None):
+        """Check whether the current page contains the element (there is no layout over HTTP)."""
+        return self.driver.document is not None and self.driver.document.find(locator) is not None
+
+    is_element_present = is_element_visible
+
+    def get_text(self, locator, timeout=None):
+        """Return the text of the matching element."""
+        return self.find_element(locator).text
+
+    def get_current_url(self):
+        """Return the URL of the current page."""
+        return self.driver.current_url
+
+    def get_path(self):
+        """Return the path of the current page URL."""
+        return urlparse(self.driver.current_url or "").path
+
+
+class HttpLoginPage(HttpPage):
+    """Login page over HTTP: GET /login, then POST the form to /authenticate."""
+
+    USERNAME_INPUT = LoginPage.USERNAME_INPUT
+    PASSWORD_INPUT = LoginPage.PASSWORD_INPUT
+    LOGIN_BUTTON = LoginPage.LOGIN_BUTTON
+    LOGIN_ERROR_MESSAGE = LoginPage.LOGIN_ERROR_MESSAGE
+    LOGIN_SUCCESS_MESSAGE = LoginPage.LOGIN_SUCCESS_MESSAGE
+    PATH = "/login"
+
+    def __init__(self, driver):
+        super().__init__(driver)
+        self.fields = {}
+
+    def navigate(self):
+        """Load the login page."""
+        self.driver.get(self.PATH)
+        self.fields = {}
+        return self
+
+    def _set_field(self, locator, value):
+        """Store a form value under the name attribute of the located input."""
+        self.fields[self.find_element(locator).get_attribute("name")] = value
+
+    def enter_username(self, username):
+        """Set the username form field."""
+        self._set_field(self.USERNAME_INPUT, username)
+        return self
+
+    def enter_password(self, password):
+        """Set the password form field."""
+        self._set_field(self.PASSWORD_INPUT, password)
+        return self
+
+    def click_login_button(self):
+        """Submit the login form to its action URL and follow the redirect."""
+        button = self.find_element(self.LOGIN_BUTTON)
+        form = button.parent
+        while form is not None and form.tag != "form":
+            form = form.parent
+        if form is None:
+            raise LookupError(f"Login button {self.LOGIN_BUTTON} is not inside a form")
+        self.driver.post(form.get_attribute("action") or self.driver.current_url, dict(self.fields))
+        self.fields = {}
+        return self
+
+    def login(self, username, password, mode=None):
+        """Fill in and submit the login form; mode is accepted for API compatibility."""
+        return self.enter_username(username).enter_password(password).click_login_button()
+
+    def is_login_successful(self):
+        """Check whether the current page shows the login success message."""
+        return self.is_element_visible(self.LOGIN_SUCCESS_MESSAGE)
+
+    def get_error_message(self):
+        """Return the flash message text."""
+        return self.get_text(self.LOGIN_ERROR_MESSAGE)
+
+
+class HttpSecurePage(HttpPage):
+    """Secure area page over HTTP."""
+
+    SUCCESS_MESSAGE = SecurePage.SUCCESS_MESSAGE
+    LOGOUT_BUTTON = SecurePage.LOGOUT_BUTTON
+    SECURE_AREA_HEADER = SecurePage.SECURE_AREA_HEADER
+
+    def get_success_message(self):
+        """Return the success flash message text."""
+        return self.get_text(self.SUCCESS_MESSAGE)
+
+    def is_secure_page_displayed(self):
+        """Check whether the current page is the secure area."""
+        return (self.is_element_visible(self.SECURE_AREA_HEADER)
+                and "Secure Area" in self.get_text(self.SECURE_AREA_HEADER))
+
+    def logout(self):
+        """Follow the logout link."""
+        self.driver.get(self.find_element(self.LOGOUT_BUTTON).get_attribute("href"))
+        return self
+
+
+class HttpPageRegistry(PageRegistry):
+    """Page registry resolving page names to their HTTP implementations."""
+
+    PAGES = {
+        "login": HttpLoginPage,
+        "secure": HttpSecurePage,
+    }
@@ -58,20 +58,22 @@ class LoginPage(BasePage):
         self.click(self.LOGIN_BUTTON)
         return self
     
-    def login(self, username, password):
+    def login(self, username, password, mode=None):
         """
         Perform login with provided credentials.
         
+        Both fields and the login button are handled in one batched form fill.
+        
         Args:
             username: Username to enter
             password: Password to enter
+            mode: Form fill mode ("fast" or "faithful"), or None for the configured default
         
         Returns:
             LoginPage: Self reference for method chaining
         """
-        self.enter_username(username)
-        self.enter_password(password)
-        self.click_login_button()
+        self.fill_form({self.USERNAME_INPUT: username, self.PASSWORD_INPUT: password},
+                       submit=self.LOGIN_BUTTON, mode=mode)
         return self
     
     def is_login_successful(self):
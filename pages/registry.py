@@ -0,0 +1,56 @@
+from pages.login_page import LoginPage
+from pages.secure_page import SecurePage
+
+
+class PageRegistry:
+    """
+    Per-session registry that creates each page object once and reuses it.
+
+    Attached to drivers by DriverFactory as ``driver.pages``, so steps can use
+    ``driver.pages.login`` instead of constructing a new LoginPage each time.
+    Page objects (and anything they cache) are dropped by clear(), which the
+    session supervisor calls when a session is reset or quit.
+    """
+
+    # Short names available as attributes, e.g. driver.pages.login
+    PAGES = {
+        "login": LoginPage,
+        "secure": SecurePage,
+    }
+
+    def __init__(self, driver):
+        """
+        Initialize the registry for a driver session.
+
+        Args:
+            driver: Selenium WebDriver instance
+        """
+        self.driver = driver
+        self._instances = {}
+
+    def get(self, page_class):
+        """
+        Get the page object of the given class, creating it on first use.
+
+        Args:
+            page_class: A BasePage subclass
+
+        Returns:
+            BasePage: The shared page object for this session
+        """
+        page = self._instances.get(page_class)
+        if page is None:
+            page = page_class(self.driver)
+            self._instances[page_class] = page
+        return page
+
+    def __getattr__(self, name):
+        """Resolve short page names such as ``login`` to their page objects."""
+        page_class = self.PAGES.get(name)
+        if page_class is None:
+            raise AttributeError(f"No page registered as '{name}'")
+        return self.get(page_class)
+
+    def clear(self):
+        """Discard all page objects, e.g. when the session is reset or quit."""
+        self._instances.clear()
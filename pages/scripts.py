@@ -0,0 +1,236 @@
+"""JavaScript snippets executed by page objects through execute_script."""
+
+# Resolves a Selenium (By, value) locator in the page. Prepended to scripts that need it.
+FIND_BY_LOCATOR = """
+function findByLocator(by, value) {
+    switch (by) {
+        case 'id': return document.getElementById(value);
+        case 'css selector': return document.querySelector(value);
+        case 'name': return document.getElementsByName(value)[0] || null;
+        case 'class name': return document.getElementsByClassName(value)[0] || null;
+        case 'tag name': return document.getElementsByTagName(value)[0] || null;
+        case 'xpath':
+            return document.evaluate(value, document, null,
+                                     XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        case 'link text':
+        case 'partial link text':
+            return Array.prototype.find.call(document.links, function(link) {
+                var text = link.textContent.trim();
+                return by === 'link text' ? text === value : text.indexOf(value) !== -1;
+            }) || null;
+    }
+    return null;
+}
+"""
+
+# arguments[0]: list of [by, value] locators
+# Returns the matching elements (null for locators that matched nothing).
+FIND_ALL = FIND_BY_LOCATOR + """
+return arguments[0].map(function(locator) { return findByLocator(locator[0], locator[1]); });
+"""
+
+# arguments[0]: list of [by, value, text] fields; arguments[1]: optional [by, value] submit locator
+# Sets values through the native setter (so framework-bound inputs notice), fires
+# input/change events and optionally clicks submit. Returns the indexes of missing fields.
+FILL_FORM = FIND_BY_LOCATOR + """
+var fields = arguments[0], submit = arguments[1], missing = [];
+var elements = fields.map(function(field, index) {
+    var element = findByLocator(field[0], field[1]);
+    if (!element) { missing.push(index); }
+    return element;
+});
+if (missing.length || (submit && !findByLocator(submit[0], submit[1]))) {
+    return {missing: missing, submitMissing: !!submit && !findByLocator(submit[0], submit[1])};
+}
+elements.forEach(function(element, index) {
+    var prototype = Object.getPrototypeOf(element);
+    var descriptor = Object.getOwnPropertyDescriptor(prototype, 'value');
+    element.focus();
+    if (descriptor && descriptor.set) {
+        descriptor.set.call(element, fields[index][2]);
+    } else {
+        element.value = fields[index][2];
+    }
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+    element.blur();
+});
+if (submit) {
+    findByLocator(submit[0], submit[1]).click();
+}
+return {missing: [], submitMissing: false};
+"""
+
+# Returns the page's Navigation, Paint and Resource Timing entries in one call.
+# navigation is null until the load event has finished, so callers can poll.
+PAGE_TIMING = """
+var navigation = performance.getEntriesByType('navigation')[0];
+if (!navigation || !navigation.loadEventEnd) {
+    return {url: location.href, navigation: null};
+}
+return {
+    url: location.href,
+    navigation: navigation.toJSON(),
+    paint: performance.getEntriesByType('paint').map(function(entry) { return entry.toJSON(); }),
+    resources: performance.getEntriesByType('resource').map(function(entry) {
+        return {name: entry.name, initiatorType: entry.initiatorType,
+                duration: entry.duration, transferSize: entry.transferSize || 0};
+    })
+};
+"""
+
+# Scripts below run through DevTools Runtime.evaluate (CDP input fast path), wrapped
+# as functions taking the same arguments[...] as execute_script scripts.
+
+# arguments[0], arguments[1]: locator; arguments[2]: whether to select existing text
+# Focuses the field and places the caret (or a full selection) so Input.insertText
+# replaces or appends. Returns false if the element is missing or not visible.
+CDP_FOCUS_FIELD = FIND_BY_LOCATOR + """
+var element = findByLocator(arguments[0], arguments[1]);
+if (!element || !element.getClientRects().length || element.disabled || element.readOnly) {
+    return false;
+}
+element.focus();
+try {
+    if (arguments[2]) {
+        element.select();
+    } else {
+        element.setSelectionRange(element.value.length, element.value.length);
+    }
+} catch (e) {
+    // Inputs without selection support (e.g. type=number) keep the caret where it is
+}
+return true;
+"""
+
+# arguments[0], arguments[1]: locator
+# Scrolls a visible, enabled element into view and returns the viewport coordinates
+# of its centre, or null if it is missing or not clickable.
+CDP_CLICK_POINT = FIND_BY_LOCATOR + """
+var element = findByLocator(arguments[0], arguments[1]);
+if (!element || !element.getClientRects().length || element.disabled) {
+    return null;
+}
+element.scrollIntoView({block: 'center', inline: 'center'});
+var rect = element.getBoundingClientRect();
+return {x: rect.left + rect.width / 2, y: rect.top + rect.height / 2};
+"""
+
+# arguments[0]: timer speedup factor (1 leaves timers alone)
+# Disables CSS animations and transitions, smooth scrolling and jQuery effects, and
+# finishes Web Animations as soon as they start. Safe to run before the document
+# exists (registered for every new document) and more than once.
+FREEZE_ANIMATIONS = """
+if (window.__animationsFrozen) { return; }
+window.__animationsFrozen = true;
+var css = '*, *::before, *::after {' +
+    'animation-duration: 0s !important; animation-delay: 0s !important;' +
+    'transition-duration: 0s !important; transition-delay: 0s !important;' +
+    'scroll-behavior: auto !important; caret-color: transparent !important; }';
+function addStyle() {
+    var style = document.createElement('style');
+    style.id = '__freeze-animations';
+    style.textContent = css;
+    (document.head || document.documentElement).appendChild(style);
+}
+if (document.documentElement) {
+    addStyle();
+} else {
+    new MutationObserver(function(mutations, observer) {
+        if (document.documentElement) { observer.disconnect(); addStyle(); }
+    }).observe(document, {childList: true});
+}
+var animate = Element.prototype.animate;
+Element.prototype.animate = function() {
+    var animation = animate.apply(this, arguments);
+    animation.finish();
+    return animation;
+};
+function disableJQueryEffects() { if (window.jQuery) { window.jQuery.fx.off = true; } }
+disableJQueryEffects();
+document.addEventListener('DOMContentLoaded', disableJQueryEffects);
+var speedup = arguments[0];
+if (speedup > 1) {
+    var setTimeoutNative = window.setTimeout, setIntervalNative = window.setInterval;
+    window.setTimeout = function(callback, delay) {
+        var args = Array.prototype.slice.call(arguments);
+        args[1] = (delay || 0) / speedup;
+        return setTimeoutNative.apply(window, args);
+    };
+    window.setInterval = function(callback, delay) {
+        var args = Array.prototype.slice.call(arguments);
+        args[1] = (delay || 0) / speedup;
+        return setIntervalNative.apply(window, args);
+    };
+}
+"""
+
+# Installs (once per document) the tracker of in-flight fetch/XHR requests and DOM
+# mutations used by the network-idle readiness engine, and returns its state. Times are
+# performance.now() milliseconds, i.e. relative to navigation start. Works before the
+# document element exists. Prepended to scripts that need it.
+READINESS_TRACKER_FUNCTION = """
+function installReadinessTracker() {
+    if (window.__readiness) { return window.__readiness; }
+    var state = window.__readiness = {inflight: 0, lastActivity: performance.now()};
+    function touch() { state.lastActivity = performance.now(); }
+    function started() { state.inflight++; touch(); }
+    function finished() { state.inflight = Math.max(0, state.inflight - 1); touch(); }
+    if (window.fetch) {
+        var fetchNative = window.fetch;
+        window.fetch = function() {
+            started();
+            return fetchNative.apply(this, arguments).then(
+                function(response) { finished(); return response; },
+                function(error) { finished(); throw error; });
+        };
+    }
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        var xhr = this, done = false;
+        function end() { if (!done) { done = true; finished(); } }
+        started();
+        xhr.addEventListener('loadend', end);
+        try {
+            return send.apply(xhr, arguments);
+        } catch (error) {
+            end();
+            throw error;
+        }
+    };
+    new MutationObserver(touch).observe(document, {childList: true, subtree: true, attributes: true,
+                                                   characterData: true});
+    document.addEventListener('readystatechange', touch);
+    return state;
+}
+"""
+
+# Registered for every new document (Chromium) or run after navigation elsewhere.
+READINESS_TRACKER = READINESS_TRACKER_FUNCTION + """
+installReadinessTracker();
+"""
+
+# arguments[0]: quiet window (ms); arguments[1]: maximum time to wait in this call (ms)
+# Resolves (execute_async_script) as soon as the document is parsed, no fetch/XHR is in
+# flight and nothing has changed for the quiet window, or when the maximum time is up.
+# Returns {ready, readiness: when the page went quiet (ms since navigation start),
+# inflight, url}.
+READINESS_WAIT = READINESS_TRACKER_FUNCTION + """
+var state = installReadinessTracker();
+var quiet = arguments[0], deadline = performance.now() + arguments[1];
+var done = arguments[arguments.length - 1];
+function check() {
+    var now = performance.now();
+    var idleFor = now - state.lastActivity;
+    var settled = document.readyState !== 'loading' && state.inflight === 0;
+    if ((settled && idleFor >= quiet) || now >= deadline) {
+        done({ready: settled && idleFor >= quiet, readiness: state.lastActivity,
+              inflight: state.inflight, url: location.href});
+        return;
+    }
+    // Wake up exactly when the quiet window would end if nothing else happens
+    var delay = settled ? quiet - idleFor : 25;
+    setTimeout(check, Math.max(5, Math.min(delay, deadline - now)));
+}
+check();
+"""
@@ -9,14 +9,15 @@ import sys
 import argparse
 import subprocess
 import datetime
+import time
 import logging
 
 
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Run automation tests")
-    parser.add_argument("--browser", "-b", choices=["chrome", "firefox", "edge"],
-                        default="chrome", help="Browser to use for tests")
+    parser.add_argument("--browser", "-b", choices=["chrome", "firefox", "edge", "fake"],
+                        default="chrome", help="Browser to use for tests (fake: in-process, no browser)")
     parser.add_argument("--headless", action="store_true", help="Run in headless mode")
     parser.add_argument("--path", "-p", default="tests", help="Path to test files/directories")
     parser.add_argument("--markers", "-m", help="Run tests with specific pytest markers")
@@ -26,15 +27,58 @@ def parse_args():
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
     parser.add_argument("--parallel", "-n", type=int, default=0,
                         help="Number of parallel processes (default: 0 for no parallelism)")
+    parser.add_argument("--workers", "-w", type=int, default=0,
+                        help="Run tests on N forked worker processes without pytest-xdist "
+                             "(default: 0 to use a single pytest process)")
+    parser.add_argument("--max-tests-per-worker", type=int, default=50,
+                        help="Tests a --workers process runs before it is replaced (default: 50)")
+    parser.add_argument("--shared-browser", action="store_true",
+                        help="Launch one Chrome/Edge browser that all workers attach to, "
+                             "running each test in its own browser context")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running: rerun the scenarios affected by each change to features/, "
+                             "pages/ or tests/ in a warm process and browser")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Run the I-th of N shards of the selected tests, split by the shared SHARD_TIMINGS "
+                             "durations so every machine computes the same shards")
+    parser.add_argument("--merge-shards", nargs="*", metavar="FILE",
+                        help="Merge shard result files (default: all in reports/shards) instead of running tests")
     parser.add_argument("--reruns", type=int, default=0, 
                         help="Number of times to retry failed tests (default: 0)")
     parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
                         default="INFO", help="Set logging level")
     parser.add_argument("--tags", help="Run tests with specific BDD tags")
+    parser.add_argument("--perf", action="store_true",
+                        help="Also run @perf scenarios (timing budgets against the target site)")
+    parser.add_argument("--visual", action="store_true",
+                        help="Also run @visual scenarios (comparisons against baselines/)")
     parser.add_argument("--skip-browser-update", action="store_true", 
                         help="Skip automatic browser driver update")
     parser.add_argument("--clean", action="store_true", 
                         help="Clean reports and screenshots before running")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report an import-time tree for test collection instead of running tests")
+    parser.add_argument("--profile-depth", type=int, default=3,
+                        help="Tree depth shown by --profile-startup (default: 3)")
+    parser.add_argument("--history", choices=["slowest", "trends", "flaky"],
+                        help="Show a run history report instead of running tests")
+    parser.add_argument("--history-runs", type=int, default=10,
+                        help="Number of recent runs covered by --history (default: 10)")
+    parser.add_argument("--history-limit", type=int, default=10,
+                        help="Number of tests listed by --history (default: 10)")
+    parser.add_argument("--load", type=int, default=0, metavar="USERS",
+                        help="Load-test a scenario over HTTP (no browser) with USERS virtual users")
+    parser.add_argument("--load-scenario", default="Successful login with valid credentials",
+                        help="Scenario run by --load (default: 'Successful login with valid credentials')")
+    parser.add_argument("--load-feature", default="login.feature",
+                        help="Feature file containing --load-scenario, relative to features/ "
+                             "(default: login.feature)")
+    parser.add_argument("--load-iterations", type=int, default=None,
+                        help="Scenario runs per virtual user (default: 10)")
+    parser.add_argument("--load-duration", type=float, default=None,
+                        help="Run --load for this many seconds instead of a fixed number of iterations")
+    parser.add_argument("--load-standin", action="store_true",
+                        help="Run --load against a local stand-in server instead of the configured environment")
     
     return parser.parse_args()
 
@@ -53,6 +97,214 @@ def clean_directories():
     logging.info("Clean-up completed")
 
 
+# Top-level packages that belong to the framework itself
+FRAMEWORK_PACKAGES = {"conftest", "config", "pages", "utils", "features", "tests"}
+
+
+def parse_import_times(stderr):
+    """
+    Parse `python -X importtime` output into a tree.
+    
+    Args:
+        stderr: Captured stderr of the profiled process
+    
+    Returns:
+        list: Root nodes as dicts with 'name', 'self_us', 'cumulative_us' and 'children'
+    """
+    # Children are reported before their parent, indented two spaces per level
+    pending = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        node = {
+            "name": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "children": pending.pop(level + 1, []),
+        }
+        pending.setdefault(level, []).append(node)
+    return pending.get(0, [])
+
+
+def print_import_tree(nodes, max_depth, depth=0, min_ms=1.0):
+    """Print import-time nodes sorted by cumulative time, skipping imports under min_ms."""
+    for node in sorted(nodes, key=lambda n: n["cumulative_us"], reverse=True):
+        cumulative_ms = node["cumulative_us"] / 1000
+        if cumulative_ms < min_ms:
+            continue
+        print(f"{cumulative_ms:9.1f} ms {node['self_us'] / 1000:8.1f} ms  {'  ' * depth}{node['name']}")
+        if depth + 1 < max_depth:
+            print_import_tree(node["children"], max_depth, depth + 1, min_ms)
+
+
+def profile_startup(args, env):
+    """
+    Profile imports during test collection and print an import-time tree.
+    
+    Framework modules (and what they pull in) are listed separately from
+    pytest's own startup so slow imports in the framework stand out.
+    """
+    # --capture=no so pytest does not swallow the import timings written to stderr
+    cmd = [sys.executable, "-X", "importtime", "-m", "pytest", "--collect-only", "-q",
+           "--capture=no", args.path]
+    logging.info(f"Profiling startup: {' '.join(cmd)}")
+    process = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    roots = parse_import_times(process.stderr)
+    
+    framework = [n for n in roots if n["name"].split(".")[0] in FRAMEWORK_PACKAGES]
+    others = [n for n in roots if n["name"].split(".")[0] not in FRAMEWORK_PACKAGES]
+    total_ms = sum(n["cumulative_us"] for n in roots) / 1000
+    framework_ms = sum(n["cumulative_us"] for n in framework) / 1000
+    
+    print(f"Total import time: {total_ms:.1f} ms (framework: {framework_ms:.1f} ms)")
+    print(f"{'cumulative':>12} {'self':>11}  module")
+    print("-- framework --")
+    print_import_tree(framework, args.profile_depth)
+    print("-- pytest, plugins and other top-level imports --")
+    print_import_tree(others, 1)
+    return process.returncode
+
+
+def run_pool(args, env):
+    """
+    Run tests on the native process pool.
+    
+    The suite is collected once in this process; forked workers inherit the
+    imported modules and stream results back for live progress.
+    """
+    # Workers are forked, so the environment must be applied to this process
+    # before configuration is imported
+    os.environ.update(env)
+    sys.path.insert(0, os.getcwd())
+    from utils.pool_runner import PoolRunner, collect
+    
+    if args.report:
+        logging.warning("HTML reports are not supported with --workers; ignoring --report")
+    if args.parallel > 0:
+        logging.warning("--parallel is ignored when --workers is set")
+    
+    select_args = [args.path]
+    if args.markers:
+        select_args.append(f"-m={args.markers}")
+    if args.tags:
+        select_args.append(f"--bdd-tags={args.tags}")
+    if args.perf:
+        select_args.append("--perf")
+    if args.visual:
+        select_args.append("--visual")
+    # Workers run explicit node ids, so only the collection needs the shard
+    if args.shard:
+        select_args.append(f"--shard={args.shard}")
+    
+    run_args = ["-v"] if args.verbose else []
+    if args.reruns > 0:
+        run_args.append(f"--reruns={args.reruns}")
+    
+    node_ids = collect(select_args)
+    logging.info(f"Collected {len(node_ids)} tests, running on {args.workers} workers")
+    runner = PoolRunner(args.workers, args.max_tests_per_worker, run_args)
+    start_time = time.time()
+    exit_code = runner.run(node_ids)
+    if args.shard:
+        from utils.sharding import parse_shard, write_results
+        path = write_results(*parse_shard(args.shard), runner.results, time.time() - start_time)
+        logging.info(f"Shard results written to {path}")
+    return exit_code
+
+
+def run_watch(args, env):
+    """
+    Run the selected tests, then rerun affected scenarios whenever watched files change.
+    
+    Tests run in this process so imported modules and the browser session stay warm.
+    """
+    # Configuration is read at import, so the environment must be applied before it
+    env["WATCH_MODE"] = "true"
+    env["SESSION_REUSE"] = "true"
+    os.environ.update(env)
+    sys.path.insert(0, os.getcwd())
+    from utils.watch_runner import WatchRunner
+    
+    if args.report:
+        logging.warning("HTML reports are not supported with --watch; ignoring --report")
+    if args.parallel > 0 or args.workers > 0:
+        logging.warning("--parallel and --workers are ignored with --watch")
+    if args.shard:
+        logging.warning("--shard is ignored with --watch")
+    
+    select_args = [args.path]
+    if args.markers:
+        select_args.append(f"-m={args.markers}")
+    if args.tags:
+        select_args.append(f"--bdd-tags={args.tags}")
+    if args.perf:
+        select_args.append("--perf")
+    if args.visual:
+        select_args.append("--visual")
+    
+    run_args = ["-v"] if args.verbose else []
+    if args.reruns > 0:
+        run_args.append(f"--reruns={args.reruns}")
+    
+    return WatchRunner(select_args, run_args).run()
+
+
+def run_load_test(args, env):
+    """
+    Run a scenario as concurrent HTTP virtual users and print throughput and latency.
+    
+    Steps use the regular step definitions with HTTP page objects, so only
+    scenarios whose steps the HTTP backend supports can be load-tested.
+    """
+    # The load runner runs in this process, so the environment must be applied here
+    os.environ.update(env)
+    sys.path.insert(0, os.getcwd())
+    from utils.load_runner import run_load
+    
+    return run_load(args.load_feature, args.load_scenario, args.load,
+                    iterations=args.load_iterations, duration=args.load_duration,
+                    standin=args.load_standin)
+
+
+def start_shared_browser(env):
+    """
+    Launch the browser shared by all workers and point them at it.
+    
+    The browser is owned by a separate process: configuration is read once at
+    import, and the pool and watch runners import it in this process, so it
+    must not be imported here before SHARED_BROWSER is set.
+    
+    Returns:
+        subprocess.Popen: The process that owns the browser; close its stdin after the run
+    """
+    process = subprocess.Popen([sys.executable, "-m", "utils.browser_contexts"], env=env,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    address = None
+    for line in process.stdout:
+        if line.startswith("SHARED_BROWSER="):
+            address = line.strip().split("=", 1)[1]
+            break
+    if not address:
+        stop_shared_browser(process)
+        raise SystemExit("--shared-browser needs a Chromium browser (chrome or edge)")
+    logging.info(f"Shared browser listening on {address}")
+    env["SHARED_BROWSER"] = address
+    env["BROWSER_CONTEXTS"] = "true"
+    return process
+
+
+def stop_shared_browser(process):
+    """Tell the browser process to quit its session and wait for it to exit."""
+    try:
+        process.stdin.close()
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
 def run_tests(args):
     """Run tests with the specified options."""
     # Set environment variables
@@ -65,6 +317,8 @@ def run_tests(args):
         env["WDM_LOG_LEVEL"] = "0"
     
     env["PYTHONPATH"] = os.getcwd()
+    # One id for all worker processes, used by the run history and performance metrics
+    env.setdefault("TEST_RUN_ID", datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
     
     # Configure logging
     logging.basicConfig(
@@ -80,6 +334,37 @@ def run_tests(args):
     os.makedirs("reports", exist_ok=True)
     os.makedirs("logs", exist_ok=True)
     
+    if args.profile_startup:
+        return profile_startup(args, env)
+    
+    if args.history:
+        sys.path.insert(0, os.getcwd())
+        from utils.run_history import print_report
+        print_report(args.history, runs=args.history_runs, limit=args.history_limit)
+        return 0
+    
+    if args.merge_shards is not None:
+        sys.path.insert(0, os.getcwd())
+        from utils.sharding import merge_command
+        return merge_command(args.merge_shards)
+    
+    if args.load > 0:
+        return run_load_test(args, env)
+    
+    shared_browser = start_shared_browser(env) if args.shared_browser else None
+    try:
+        if args.watch:
+            return run_watch(args, env)
+        if args.workers > 0:
+            return run_pool(args, env)
+        return run_pytest(args, env)
+    finally:
+        if shared_browser:
+            stop_shared_browser(shared_browser)
+
+
+def run_pytest(args, env):
+    """Run the suite in a pytest process (with pytest-xdist for --parallel)."""
     # Build command
     cmd = [sys.executable, "-m", "pytest"]
     
@@ -92,6 +377,15 @@ def run_tests(args):
     if args.tags:
         cmd.append(f"--bdd-tags={args.tags}")
     
+    if args.perf:
+        cmd.append("--perf")
+    
+    if args.visual:
+        cmd.append("--visual")
+    
+    if args.shard:
+        cmd.append(f"--shard={args.shard}")
+    
     # Handle parallel testing
     if args.parallel > 0:
         cmd.append(f"-n={args.parallel}")
@@ -0,0 +1,95 @@
+import os
+import socket
+import time
+import pytest
+from utils.account_pool import AccountPool, AccountLeases, AccountPoolExhausted, resolve
+from config.config import TEST_DATA
+
+ACCOUNTS = {
+    "valid_user": [
+        {"username": "alice", "password": "alice-secret"},
+        {"username": "bob", "password": "bob-secret"},
+    ],
+}
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """Account pool with two valid users and a lease database of its own."""
+    return AccountPool(ACCOUNTS, path=tmp_path / "leases.sqlite", timeout=0.3)
+
+
+def test_leases_are_exclusive(pool):
+    """Test that concurrent holders never get the same account."""
+    first = pool.lease("valid_user", "test_one")
+    second = pool.lease("valid_user", "test_two")
+
+    assert first["username"] != second["username"]
+
+
+def test_lease_waits_out_its_timeout_when_every_account_is_taken(pool):
+    """Test that an exhausted dataset raises once the lease timeout has passed."""
+    pool.lease("valid_user", "test_one")
+    pool.lease("valid_user", "test_two")
+
+    started = time.monotonic()
+    with pytest.raises(AccountPoolExhausted):
+        pool.lease("valid_user", "test_three")
+    assert time.monotonic() - started >= pool.timeout
+
+
+def test_released_account_can_be_leased_again(pool):
+    """Test that releasing an account returns it to the pool."""
+    first = pool.lease("valid_user", "test_one")
+    pool.lease("valid_user", "test_two")
+    pool.release("valid_user", first)
+
+    assert pool.lease("valid_user", "test_three") == first
+
+
+def test_release_all_frees_this_process_leases(pool):
+    """Test that release_all returns every account leased by this process."""
+    first = pool.lease("valid_user", "test_one")
+    pool.lease("valid_user", "test_two")
+    pool.release_all()
+
+    assert pool.lease("valid_user", "test_three") == first
+
+
+def test_release_all_without_leases_does_not_create_the_database(tmp_path):
+    """Test that a session that leased nothing leaves no lease database behind."""
+    path = tmp_path / "leases.sqlite"
+    AccountPool(ACCOUNTS, path=path).release_all()
+    AccountPool({}, path=path).release_all()
+
+    assert not path.exists()
+
+
+def test_leases_of_dead_processes_are_reclaimed(pool):
+    """Test that a lease whose holder process no longer exists is reclaimed."""
+    connection = pool._connect()
+    # Same pid, different start time: the process that took the lease is gone
+    for account in ACCOUNTS["valid_user"]:
+        connection.execute(
+            "INSERT INTO leases (dataset, account, holder, host, pid, pid_started, leased_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ("valid_user", account["username"], "crashed_test", socket.gethostname(), os.getpid(), 1.0,
+             time.time()),
+        )
+    connection.close()
+
+    assert pool.lease("valid_user", "test_one")["username"] == "alice"
+
+
+def test_resolve_reads_leased_accounts_and_test_data(pool):
+    """Test that references resolve from the test's leases, and from TEST_DATA outside the pool."""
+    leases = AccountLeases(pool, "test_one")
+
+    username = resolve("$valid_user.username", leases)
+    assert username in {account["username"] for account in ACCOUNTS["valid_user"]}
+    assert resolve("$valid_user.password", leases) == leases.get("valid_user")["password"]
+    assert resolve("$invalid_user.username", leases) == TEST_DATA["invalid_user"]["username"]
+    assert resolve("plain text", leases) == "plain text"
+
+    leases.release()
+    assert leases.leased == {}
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import pytest
+from utils import artefact_store
+from utils.artefact_store import ArtefactStore, prune
+
+DAY = 86400
+
+
+@pytest.fixture
+def managed(tmp_path, monkeypatch):
+    """Retention over a temporary directory instead of reports/ and logs/."""
+    monkeypatch.setattr(artefact_store, "MANAGED_DIRS", (tmp_path,))
+    return tmp_path
+
+
+def write(path, size, age_days):
+    """Create a file of the given size and age."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    """Test that storing the same bytes twice writes one object and two references."""
+    store = ArtefactStore(tmp_path / "artefacts")
+    first = store.put(b"screenshot", ".png", name="first")
+    second = store.put(b"screenshot", ".png", name="second")
+
+    assert first == second
+    assert store.read(first.digest[:8]) == b"screenshot"
+    assert store.stats() == {"objects": 1, "bytes": len(b"screenshot"), "references": 2}
+
+
+def test_prune_removes_files_older_than_the_age_limit(managed):
+    """Test that old files go and recent files stay."""
+    old = write(managed / "screenshots" / "old.png", 10, age_days=20)
+    recent = write(managed / "screenshots" / "recent.png", 10, age_days=1)
+
+    result = prune(max_age_days=14, max_size_mb=0, store=ArtefactStore(managed / "artefacts"))
+
+    assert result["removed"] == 1
+    assert not old.exists() and recent.exists()
+
+
+def test_prune_removes_oldest_files_until_under_the_size_limit(managed):
+    """Test that the size limit evicts the oldest files first."""
+    files = [write(managed / f"report_{age}.html", 400 * 1024, age_days=age) for age in (3, 2, 1)]
+
+    prune(max_age_days=0, max_size_mb=1, store=ArtefactStore(managed / "artefacts"))
+
+    assert [path.exists() for path in files] == [False, True, True]
+
+
+def test_prune_keeps_protected_files(managed):
+    """Test that live logs and databases are never pruned."""
+    log = write(managed / "test_framework.log", 10, age_days=30)
+    database = write(managed / "runs.sqlite", 10, age_days=30)
+
+    prune(max_age_days=1, max_size_mb=0, store=ArtefactStore(managed / "artefacts"))
+
+    assert log.exists() and database.exists()
+
+
+def test_prune_drops_references_to_removed_objects(managed):
+    """Test that the reference index only keeps entries whose objects still exist."""
+    store = ArtefactStore(managed / "artefacts")
+    old = store.put(b"old screenshot", ".png", name="old")
+    kept = store.put(b"new screenshot", ".png", name="new")
+    mtime = time.time() - 30 * DAY
+    os.utime(old.path, (mtime, mtime))
+
+    prune(max_age_days=14, max_size_mb=0, store=store)
+
+    with open(store.refs_file) as f:
+        names = [json.loads(line)["name"] for line in f]
+    assert names == ["new"]
+    assert os.path.exists(kept.path) and not os.path.exists(old.path)
+
+
+def test_repeated_references_are_recorded_once(tmp_path):
+    """Test that storing the same content under the same name does not grow the index."""
+    store = ArtefactStore(tmp_path / "artefacts")
+    for _ in range(3):
+        store.put(b"screenshot", ".png", name="login")
+    store.put(b"screenshot", ".png", name="secure")
+
+    assert store.stats()["references"] == 2
+
+
+def test_index_is_compacted_past_its_size_limit(tmp_path, monkeypatch):
+    """Test that a growing index drops repeated references without a prune."""
+    monkeypatch.setattr(artefact_store, "REFS_COMPACT_BYTES", 1000)
+    for run in range(20):
+        # One store per run, as each test process has its own
+        store = ArtefactStore(tmp_path / "artefacts")
+        store.put(b"screenshot", ".png", name="login")
+
+    assert store.stats()["references"] < 20
+    assert store.find_name("login") == [str(store.object_path(store.digest(b"screenshot"), ".png"))]
@@ -0,0 +1,27 @@
+from utils.artefact_store import ArtefactStore
+from utils.dom_snapshot import DomSnapshotWriter, load_snapshot, render_viewer
+
+SESSION_COOKIE = {"name": "rack.session", "value": "secret-session-id", "domain": "example.test",
+                  "path": "/", "httpOnly": True, "secure": False, "sameSite": "Lax"}
+
+
+class SnapshotDriver:
+    """Just enough of a WebDriver for DomSnapshotWriter.capture."""
+
+    def execute_script(self, script, *args):
+        return {"url": "http://example.test/secure", "title": "Secure", "dom": "<html></html>", "console": []}
+
+    def get_cookies(self):
+        return [dict(SESSION_COOKIE)]
+
+
+def test_snapshot_keeps_cookie_attributes_and_redacts_values(tmp_path):
+    """Test that HttpOnly cookies are captured without their values."""
+    writer = DomSnapshotWriter(ArtefactStore(tmp_path / "artefacts"))
+    artefact = writer.capture(SnapshotDriver(), "test_failed_login")
+    writer.flush()
+
+    snapshot = load_snapshot(artefact.path)
+    assert snapshot["cookies"] == [{"name": "rack.session", "value": "<redacted>", "domain": "example.test",
+                                    "path": "/", "httpOnly": True, "secure": False}]
+    assert "secret-session-id" not in render_viewer(snapshot)
@@ -1,11 +1,22 @@
 import pytest
 from pytest_bdd import scenario, given, when, then
 
-# Import steps so they are registered
-from features.steps.login_steps import *
+# Step definitions are registered once in conftest.py via pytest_plugins
 
 
 @scenario('../features/login.feature', 'Successful login with valid credentials')
 def test_successful_login():
     """Test for successful login with valid credentials."""
-    pass 
\ No newline at end of file
+    pass 
+
+
+@scenario('../features/login.feature', 'Login flow pages load within their performance budgets')
+def test_login_flow_performance():
+    """Test that the login and secure area pages stay within their performance budgets."""
+    pass
+
+
+@scenario('../features/login.feature', 'Login flow pages match their visual baselines')
+def test_login_flow_visual():
+    """Test that the login and secure area pages match their visual baselines."""
+    pass
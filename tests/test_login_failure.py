@@ -1,8 +1,7 @@
 import pytest
 from pytest_bdd import scenario, given, when, then
 
-# Import steps so they are registered
-from features.steps.login_steps import *
+# Step definitions are registered once in conftest.py via pytest_plugins
 
 
 @scenario('../features/login.feature', 'Failed login with invalid credentials')
@@ -0,0 +1,52 @@
+import pytest
+from utils.fake_driver import fake_driver, login_flow_site
+from config.config import TEST_DATA, BASE_URL
+
+# Page objects run against the in-process fake driver: no browser and no network
+
+
+@pytest.fixture
+def fake():
+    """Fake WebDriver serving the scripted login flow."""
+    driver = fake_driver(login_flow_site())
+    yield driver
+    driver.quit()
+
+
+def test_login_with_valid_credentials(fake):
+    """Test that a valid login lands on the secure area."""
+    user = TEST_DATA['valid_user']
+    fake.pages.login.navigate().login(user['username'], user['password'])
+
+    assert fake.current_url.endswith("/secure")
+    assert fake.pages.secure.is_secure_page_displayed()
+    assert "You logged into a secure area!" in fake.pages.secure.get_success_message()
+
+
+def test_login_with_invalid_password(fake):
+    """Test that a wrong password stays on the login page with an error."""
+    login_page = fake.pages.login.navigate()
+    login_page.enter_username(TEST_DATA['valid_user']['username'])
+    login_page.enter_password("wrong password")
+    login_page.click_login_button()
+
+    assert fake.current_url.endswith("/login")
+    assert "Your password is invalid!" in login_page.get_error_message()
+
+
+def test_logout_returns_to_login_page(fake):
+    """Test that logging out leaves the secure area."""
+    user = TEST_DATA['valid_user']
+    fake.pages.login.navigate().login(user['username'], user['password'])
+    fake.pages.secure.logout()
+
+    assert fake.current_url.endswith("/login")
+    assert "You logged out of the secure area!" in fake.pages.login.get_error_message()
+
+
+def test_secure_area_requires_login(fake):
+    """Test that the secure area redirects anonymous users to the login page."""
+    fake.pages.secure.navigate_to(f"{BASE_URL}/secure")
+
+    assert fake.current_url.endswith("/login")
+    assert "You must login to view the secure area!" in fake.pages.login.get_error_message()
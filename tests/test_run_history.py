@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+import pytest
+from utils.run_history import HistoryRecorder, connect, slowest, flakiness
+
+FAST = "tests/test_suite.py::test_fast"
+SLOW = "tests/test_suite.py::test_slow"
+FLAKY = "tests/test_suite.py::test_flaky"
+
+
+def record(recorder, nodeid, outcomes, duration=1.0):
+    """Record one test's attempts, e.g. ["failed", "passed"] for a pass on the first rerun."""
+    for attempt, outcome in enumerate(outcomes):
+        recorder.start_test(nodeid)
+        recorder.add_report(SimpleNamespace(
+            nodeid=nodeid, when="call", duration=duration, rerun=attempt,
+            outcome="rerun" if outcome == "failed" and attempt < len(outcomes) - 1 else outcome,
+            failed=outcome == "failed", skipped=outcome == "skipped"))
+        recorder.finish_test(nodeid)
+
+
+@pytest.fixture
+def history(tmp_path):
+    """History database holding three runs."""
+    path = tmp_path / "runs.sqlite"
+    for run, flaky_outcomes in enumerate([["passed"], ["failed", "passed"], ["failed"]]):
+        recorder = HistoryRecorder(enabled=True, path=path, run_id=f"run{run}")
+        record(recorder, FAST, ["passed"], duration=0.5)
+        record(recorder, SLOW, ["passed"], duration=4.0 + run)
+        record(recorder, FLAKY, flaky_outcomes)
+        recorder.flush()
+    connection = connect(path)
+    yield connection
+    connection.close()
+
+
+def test_slowest_orders_by_mean_passing_duration(history):
+    """Test that the slowest tests come first, averaged over their passing runs."""
+    rows = slowest(history)
+
+    assert [row[0] for row in rows] == [SLOW, FLAKY, FAST]
+    assert rows[0][2:] == (3, pytest.approx(5.0), pytest.approx(6.0))
+
+
+def test_slowest_covers_recent_runs_only(history):
+    """Test that the slowest report only uses the requested number of recent runs."""
+    rows = slowest(history, runs=1)
+
+    assert rows[0][0] == SLOW
+    assert rows[0][2:4] == (1, pytest.approx(6.0))
+
+
+def test_flakiness_counts_reruns_and_flips(history):
+    """Test that a pass on rerun is flaky and a failing final outcome is a flip."""
+    rows = {row[0]: row for row in flakiness(history)}
+
+    nodeid, runs, failed, flaky, flips, rate = rows[FLAKY]
+    assert (runs, failed, flaky, flips) == (3, 1, 1, 1)
+    assert rate == pytest.approx(1 / 3)
+    assert rows[FAST][2:5] == (0, 0, 0)
@@ -0,0 +1,31 @@
+import io
+import base64
+import hashlib
+from PIL import Image
+from utils.artefact_store import ArtefactStore
+from utils.screencast import ScreencastEncoder
+
+
+def jpeg_frame(color):
+    """Encode a small solid-colour JPEG frame as the screencast delivers it."""
+    output = io.BytesIO()
+    Image.new("RGB", (16, 16), color).save(output, format="JPEG")
+    return base64.b64encode(output.getvalue()).decode("ascii")
+
+
+def test_encoded_screencast_is_addressed_by_its_content(tmp_path):
+    """Test that the stored animation's path is the hash of the encoded bytes, found by name."""
+    store = ArtefactStore(tmp_path / "artefacts")
+    encoder = ScreencastEncoder(store)
+    future = encoder.submit([(0.0, jpeg_frame("red")), (0.1, jpeg_frame("blue"))], "test_failed_screencast")
+    artefact = future.result(timeout=60)
+    encoder.flush()
+
+    with open(artefact.path, "rb") as f:
+        assert hashlib.sha256(f.read()).hexdigest() == artefact.digest
+    assert store.find_name("test_failed_screencast") == [artefact.path]
+
+
+def test_no_frames_schedule_nothing(tmp_path):
+    """Test that a failure without frames does not start the encoder."""
+    assert ScreencastEncoder(ArtefactStore(tmp_path)).submit([], "test_failed_screencast") is None
@@ -0,0 +1,51 @@
+import pytest
+from utils.sharding import assign, parse_shard
+
+NODE_IDS = [f"tests/test_suite.py::test_{name}" for name in "abcdef"]
+
+
+def test_every_test_runs_in_exactly_one_shard():
+    """Test that shards partition the collected tests."""
+    shards = assign(NODE_IDS, {}, 3)
+
+    assigned = [node_id for _, members in shards for node_id in members]
+    assert sorted(assigned) == sorted(NODE_IDS)
+    assert [len(members) for _, members in shards] == [2, 2, 2]
+
+
+def test_shards_are_balanced_by_duration():
+    """Test that the longest test gets a shard to itself when it outweighs the rest."""
+    durations = {NODE_IDS[0]: 10.0, NODE_IDS[1]: 3.0, NODE_IDS[2]: 3.0, NODE_IDS[3]: 2.0}
+    shards = assign(NODE_IDS[:4], durations, 2)
+
+    assert shards[0] == (10.0, [NODE_IDS[0]])
+    assert shards[1] == (8.0, NODE_IDS[1:4])
+
+
+def test_unknown_tests_count_as_the_median_duration():
+    """Test that tests without timings are expected to take the median known duration."""
+    durations = {NODE_IDS[0]: 1.0, NODE_IDS[1]: 2.0, NODE_IDS[2]: 9.0}
+    total = sum(expected for expected, _ in assign(NODE_IDS[:4], durations, 2))
+
+    assert total == 1.0 + 2.0 + 9.0 + 2.0
+
+
+def test_assignment_does_not_depend_on_collection_order():
+    """Test that machines collecting in a different order compute the same shards."""
+    durations = {node_id: float(index % 3 + 1) for index, node_id in enumerate(NODE_IDS)}
+    forward = assign(NODE_IDS, durations, 2)
+    backward = assign(list(reversed(NODE_IDS)), durations, 2)
+
+    assert [sorted(members) for _, members in forward] == [sorted(members) for _, members in backward]
+
+
+def test_parse_shard():
+    """Test that shard specs are parsed as (index, total)."""
+    assert parse_shard("2/3") == (2, 3)
+
+
+@pytest.mark.parametrize("value", ["0/3", "4/3", "3", "a/b"])
+def test_parse_shard_rejects_invalid_specs(value):
+    """Test that malformed or out-of-range shard specs are rejected."""
+    with pytest.raises(ValueError):
+        parse_shard(value)
@@ -0,0 +1,51 @@
+import numpy as np
+from utils.visual import compare_images
+
+
+def solid(width=10, height=10, value=200):
+    """RGB image of a single grey level."""
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_identical_images_match():
+    """Test that an image matches itself."""
+    mismatch, mask = compare_images(solid(), solid())
+
+    assert mismatch == 0.0
+    assert not mask.any()
+
+
+def test_changed_pixel_is_reported():
+    """Test that a clearly different pixel shows up in the ratio and the mask."""
+    actual = solid()
+    actual[2, 3] = (0, 0, 0)
+    mismatch, mask = compare_images(actual, solid())
+
+    assert mismatch == 1 / 100
+    assert mask[2, 3] and mask.sum() == 1
+
+
+def test_differences_below_the_pixel_threshold_are_ignored():
+    """Test that anti-aliasing sized differences do not count."""
+    mismatch, _ = compare_images(solid(value=205), solid(), pixel_threshold=16)
+
+    assert mismatch == 0.0
+
+
+def test_ignored_regions_are_not_compared():
+    """Test that differences inside ignore regions are skipped and excluded from the ratio."""
+    actual = solid()
+    actual[0:2, 0:5] = (0, 0, 0)
+    actual[9, 9] = (0, 0, 0)
+    mismatch, mask = compare_images(actual, solid(), ignore_regions=[(0, 0, 5, 2)])
+
+    assert mismatch == 1 / 90
+    assert mask.sum() == 1
+
+
+def test_size_change_is_a_full_mismatch():
+    """Test that screenshots of a different size never match."""
+    mismatch, mask = compare_images(solid(width=12), solid())
+
+    assert mismatch == 1.0
+    assert mask.all()
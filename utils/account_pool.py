@@ -0,0 +1,269 @@
+"""
+Test account pool leased across worker processes.
+
+A single shared account breaks under parallel runs: real applications
+invalidate the other sessions of an account when it logs in again. With
+ACCOUNTS_FILE set, each dataset in the file (e.g. "valid_user") holds a list
+of accounts, and every test that resolves "$valid_user.*" leases one of them
+for itself:
+
+    {"valid_user": [{"username": "alice", "password": "..."},
+                    {"username": "bob", "password": "..."}]}
+
+Leases live in a small SQLite table (ACCOUNT_LEASES_DB) shared by all xdist
+and pool workers of the machine. A lease is taken in an immediate
+transaction, so two workers never get the same account, and released when
+the test ends. Leases of processes that no longer exist (a crashed worker)
+are reclaimed before each lease; leases older than ACCOUNT_LEASE_MAX_AGE are
+reclaimed as well, for holders on other hosts sharing the database. When
+every account is taken the test waits up to ACCOUNT_LEASE_TIMEOUT seconds for
+one to be released.
+
+Datasets not in the file, and every dataset without ACCOUNTS_FILE, resolve
+from TEST_DATA as before.
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import psutil
+from utils.logger import get_logger
+from config.config import (
+    TEST_DATA, ACCOUNTS_FILE, ACCOUNT_LEASES_DB, ACCOUNT_LEASE_TIMEOUT, ACCOUNT_LEASE_MAX_AGE
+)
+
+logger = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    dataset TEXT NOT NULL,
+    account TEXT NOT NULL,
+    holder TEXT NOT NULL,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    pid_started REAL NOT NULL,
+    leased_at REAL NOT NULL,
+    PRIMARY KEY (dataset, account)
+);
+"""
+
+# Seconds between attempts while every account of a dataset is leased
+POLL_INTERVAL = 0.2
+
+
+class AccountPoolExhausted(RuntimeError):
+    """Raised when no account of a dataset became free within the lease timeout."""
+
+
+def load_accounts(path=ACCOUNTS_FILE):
+    """
+    Load the account lists of the pool.
+
+    Args:
+        path: JSON file mapping dataset names to lists of accounts
+
+    Returns:
+        dict: {dataset: [account dicts]}, empty if no file is configured
+    """
+    if not path:
+        return {}
+    with open(path, "r") as f:
+        accounts = json.load(f)
+    for dataset, entries in accounts.items():
+        if not isinstance(entries, list) or not entries:
+            raise ValueError(f"Dataset '{dataset}' in {path} must be a non-empty list of accounts")
+    return accounts
+
+
+def account_key(account):
+    """Return the identity of an account within its dataset."""
+    return account.get("username") or json.dumps(account, sort_keys=True)
+
+
+def _process_started(pid):
+    """Return the creation time of a process, or None if it does not exist."""
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+
+class AccountPool:
+    """Leases accounts to tests through a table shared by all processes on the machine."""
+
+    def __init__(self, accounts=None, path=ACCOUNT_LEASES_DB, timeout=ACCOUNT_LEASE_TIMEOUT,
+                 max_age=ACCOUNT_LEASE_MAX_AGE):
+        """
+        Initialize the pool.
+
+        Args:
+            accounts: {dataset: [account dicts]} (default: load_accounts())
+            path: Lease database file
+            timeout: Seconds to wait for a free account
+            max_age: Seconds after which any lease is considered abandoned
+        """
+        self.accounts = load_accounts() if accounts is None else accounts
+        self.path = str(path)
+        self.timeout = timeout
+        self.max_age = max_age
+        self.host = socket.gethostname()
+        # Processes that took a lease through this pool; forked workers inherit the pool object
+        self._leasing_pids = set()
+
+    def __contains__(self, dataset):
+        return dataset in self.accounts
+
+    def _connect(self):
+        """Open the lease database; one connection per call keeps the pool usable from threads."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Autocommit mode so the explicit BEGIN IMMEDIATE below controls the transaction
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _reclaim(self, connection):
+        """Delete leases of dead processes on this host and leases older than max_age."""
+        now = time.time()
+        for dataset, account, host, pid, pid_started, leased_at in connection.execute(
+                "SELECT dataset, account, host, pid, pid_started, leased_at FROM leases").fetchall():
+            if host == self.host:
+                started = _process_started(pid)
+                # A reused pid belongs to a different process than the one that took the lease
+                abandoned = started is None or abs(started - pid_started) > 1
+            else:
+                abandoned = now - leased_at > self.max_age
+            if abandoned:
+                logger.warning(f"Reclaiming account '{account}' ({dataset}) leased by {host}:{pid}")
+                connection.execute("DELETE FROM leases WHERE dataset = ? AND account = ?", (dataset, account))
+
+    def lease(self, dataset, holder):
+        """
+        Lease a free account of a dataset, waiting for one if all are taken.
+
+        Args:
+            dataset: Dataset name, e.g. "valid_user"
+            holder: Description of the lessee (the test's node id), stored for diagnostics
+
+        Returns:
+            dict: The leased account
+        """
+        # Read per lease: pool workers are forked after the pool is created
+        pid = os.getpid()
+        pid_started = _process_started(pid) or 0.0
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection = self._connect()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                self._reclaim(connection)
+                leased = {row[0] for row in connection.execute(
+                    "SELECT account FROM leases WHERE dataset = ?", (dataset,))}
+                account = next((account for account in self.accounts[dataset]
+                                if account_key(account) not in leased), None)
+                if account is not None:
+                    connection.execute(
+                        "INSERT INTO leases (dataset, account, holder, host, pid, pid_started, leased_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (dataset, account_key(account), holder, self.host, pid, pid_started, time.time()),
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                raise
+            finally:
+                connection.close()
+            if account is not None:
+                self._leasing_pids.add(pid)
+                logger.info(f"Leased account '{account_key(account)}' ({dataset}) to {holder}")
+                return account
+            if time.monotonic() >= deadline:
+                raise AccountPoolExhausted(
+                    f"All {len(self.accounts[dataset])} '{dataset}' accounts stayed leased for {self.timeout}s; "
+                    "add accounts to ACCOUNTS_FILE or run fewer tests in parallel")
+            time.sleep(POLL_INTERVAL)
+
+    def release(self, dataset, account):
+        """Return a leased account to the pool."""
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM leases WHERE dataset = ? AND account = ? AND host = ? AND pid = ?",
+                               (dataset, account_key(account), self.host, os.getpid()))
+        finally:
+            connection.close()
+
+    def release_all(self):
+        """Release every lease held by this process, e.g. at the end of the session."""
+        # Without a lease there is nothing to release, and no reason to create the database
+        if not self.accounts or os.getpid() not in self._leasing_pids:
+            return
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM leases WHERE host = ? AND pid = ?", (self.host, os.getpid()))
+        finally:
+            connection.close()
+        self._leasing_pids.discard(os.getpid())
+
+
+class AccountLeases:
+    """The accounts leased by one test, resolving "$dataset.key" test data references."""
+
+    def __init__(self, pool, holder):
+        """
+        Initialize the test's leases.
+
+        Args:
+            pool: AccountPool the accounts are leased from
+            holder: The test's node id
+        """
+        self.pool = pool
+        self.holder = holder
+        self.leased = {}
+
+    def get(self, dataset):
+        """
+        Return the test's account of a dataset, leasing one on first use.
+
+        Datasets outside the pool come from TEST_DATA.
+        """
+        if dataset not in self.pool:
+            return TEST_DATA.get(dataset)
+        if dataset not in self.leased:
+            self.leased[dataset] = self.pool.lease(dataset, self.holder)
+        return self.leased[dataset]
+
+    def release(self):
+        """Return all of the test's accounts to the pool."""
+        for dataset, account in self.leased.items():
+            self.pool.release(dataset, account)
+        self.leased.clear()
+
+
+def resolve(value, accounts=None):
+    """
+    Resolve a "$dataset.key" test data reference.
+
+    Args:
+        value: Step argument, e.g. "$valid_user.username"; other values are returned unchanged
+        accounts: The test's AccountLeases, or None to resolve from TEST_DATA
+
+    Returns:
+        str: The referenced value, or value itself if it is not a known reference
+    """
+    if not value.startswith("$"):
+        return value
+    parts = value[1:].split(".")
+    if len(parts) != 2:
+        return value
+    dataset, key = parts
+    data = accounts.get(dataset) if accounts else TEST_DATA.get(dataset)
+    if data and key in data:
+        return data[key]
+    return value
+
+
+def valid_accounts():
+    """Return every account the stand-in sites accept: the pooled valid users, or TEST_DATA's."""
+    return load_accounts().get("valid_user") or [TEST_DATA["valid_user"]]
@@ -0,0 +1,58 @@
+"""
+Animation and transition freezing for browser sessions.
+
+With FREEZE_ANIMATIONS enabled, every document loaded in the session gets a
+stylesheet that zeroes CSS animation and transition durations and turns off
+smooth scrolling, and jQuery effects and Web Animations finish immediately.
+Elements are therefore interactable, hidden or in place as soon as the
+page's state changes, and BasePage waits poll fast instead of sitting out
+fades. TIMER_SPEEDUP > 1 additionally shortens setTimeout/setInterval delays.
+"""
+
+from utils.logger import get_logger
+from utils.cdp_input import cdp_expression
+from pages import scripts
+from config.config import TIMER_SPEEDUP
+
+logger = get_logger()
+
+
+class AnimationFreezer:
+    """Injects the animation-freezing script into the documents of one session."""
+
+    def __init__(self, driver, timer_speedup=TIMER_SPEEDUP):
+        """
+        Initialize the freezer.
+
+        Args:
+            driver: WebDriver instance
+            timer_speedup: Factor dividing page timer delays (1 leaves timers alone)
+        """
+        self.driver = driver
+        self.timer_speedup = timer_speedup
+        # True once the script is registered for every new document (Chromium only)
+        self.persistent = False
+
+    def start(self):
+        """
+        Register the script for all future documents where the browser supports it.
+
+        Chromium browsers run it through Page.addScriptToEvaluateOnNewDocument,
+        which also covers navigations triggered by clicks and redirects. Other
+        browsers rely on apply() after each page object navigation.
+
+        Returns:
+            AnimationFreezer: self
+        """
+        if hasattr(self.driver, "execute_cdp_cmd"):
+            try:
+                self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                    "source": cdp_expression(scripts.FREEZE_ANIMATIONS, self.timer_speedup)})
+                self.persistent = True
+            except Exception as e:
+                logger.warning(f"Could not register animation freezing for new documents: {e}")
+        return self
+
+    def apply(self):
+        """Freeze animations in the current document (no-op if already frozen)."""
+        self.driver.execute_script(scripts.FREEZE_ANIMATIONS, self.timer_speedup)
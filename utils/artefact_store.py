@@ -0,0 +1,407 @@
+"""
+Content-addressed store for test artefacts, with a retention policy.
+
+Screenshots and DOM snapshots are stored once per distinct content under
+reports/artefacts/objects/<first two hex digits>/<sha256><extension>;
+storing the same bytes again only refreshes the object's modification time.
+Every store call appends a reference (name, run, time -> hash) to
+refs.jsonl, unless this process already recorded the same name for the same
+hash, and reports refer to artefacts by hash. Appends share a lock on
+refs.lock that compaction takes exclusively, so references written by other
+workers while the index is rewritten are not lost. Compaction drops
+references to removed objects and repeated (hash, name) pairs; it runs on
+every prune and whenever the index grows past REFS_COMPACT_BYTES, so the
+index stays bounded when pruning is off.
+
+prune() enforces ARTEFACT_MAX_AGE_DAYS and ARTEFACT_MAX_SIZE_MB over the
+store and the other generated directories (rotated logs, HTML reports,
+traces, metrics, visual diffs). start_background_prune() runs it on a
+daemon thread so test sessions do not wait for it.
+
+    python -m utils.artefact_store [stats|prune|find <hash or name>]
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import namedtuple
+from config.config import (
+    ARTEFACTS_DIR, REPORTS_DIR, LOGS_DIR, ARTEFACT_MAX_AGE_DAYS, ARTEFACT_MAX_SIZE_MB, RUN_ID
+)
+from utils.logger import get_logger
+
+# zstandard is optional; gzip from the standard library is the fallback
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# fcntl is POSIX-only; without it the reference index is not locked
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = get_logger()
+
+# The reference index is compacted when an append takes it past this size
+REFS_COMPACT_BYTES = 1024 * 1024
+
+Artefact = namedtuple("Artefact", ["digest", "path"])
+
+# Directories whose files are subject to retention, in addition to the store itself
+MANAGED_DIRS = (REPORTS_DIR, LOGS_DIR)
+
+# Files retention never touches: live logs, databases and the reference index
+PROTECTED_SUFFIXES = (".log", ".sqlite", ".sqlite-wal", ".sqlite-shm", "refs.jsonl", "refs.lock")
+
+
+def compress(data, filepath):
+    """
+    Compress bytes using the codec implied by the file extension.
+
+    Args:
+        data: Bytes to compress
+        filepath: Target path (.zst or .gz)
+
+    Returns:
+        bytes: The compressed data
+    """
+    if str(filepath).endswith(".zst"):
+        return zstandard.ZstdCompressor().compress(data)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, mtime=0)
+
+
+def decompress(data, filepath):
+    """
+    Decompress bytes written by compress().
+
+    Args:
+        data: Compressed bytes
+        filepath: Source path (.zst or .gz)
+
+    Returns:
+        bytes: The original data
+    """
+    if str(filepath).endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("The zstandard package is required to read .zst files")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class ArtefactStore:
+    """Stores artefacts by the SHA-256 of their content."""
+
+    def __init__(self, root=ARTEFACTS_DIR):
+        """
+        Initialize the store.
+
+        Args:
+            root: Store directory; objects live in root/objects
+        """
+        self.root = root
+        self.objects_dir = root / "objects"
+        self.refs_file = root / "refs.jsonl"
+        self.lock_file = root / "refs.lock"
+        self.compressed_extension = ".zst" if zstandard else ".gz"
+        # Names this process has already recorded in the index, by digest
+        self._recorded = {}
+        # Index size that triggers the next compaction
+        self._compact_at = REFS_COMPACT_BYTES
+
+    @staticmethod
+    def digest(data):
+        """Return the content hash used as the artefact's address."""
+        return hashlib.sha256(data).hexdigest()
+
+    def object_path(self, digest, extension):
+        """Return where the object with the given hash and extension is stored."""
+        return self.objects_dir / digest[:2] / f"{digest}{extension}"
+
+    def put(self, data, extension, name=None, compressed=False, digest=None):
+        """
+        Store bytes, writing them only if the content is not stored yet.
+
+        Args:
+            data: Artefact content
+            extension: File extension, e.g. ".png" or ".json"
+            name: Human-readable name recorded in the reference index
+            compressed: Compress the object (zstd if available, otherwise gzip)
+            digest: Precomputed sha256 of data, if the caller already has it
+
+        Returns:
+            Artefact: (digest, path) of the stored object
+        """
+        digest = digest or self.digest(data)
+        if compressed:
+            extension += self.compressed_extension
+        path = self.object_path(digest, extension)
+        if path.exists():
+            # Refresh the age used by retention: the content is still in use
+            os.utime(path)
+        else:
+            # Written again after a prune, whose compaction dropped the object's references
+            self._recorded.pop(digest, None)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(compress(data, path) if compressed else data)
+            # Atomic, so concurrent workers storing the same content never see a partial file
+            os.replace(tmp_path, path)
+        self._add_ref(digest, path, name)
+        return Artefact(digest, str(path))
+
+    def put_file(self, filepath, name=None, compressed=False):
+        """
+        Move an existing file into the store.
+
+        Args:
+            filepath: File to store; it is removed afterwards
+            name: Name recorded in the reference index (default: the file name)
+            compressed: Compress the object
+
+        Returns:
+            Artefact: (digest, path) of the stored object
+        """
+        with open(filepath, "rb") as f:
+            data = f.read()
+        basename = os.path.basename(filepath)
+        extension = basename[basename.index("."):] if "." in basename else ""
+        artefact = self.put(data, extension, name or basename, compressed)
+        os.remove(filepath)
+        return artefact
+
+    def find(self, digest):
+        """
+        Find a stored object by full or abbreviated hash.
+
+        Args:
+            digest: sha256 hex digest or a unique prefix of at least 4 characters
+
+        Returns:
+            str: Path of the object, or None if it is not stored
+        """
+        matches = sorted((self.objects_dir / digest[:2]).glob(f"{digest}*")) if len(digest) >= 4 else []
+        return str(matches[0]) if matches else None
+
+    def read(self, digest):
+        """
+        Read a stored object's content, decompressing it if needed.
+
+        Args:
+            digest: sha256 hex digest or unique prefix
+
+        Returns:
+            bytes: The artefact content
+        """
+        path = self.find(digest)
+        if path is None:
+            raise KeyError(f"No artefact with hash {digest}")
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith((".zst", ".gz")):
+            data = decompress(data, path)
+        return data
+
+    def find_name(self, name):
+        """
+        Find the objects stored under a reference name, e.g. a screencast still being encoded.
+
+        Args:
+            name: Name passed to put()
+
+        Returns:
+            list: Paths of the referenced objects that still exist, oldest first
+        """
+        paths = []
+        if not self.refs_file.exists():
+            return paths
+        with open(self.refs_file) as f:
+            for line in f:
+                try:
+                    ref = json.loads(line)
+                except ValueError:
+                    continue
+                path = str(self.root / ref["path"])
+                if ref.get("name") == name and path not in paths and os.path.exists(path):
+                    paths.append(path)
+        return paths
+
+    @contextmanager
+    def locked_refs(self, exclusive=False):
+        """
+        Hold the reference index lock.
+
+        Appends take it shared, since one small append is atomic; rewriting the
+        index takes it exclusively, so no append lands in the file being replaced.
+
+        Args:
+            exclusive: Lock out all other holders
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _add_ref(self, digest, path, name):
+        """Append a reference to the index, compacting it once it grows past REFS_COMPACT_BYTES."""
+        if name in self._recorded.get(digest, ()):
+            return
+        line = json.dumps({"sha256": digest, "path": os.path.relpath(path, self.root), "name": name,
+                           "run_id": RUN_ID, "time": time.time()})
+        with self.locked_refs():
+            with open(self.refs_file, "a") as f:
+                f.write(line + "\n")
+                size = f.tell()
+        self._recorded.setdefault(digest, set()).add(name)
+        # Outside the shared lock, which compaction's exclusive lock would wait on
+        if size > self._compact_at:
+            _compact_refs(self)
+            # An index of mostly distinct references stays large; do not compact it on every append
+            self._compact_at = max(REFS_COMPACT_BYTES, 2 * self.refs_file.stat().st_size)
+
+    def stats(self):
+        """
+        Summarize the store.
+
+        Returns:
+            dict: Object count and bytes on disk, and how many references they serve
+        """
+        sizes = [path.stat().st_size for path in self.objects_dir.rglob("*") if path.is_file()]
+        references = 0
+        if self.refs_file.exists():
+            with open(self.refs_file) as f:
+                references = sum(1 for _ in f)
+        return {"objects": len(sizes), "bytes": sum(sizes), "references": references}
+
+
+def _managed_files():
+    """List files subject to retention as (mtime, size, path), oldest first."""
+    files = []
+    for directory in MANAGED_DIRS:
+        for path in directory.rglob("*"):
+            if not path.is_file() or path.name.endswith(PROTECTED_SUFFIXES) or path.name.endswith(".tmp"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    return files
+
+
+def prune(max_age_days=ARTEFACT_MAX_AGE_DAYS, max_size_mb=ARTEFACT_MAX_SIZE_MB, store=None):
+    """
+    Delete artefacts older than the age limit, then the oldest until under the size limit.
+
+    Args:
+        max_age_days: Maximum age in days (0 to disable)
+        max_size_mb: Maximum total size in MB of managed files (0 to disable)
+        store: ArtefactStore whose reference index is compacted afterwards
+
+    Returns:
+        dict: Number of files and bytes removed, and bytes kept
+    """
+    files = _managed_files()
+    total = sum(size for _, size, _ in files)
+    cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+    limit = max_size_mb * 1024 * 1024 if max_size_mb else None
+    removed = removed_bytes = 0
+    for mtime, size, path in files:
+        too_old = cutoff is not None and mtime < cutoff
+        too_big = limit is not None and total > limit
+        if not (too_old or too_big):
+            # Oldest first: later files are newer and the total only shrinks
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+        removed_bytes += size
+        total -= size
+
+    # Also after a pass that removed nothing: compaction drops repeated references too
+    _compact_refs(store or ArtefactStore())
+    return {"removed": removed, "removed_bytes": removed_bytes, "kept_bytes": total}
+
+
+def _compact_refs(store):
+    """Drop index entries whose objects were pruned, keeping the latest entry per (hash, name)."""
+    with store.locked_refs(exclusive=True):
+        if not store.refs_file.exists():
+            return
+        latest = {}
+        with open(store.refs_file) as source:
+            for line in source:
+                try:
+                    ref = json.loads(line)
+                    key = (ref["sha256"], ref.get("name"))
+                    path = ref["path"]
+                except (ValueError, KeyError):
+                    continue
+                # Re-inserting moves the key to the end, so entries stay in order of last use
+                latest.pop(key, None)
+                latest[key] = (path, line)
+        tmp_file = store.refs_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w") as target:
+            for path, line in latest.values():
+                if (store.root / path).exists():
+                    target.write(line)
+        os.replace(tmp_file, store.refs_file)
+
+
+def start_background_prune(**limits):
+    """
+    Run prune() on a daemon thread.
+
+    Args:
+        **limits: max_age_days / max_size_mb overrides
+
+    Returns:
+        threading.Thread: The started thread (join it to wait for completion)
+    """
+    def run():
+        try:
+            result = prune(**limits)
+            if result["removed"]:
+                logger.info(f"Pruned {result['removed']} artefacts ({result['removed_bytes'] / 1e6:.1f} MB), "
+                            f"{result['kept_bytes'] / 1e6:.1f} MB kept")
+        except Exception as e:
+            logger.warning(f"Artefact pruning failed: {e}")
+
+    thread = threading.Thread(target=run, name="artefact-prune", daemon=True)
+    thread.start()
+    return thread
+
+
+# Shared store for the current process
+store = ArtefactStore()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "prune":
+        result = prune()
+        print(f"Removed {result['removed']} files ({result['removed_bytes'] / 1e6:.1f} MB), "
+              f"{result['kept_bytes'] / 1e6:.1f} MB kept")
+    elif command == "stats":
+        stats = store.stats()
+        print(f"{stats['objects']} objects, {stats['bytes'] / 1e6:.1f} MB, "
+              f"serving {stats['references']} references")
+    elif command == "find" and len(sys.argv) == 3:
+        found = store.find(sys.argv[2])
+        paths = [found] if found else store.find_name(sys.argv[2])
+        print("\n".join(paths) or f"No artefact with hash or name {sys.argv[2]}")
+    else:
+        print("Usage: python -m utils.artefact_store [stats|prune|find <hash or name>]")
+        sys.exit(1)
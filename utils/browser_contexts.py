@@ -0,0 +1,180 @@
+"""
+Isolated browser contexts for Chromium sessions.
+
+With BROWSER_CONTEXTS enabled, the session supervisor keeps one browser per
+worker and gives every test a fresh incognito-like browser context (own
+cookies, storage and cache), created with Target.createBrowserContext over
+the browser's DevTools endpoint. The test's WebDriver handle is switched to
+the context's page, and disposing of the context is the per-test teardown
+instead of driver.quit().
+
+With SHARED_BROWSER set (run_tests.py --shared-browser), workers do not
+launch a browser at all: their WebDriver sessions attach to one browser
+process and each test runs in its own context there. That browser is owned
+by a separate process (python -m utils.browser_contexts) so the runner can
+set SHARED_BROWSER before anything in it imports the configuration.
+"""
+
+import sys
+import json
+import time
+import itertools
+import threading
+from utils.logger import get_logger
+from utils.screencast import debugger_address
+
+logger = get_logger()
+
+
+class BrowserContexts:
+    """Creates and disposes of isolated browser contexts for one WebDriver session."""
+
+    def __init__(self, driver):
+        """
+        Initialize the context manager.
+
+        Args:
+            driver: WebDriver instance of a Chromium browser
+        """
+        self.driver = driver
+        self.context_id = None
+        self.window = None
+        self._base_window = None
+        self._socket = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def start(self):
+        """
+        Connect to the browser's DevTools endpoint.
+
+        Returns:
+            BrowserContexts: self, or None if the browser has no DevTools endpoint
+        """
+        # websocket-client ships with Selenium
+        import websocket
+        import urllib.request
+
+        address = debugger_address(self.driver)
+        if not address:
+            logger.info("Browser contexts need a Chromium browser; using one session per test")
+            return None
+        try:
+            with urllib.request.urlopen(f"http://{address}/json/version", timeout=5) as response:
+                browser_url = json.loads(response.read())["webSocketDebuggerUrl"]
+            # suppress_origin: DevTools rejects websocket clients sending an Origin header
+            self._socket = websocket.create_connection(browser_url, timeout=10, suppress_origin=True)
+        except Exception as e:
+            logger.warning(f"Browser contexts unavailable, using one session per test: {e}")
+            return None
+        self._base_window = self.driver.current_window_handle
+        return self
+
+    def _command(self, method, params=None):
+        """Send a browser-level DevTools command and wait for its response."""
+        with self._lock:
+            command_id = next(self._ids)
+            self._socket.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+            while True:
+                message = json.loads(self._socket.recv())
+                # No domains are enabled, so anything else is a stray event
+                if message.get("id") == command_id:
+                    break
+        if "error" in message:
+            raise RuntimeError(f"{method} failed: {message['error'].get('message')}")
+        return message["result"]
+
+    def open(self, timeout=10):
+        """
+        Create a context with one blank page and switch the driver to it.
+
+        Args:
+            timeout: Seconds to wait for the driver to see the new page
+
+        Returns:
+            str: Window handle of the context's page
+        """
+        if self.context_id:
+            self.close()
+        # disposeOnDetach: contexts of a crashed worker disappear with its connection
+        self.context_id = self._command("Target.createBrowserContext",
+                                        {"disposeOnDetach": True})["browserContextId"]
+        target_id = self._command("Target.createTarget", {"url": "about:blank",
+                                                          "browserContextId": self.context_id})["targetId"]
+        # chromedriver window handles are DevTools target ids; it learns of new targets lazily
+        deadline = time.monotonic() + timeout
+        while target_id not in self.driver.window_handles:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Browser context page {target_id} did not appear")
+            time.sleep(0.05)
+        self.driver.switch_to.window(target_id)
+        self.window = target_id
+        return target_id
+
+    def window_handles(self):
+        """
+        List the windows of the current context, in the driver's order.
+
+        Returns:
+            list: Window handles belonging to this test's context
+        """
+        if not self.context_id:
+            return self.driver.window_handles
+        targets = self._command("Target.getTargets")["targetInfos"]
+        own = {target["targetId"] for target in targets
+               if target.get("browserContextId") == self.context_id and target["type"] == "page"}
+        return [handle for handle in self.driver.window_handles if handle in own]
+
+    def close(self):
+        """Dispose of the current context, closing its pages and discarding its storage."""
+        if not self.context_id:
+            return
+        context_id, self.context_id, self.window = self.context_id, None, None
+        try:
+            self.driver.switch_to.window(self._base_window)
+        except Exception as e:
+            logger.debug(f"Could not switch back to the base window: {e}")
+        self._command("Target.disposeBrowserContext", {"browserContextId": context_id})
+
+    def stop(self):
+        """Dispose of the current context and close the DevTools connection."""
+        try:
+            self.close()
+        except Exception as e:
+            logger.debug(f"Failed to dispose of browser context: {e}")
+        if self._socket:
+            try:
+                self._socket.close()
+            except Exception:
+                pass
+            self._socket = None
+
+
+def serve_shared_browser():
+    """
+    Launch a browser for --shared-browser and keep it open until stdin closes.
+
+    The DevTools address is written to stdout as a SHARED_BROWSER=host:port
+    line; the session quits, closing the browser, when the parent closes the
+    pipe or exits.
+
+    Returns:
+        int: 0, or 1 if the browser has no DevTools endpoint
+    """
+    from utils.driver_factory import DriverFactory
+
+    driver = DriverFactory.get_driver()
+    try:
+        address = debugger_address(driver)
+        if not address:
+            # The runner reports the missing address
+            return 1
+        print(f"SHARED_BROWSER={address}", flush=True)
+        sys.stdin.read()
+        return 0
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    sys.exit(serve_shared_browser())
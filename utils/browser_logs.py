@@ -0,0 +1,129 @@
+import json
+from collections import deque, OrderedDict
+from utils.logger import get_logger
+from config.config import BROWSER_LOG_BUFFER_SIZE
+
+logger = get_logger()
+
+# Console levels reported as errors in the scenario summary
+ERROR_LEVELS = {"SEVERE", "ERROR", "error"}
+
+
+class BrowserLogCollector:
+    """
+    Collects browser console and network logs into bounded ring buffers.
+
+    Chromium browsers buffer log entries on the driver side, so nothing is
+    fetched until drain() is called at a step boundary or on failure.
+    Firefox pushes console entries over BiDi as they happen.
+    """
+
+    def __init__(self, driver, capacity=BROWSER_LOG_BUFFER_SIZE):
+        """
+        Initialize the collector.
+
+        Args:
+            driver: WebDriver instance with logging enabled
+            capacity: Maximum number of entries kept per buffer
+        """
+        self.driver = driver
+        self.capacity = capacity
+        self.console = deque(maxlen=capacity)
+        self.network = deque(maxlen=capacity)
+        # Requests waiting for loadingFinished/loadingFailed, oldest first; aborted requests
+        # never get either event, so the oldest are dropped beyond capacity
+        self._pending_requests = OrderedDict()
+        self._log_types = set()
+
+    def start(self):
+        """Detect available log sources and subscribe to BiDi events where supported."""
+        try:
+            self._log_types = set(self.driver.log_types) & {"browser", "performance"}
+        except Exception:
+            self._log_types = set()
+
+        if not self._log_types and self.driver.caps.get("webSocketUrl"):
+            try:
+                self.driver.script.add_console_message_handler(self._on_bidi_entry)
+                self.driver.script.add_javascript_error_handler(self._on_bidi_entry)
+            except Exception as e:
+                logger.debug(f"BiDi log subscription unavailable: {e}")
+        return self
+
+    def _on_bidi_entry(self, entry):
+        """Store a console or JavaScript error entry pushed over BiDi."""
+        self.console.append({"level": entry.level, "message": entry.text, "timestamp": entry.timestamp})
+
+    def drain(self):
+        """Fetch buffered entries from the driver into the ring buffers."""
+        if "browser" in self._log_types:
+            for entry in self.driver.get_log("browser"):
+                self.console.append({"level": entry["level"], "message": entry["message"],
+                                     "timestamp": entry["timestamp"]})
+        if "performance" in self._log_types:
+            for entry in self.driver.get_log("performance"):
+                self._handle_performance_entry(json.loads(entry["message"])["message"])
+
+    def _handle_performance_entry(self, message):
+        """Turn DevTools Network events into completed request records."""
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            self._pending_requests[params["requestId"]] = {
+                "url": params["request"]["url"],
+                "method": params["request"]["method"],
+                "start": params["timestamp"],
+            }
+            self._pending_requests.move_to_end(params["requestId"])
+            while len(self._pending_requests) > self.capacity:
+                self._pending_requests.popitem(last=False)
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            request = self._pending_requests.pop(params["requestId"], None)
+            if request:
+                self.network.append({
+                    "url": request["url"],
+                    "method": request["method"],
+                    "duration_ms": round((params["timestamp"] - request["start"]) * 1000, 1),
+                    "failed": method == "Network.loadingFailed",
+                })
+
+    def reset(self):
+        """Discard collected entries, e.g. between scenarios on a reused session."""
+        self.console.clear()
+        self.network.clear()
+        self._pending_requests.clear()
+
+    def summary(self, top=5):
+        """
+        Summarise the collected entries.
+
+        Args:
+            top: Number of slowest requests to include
+
+        Returns:
+            dict: 'slowest_requests', 'failed_requests' and 'console_errors'
+        """
+        return {
+            "slowest_requests": sorted(self.network, key=lambda r: r["duration_ms"], reverse=True)[:top],
+            "failed_requests": [r for r in self.network if r["failed"]],
+            "console_errors": [e for e in self.console if e["level"] in ERROR_LEVELS],
+        }
+
+    def format_summary(self, top=5):
+        """
+        Format the summary as log-friendly text.
+
+        Args:
+            top: Number of slowest requests to include
+
+        Returns:
+            str: Multi-line summary
+        """
+        summary = self.summary(top)
+        lines = [f"Slowest network requests ({len(self.network)} recorded):"]
+        lines += [f"  {r['duration_ms']:>8.1f} ms  {r['method']} {r['url']}" for r in summary["slowest_requests"]]
+        lines.append(f"Failed requests: {len(summary['failed_requests'])}")
+        lines += [f"  {r['method']} {r['url']}" for r in summary["failed_requests"]]
+        lines.append(f"Console errors: {len(summary['console_errors'])}")
+        lines += [f"  {e['message']}" for e in summary["console_errors"]]
+        return "\n".join(lines)
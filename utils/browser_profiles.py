@@ -0,0 +1,282 @@
+"""
+Pre-built browser profile templates cloned per session.
+
+A fresh profile costs every launch its first-run work: creating databases
+(cookies, certificates, history), first-run and default-browser checks,
+component and update checks. With PROFILE_TEMPLATE enabled, DriverFactory
+builds one initialised profile per browser and run (prefs written, optional
+PROFILE_WARM_URLS cached) and launches every session on a private copy of it.
+Copies go to tmpfs (/dev/shm) when available and are removed when the
+session quits; copies left by crashed workers are removed at the next
+session start.
+
+Copies are real copies, not hardlinks: browsers update their SQLite
+databases in place, which would write through a hardlink into the template.
+
+Compare launch times with and without templates:
+
+    python -m utils.browser_profiles [--launches N]
+"""
+
+import os
+import copy
+import time
+import shutil
+import argparse
+import itertools
+import statistics
+import tempfile
+from pathlib import Path
+import psutil
+from utils.logger import get_logger
+from config.config import PROFILE_WARM_URLS, RUN_ID
+
+logger = get_logger()
+
+TEMPLATES_DIR = Path(tempfile.gettempdir()) / "bdd-profile-templates"
+# Profiles are small and write-heavy during startup, so copies live in memory where possible
+COPIES_DIR = Path("/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()) / "bdd-profiles"
+
+# Templates older than this belong to finished runs
+TEMPLATE_MAX_AGE = 24 * 3600
+
+# Launch flags skipping first-run and background work on Chrome and Edge
+CHROMIUM_ARGS = (
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--metrics-recording-only",
+    "--password-store=basic",
+    "--use-mock-keychain",
+)
+
+# Written into the template's Preferences file when it is built
+CHROMIUM_PREFS = {
+    "credentials_enable_service": False,
+    "profile.password_manager_enabled": False,
+    "translate.enabled": False,
+    "download.prompt_for_download": False,
+    "browser.has_seen_welcome_page": True,
+}
+
+# Written into the template's user.js when it is built
+FIREFOX_PREFS = {
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.startup.homepage_override.mstone": "ignore",
+    "browser.aboutwelcome.enabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "toolkit.telemetry.enabled": False,
+    "app.update.auto": False,
+    "app.update.enabled": False,
+    "extensions.update.enabled": False,
+    "browser.safebrowsing.update.enabled": False,
+    "browser.search.update": False,
+    "network.captive-portal-service.enabled": False,
+}
+
+# Profile lock files that must not be carried into copies
+LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie", "lock", ".parentlock", "parent.lock")
+
+_copy_ids = itertools.count(1)
+
+
+def template_dir(browser):
+    """Return where this run's template for a browser lives."""
+    return TEMPLATES_DIR / f"{browser}_{RUN_ID}"
+
+
+def ensure_template(browser, launch):
+    """
+    Build the run's profile template for a browser unless it exists.
+
+    Concurrent workers may build at the same time; each builds into its own
+    directory and the first to rename it into place wins.
+
+    Args:
+        browser: Browser name
+        launch: Callable(profile_dir) starting a WebDriver session on profile_dir
+
+    Returns:
+        Path: The template directory
+    """
+    path = template_dir(browser)
+    if path.exists():
+        return path
+    build_dir = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(build_dir, ignore_errors=True)
+    build_dir.mkdir(parents=True)
+    started = time.perf_counter()
+    driver = launch(build_dir)
+    try:
+        for url in PROFILE_WARM_URLS:
+            try:
+                driver.get(url)
+            except Exception as e:
+                logger.warning(f"Could not warm profile with {url}: {e}")
+        # Cache only; no session state may leak into the sessions cloned from it
+        driver.delete_all_cookies()
+    finally:
+        driver.quit()
+    for name in LOCK_FILES:
+        lock = build_dir / name
+        if lock.is_symlink() or lock.exists():
+            lock.unlink()
+    try:
+        os.rename(build_dir, path)
+        logger.info(f"Built {browser} profile template in {time.perf_counter() - started:.1f}s: {path}")
+    except OSError:
+        # Another worker finished first
+        shutil.rmtree(build_dir, ignore_errors=True)
+    return path
+
+
+def session_copy(browser, launch):
+    """
+    Create a private copy of the browser's profile template.
+
+    Args:
+        browser: Browser name
+        launch: Callable(profile_dir) used to build the template if needed
+
+    Returns:
+        Path: The copy, to be removed with remove_copy() when the session ends
+    """
+    template = ensure_template(browser, launch)
+    target = COPIES_DIR / f"{browser}_{os.getpid()}_{next(_copy_ids)}"
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(template, target, symlinks=True)
+    return target
+
+
+def remove_copy(path):
+    """Delete a session's profile copy."""
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def remove_stale():
+    """
+    Remove profile copies of processes that are gone and templates of old runs.
+
+    Returns:
+        int: Number of directories removed
+    """
+    removed = 0
+    for path in COPIES_DIR.glob("*_*_*") if COPIES_DIR.exists() else ():
+        try:
+            owner = int(path.name.split("_")[-2])
+        except ValueError:
+            continue
+        if owner != os.getpid() and not psutil.pid_exists(owner):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    cutoff = time.time() - TEMPLATE_MAX_AGE
+    for path in TEMPLATES_DIR.iterdir() if TEMPLATES_DIR.exists() else ():
+        try:
+            if path.stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def chromium_profile(browser, options, start):
+    """
+    Point Chrome or Edge options at a fresh copy of the profile template.
+
+    Args:
+        browser: "chrome" or "edge"
+        options: Session options; the tuned flags and profile directory are added
+        start: Callable(options) starting a WebDriver session, used to build the template
+
+    Returns:
+        Path: The session's profile copy
+    """
+    for argument in CHROMIUM_ARGS:
+        options.add_argument(argument)
+
+    def launch(profile_dir):
+        template_options = copy.deepcopy(options)
+        template_options.add_argument(f"--user-data-dir={profile_dir}")
+        template_options.add_experimental_option("prefs", CHROMIUM_PREFS)
+        return start(template_options)
+
+    profile_dir = session_copy(browser, launch)
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    return profile_dir
+
+
+def firefox_profile(options, start):
+    """
+    Point Firefox options at a fresh copy of the profile template.
+
+    geckodriver uses a profile passed with -profile in place instead of
+    zipping and copying it, so the copy is the only copy made.
+
+    Args:
+        options: Session options; the profile directory is added
+        start: Callable(options) starting a WebDriver session, used to build the template
+
+    Returns:
+        Path: The session's profile copy
+    """
+    def launch(profile_dir):
+        template_options = copy.deepcopy(options)
+        for name, value in FIREFOX_PREFS.items():
+            template_options.set_preference(name, value)
+        template_options.add_argument("-profile")
+        template_options.add_argument(str(profile_dir))
+        return start(template_options)
+
+    profile_dir = session_copy("firefox", launch)
+    options.add_argument("-profile")
+    options.add_argument(str(profile_dir))
+    return profile_dir
+
+
+def benchmark(launches=5):
+    """
+    Time browser launches with fresh profiles and with template copies.
+
+    Args:
+        launches: Launches per mode
+
+    Returns:
+        dict: {"fresh": [seconds...], "template": [seconds...]}
+    """
+    from utils import driver_factory
+
+    def timed_launch():
+        started = time.perf_counter()
+        driver = driver_factory.DriverFactory.get_driver()
+        elapsed = time.perf_counter() - started
+        driver.quit()
+        if getattr(driver, "profile_dir", None):
+            remove_copy(driver.profile_dir)
+        return elapsed
+
+    results = {}
+    for mode, enabled in (("fresh", False), ("template", True)):
+        driver_factory.PROFILE_TEMPLATE = enabled
+        if enabled:
+            # Build the template outside the measurements, as the first session of a run would
+            timed_launch()
+        results[mode] = [timed_launch() for _ in range(launches)]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare browser launch times with and without profile templates")
+    parser.add_argument("--launches", type=int, default=5, help="Launches per mode")
+    args = parser.parse_args()
+
+    results = benchmark(args.launches)
+    for mode in ("fresh", "template"):
+        values = results[mode]
+        print(f"{mode:<10} median {statistics.median(values):6.2f}s  min {min(values):6.2f}s  "
+              f"max {max(values):6.2f}s")
+    print(f"speedup    {statistics.median(results['fresh']) / statistics.median(results['template']):.2f}x")
@@ -0,0 +1,205 @@
+"""
+DevTools fast path for typing and clicking in Chrome sessions.
+
+WebDriver's element commands type one key event per character and run
+their own visibility and interactability checks on every call. With
+INPUT_MODE=cdp, BasePage.send_keys and click instead resolve and prepare
+the element in one Runtime.evaluate call, then use Input.insertText (one
+input event for the whole string) or Input.dispatchMouseEvent at the
+element's centre. Firefox, Edge, iframes, special keys and callers asking
+for fidelity keep using WebDriver.
+
+Compare both paths on the login form:
+
+    python -m utils.cdp_input [--iterations N] [--standin]
+"""
+
+import json
+import time
+import argparse
+import statistics
+from pages import scripts
+
+# Selenium's Keys constants live in the Unicode private use area
+SPECIAL_KEYS = range(0xE000, 0xF900)
+
+
+def cdp_expression(script, *args):
+    """
+    Wrap an execute_script-style script as a DevTools expression.
+
+    Args:
+        script: Script body reading its parameters from arguments[...]
+        *args: JSON-serializable arguments
+
+    Returns:
+        str: Expression calling the script with the arguments
+    """
+    return f"(function() {{{script}}}).apply(null, {json.dumps(args)})"
+
+
+class CdpInput:
+    """Dispatches text entry and clicks through DevTools Input commands."""
+
+    def __init__(self, driver):
+        """
+        Initialize the fast path.
+
+        Args:
+            driver: Chrome WebDriver instance
+        """
+        self.driver = driver
+        # Runtime.evaluate runs in the top-level document; set while a page object is inside a frame
+        self.in_frame = False
+
+    def _evaluate(self, script, *args):
+        """
+        Run an execute_script-style script through Runtime.evaluate.
+
+        Args:
+            script: Script body reading its parameters from arguments[...]
+            *args: JSON-serializable arguments
+
+        Returns:
+            The script's return value
+        """
+        response = self.driver.execute_cdp_cmd("Runtime.evaluate", {
+            "expression": cdp_expression(script, *args), "returnByValue": True})
+        if "exceptionDetails" in response:
+            raise RuntimeError(f"CDP input script failed: {response['exceptionDetails'].get('text')}")
+        return response["result"].get("value")
+
+    def can_type(self, text):
+        """Return whether text can be inserted as-is (no special keys such as Keys.ENTER)."""
+        return not self.in_frame and not any(ord(char) in SPECIAL_KEYS for char in text)
+
+    def type_text(self, locator, text, clear_first=True):
+        """
+        Focus a field and insert text with a single input event.
+
+        Args:
+            locator: Tuple containing (By, value)
+            text: Text to enter
+            clear_first: Replace the field's current value instead of appending
+
+        Returns:
+            bool: False if the field was not found or not visible (nothing was typed)
+        """
+        if not self._evaluate(scripts.CDP_FOCUS_FIELD, locator[0], locator[1], clear_first):
+            return False
+        if text:
+            self.driver.execute_cdp_cmd("Input.insertText", {"text": text})
+        elif clear_first:
+            # insertText("") leaves the selection in place; delete it like a user would
+            for event in ("rawKeyDown", "keyUp"):
+                self.driver.execute_cdp_cmd("Input.dispatchKeyEvent", {
+                    "type": event, "key": "Backspace", "code": "Backspace", "windowsVirtualKeyCode": 8})
+        return True
+
+    def click(self, locator):
+        """
+        Scroll an element into view and click its centre with trusted mouse events.
+
+        Args:
+            locator: Tuple containing (By, value)
+
+        Returns:
+            bool: False if the element was not found or not clickable (nothing was clicked)
+        """
+        point = self._evaluate(scripts.CDP_CLICK_POINT, locator[0], locator[1])
+        if not point:
+            return False
+        for event in ("mousePressed", "mouseReleased"):
+            self.driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+                "type": event, "x": point["x"], "y": point["y"], "button": "left", "clickCount": 1})
+        return True
+
+
+def _time_login(page, base_url, username, password):
+    """Time one login on the page's current input path, in milliseconds."""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    page.navigate_to(f"{base_url}/login")
+    page.wait_for_page_load()
+    start = time.perf_counter()
+    page.enter_username(username)
+    page.enter_password(password)
+    page.click_login_button()
+    WebDriverWait(page.driver, 10).until(lambda driver: "/secure" in driver.current_url)
+    return (time.perf_counter() - start) * 1000
+
+
+def _time_typing(page, base_url, text):
+    """Time entering a long string into the username field, in milliseconds."""
+    page.navigate_to(f"{base_url}/login")
+    start = time.perf_counter()
+    page.enter_username(text)
+    elapsed = (time.perf_counter() - start) * 1000
+    value = page.get_attribute(page.USERNAME_INPUT, "value")
+    assert value == text, f"Typed {len(value)} of {len(text)} characters"
+    return elapsed
+
+
+def benchmark(iterations=10, standin=False, text_length=500):
+    """
+    Time the login form on the WebDriver and CDP input paths.
+
+    Args:
+        iterations: Measurements per path and operation
+        standin: Use the local stand-in server instead of BASE_URL
+        text_length: Length of the string typed in the long-text measurement
+
+    Returns:
+        dict: {path: {"login": [ms...], "long_text": [ms...]}}
+    """
+    from config.config import BASE_URL, TEST_DATA
+    from utils.driver_factory import DriverFactory
+    from pages.login_page import LoginPage
+
+    server = None
+    base_url = BASE_URL
+    if standin:
+        from utils.standin_server import start_server
+        server, base_url = start_server()
+    user = TEST_DATA["valid_user"]
+    text = ("lorem ipsum " * (text_length // 12 + 1))[:text_length]
+
+    driver = DriverFactory.get_driver()
+    try:
+        if driver.capabilities.get("browserName") != "chrome":
+            raise SystemExit("The CDP input benchmark needs BROWSER=chrome")
+        page = LoginPage(driver)
+        fast_path = getattr(driver, "cdp_input", None) or CdpInput(driver)
+        results = {}
+        for path in ("webdriver", "cdp"):
+            driver.cdp_input = fast_path if path == "cdp" else None
+            results[path] = {
+                "login": [_time_login(page, base_url, user["username"], user["password"])
+                          for _ in range(iterations)],
+                "long_text": [_time_typing(page, base_url, text) for _ in range(iterations)],
+            }
+        return results
+    finally:
+        driver.quit()
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare WebDriver and CDP input on the login form")
+    parser.add_argument("--iterations", type=int, default=10, help="Measurements per path and operation")
+    parser.add_argument("--standin", action="store_true", help="Run against the local stand-in server")
+    parser.add_argument("--text-length", type=int, default=500, help="Length of the long-text string")
+    args = parser.parse_args()
+
+    from utils.load_runner import percentile
+
+    results = benchmark(args.iterations, args.standin, args.text_length)
+    print(f"{'operation':<12} {'webdriver':>16} {'cdp':>16} {'speedup':>8}  (median / p90 ms)")
+    for operation, label in (("login", "login"), ("long_text", f"type {args.text_length}")):
+        cells = []
+        for path in ("webdriver", "cdp"):
+            values = sorted(results[path][operation])
+            cells.append(f"{statistics.median(values):7.1f} / {percentile(values, 90):6.1f}")
+        speedup = statistics.median(results["webdriver"][operation]) / statistics.median(results["cdp"][operation])
+        print(f"{label:<12} {cells[0]:>16} {cells[1]:>16} {speedup:7.1f}x")
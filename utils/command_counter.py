@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from collections import Counter
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Commands whose repetition with identical arguments indicates a redundant lookup.
+# Same values as selenium's Command.FIND_* constants, spelled out so that step
+# modules importing command_budget do not pull in Selenium at collection time.
+LOOKUP_COMMANDS = {
+    "findElement",
+    "findElements",
+    "findChildElement",
+    "findChildElements",
+}
+
+
+def command_budget(max_commands):
+    """
+    Declare the maximum number of WebDriver commands a step may issue.
+
+    Usage:
+        @then("I should be logged in successfully")
+        @command_budget(6)
+        def verify_successful_login(driver):
+            ...
+
+    Args:
+        max_commands: Maximum number of commands for the step
+
+    Returns:
+        function: Decorator that records the budget on the step function
+    """
+    def decorator(func):
+        func._command_budget = max_commands
+        return func
+    return decorator
+
+
+class StepCommands:
+    """Commands recorded for a single step."""
+
+    def __init__(self, name, budget=None):
+        """
+        Initialize the step record.
+
+        Args:
+            name: Step name
+            budget: Maximum allowed commands, or None for no limit
+        """
+        self.name = name
+        self.budget = budget
+        self.commands = Counter()
+        self.lookups = Counter()
+
+    @property
+    def total(self):
+        """int: Total number of commands issued in the step."""
+        return sum(self.commands.values())
+
+    @property
+    def over_budget(self):
+        """bool: True if the step issued more commands than its budget."""
+        return self.budget is not None and self.total > self.budget
+
+    def redundant_lookups(self):
+        """
+        Get lookups that resolved the same locator to the same element more than once.
+
+        Returns:
+            dict: {(using, value): count} for every repeated lookup
+        """
+        return {key[1:3]: count for key, count in self.lookups.items() if count > 1}
+
+
+class CommandCounter:
+    """Counts every WebDriver command issued per step by wrapping driver.execute."""
+
+    def __init__(self, driver):
+        """
+        Install the counting wrapper on a driver instance.
+
+        Args:
+            driver: WebDriver instance
+        """
+        self.driver = driver
+        self.current = None
+        self.steps = []
+        # Commands and lookups already counted in the current wait, None outside waits
+        self._polled = None
+        original_execute = driver.execute
+
+        def execute(driver_command, params=None):
+            step = self.current
+            if step is not None and self._first_in_wait(("command", driver_command, repr(params))):
+                step.commands[driver_command] += 1
+            response = original_execute(driver_command, params)
+            if step is not None and driver_command in LOOKUP_COMMANDS and params:
+                self._record_lookup(step, params, response)
+            return response
+
+        driver.execute = execute
+
+    @contextmanager
+    def polling(self):
+        """
+        Count each distinct command and lookup once while a wait polls a condition.
+
+        A WebDriverWait repeats the same commands until its condition holds; how
+        often depends on page timing, not on the step, so the repetitions count
+        neither against the budget nor as redundant lookups. Nested waits share
+        the outer wait's scope.
+        """
+        outer = self._polled
+        if outer is None:
+            self._polled = set()
+        try:
+            yield
+        finally:
+            self._polled = outer
+
+    def _first_in_wait(self, key):
+        """Return False if key was already counted in the current wait."""
+        if self._polled is None:
+            return True
+        if key in self._polled:
+            return False
+        self._polled.add(key)
+        return True
+
+    def _record_lookup(self, step, params, response):
+        """Record the element(s) a successful lookup resolved to."""
+        value = response.get("value") if response else None
+        elements = value if isinstance(value, list) else [value]
+        element_ids = tuple(getattr(element, "id", None) for element in elements)
+        key = (params.get("id"), params.get("using"), params.get("value"), element_ids)
+        if self._first_in_wait(("lookup",) + key):
+            step.lookups[key] += 1
+
+    def begin_step(self, name, budget=None):
+        """
+        Start recording commands for a step.
+
+        Args:
+            name: Step name
+            budget: Maximum allowed commands, or None for no limit
+        """
+        self.current = StepCommands(name, budget)
+
+    def end_step(self):
+        """
+        Stop recording and log the step's command usage.
+
+        Returns:
+            StepCommands: The finished step record, or None if no step was active
+        """
+        step, self.current = self.current, None
+        if step is None:
+            return None
+        self.steps.append(step)
+
+        logger.debug(f"Step '{step.name}' issued {step.total} WebDriver commands: {dict(step.commands)}")
+        for (using, value), count in step.redundant_lookups().items():
+            logger.warning(f"Step '{step.name}' looked up ({using}, {value}) {count} times "
+                           f"and got the same element each time")
+        return step
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import hashlib
+import webbrowser
+from html import escape
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import get_logger
+from utils.cdp_input import cdp_expression
+from utils.artefact_store import store as default_store, Artefact, decompress
+from config.config import SNAPSHOT_COOKIE_VALUES
+
+logger = get_logger()
+
+# Collects the page state for post-mortem debugging in a single round trip. Cookies are
+# read through WebDriver instead: document.cookie hides HttpOnly ones such as the session cookie.
+SNAPSHOT_SCRIPT = """
+return {
+    url: window.location.href,
+    title: document.title,
+    dom: document.documentElement ? document.documentElement.outerHTML : '',
+    console: window.__testConsole || []
+};
+"""
+
+# Cookie attributes kept in snapshots; the value is only kept with SNAPSHOT_COOKIE_VALUES
+COOKIE_FIELDS = ("name", "domain", "path", "httpOnly", "secure", "expiry")
+REDACTED = "<redacted>"
+
+# Records console output into window.__testConsole so SNAPSHOT_SCRIPT can read it.
+# Safe to run before the document exists and more than once.
+CONSOLE_HOOK_SCRIPT = """
+if (!window.__testConsole) {
+    window.__testConsole = [];
+    ['log', 'info', 'warn', 'error'].forEach(function(level) {
+        var original = console[level];
+        console[level] = function() {
+            var message = Array.prototype.map.call(arguments, String).join(' ');
+            window.__testConsole.push({level: level, message: message, timestamp: Date.now()});
+            if (window.__testConsole.length > 200) { window.__testConsole.shift(); }
+            return original.apply(console, arguments);
+        };
+    });
+}
+"""
+
+
+class ConsoleHook:
+    """Installs the console recorder read by failure snapshots in the documents of one session."""
+
+    def __init__(self, driver):
+        """
+        Initialize the hook.
+
+        Args:
+            driver: WebDriver instance
+        """
+        self.driver = driver
+        # True once the script is registered for every new document (Chromium only)
+        self.persistent = False
+
+    def start(self):
+        """
+        Register the recorder for all future documents where the browser supports it.
+
+        Chromium browsers run it through Page.addScriptToEvaluateOnNewDocument
+        before any page script, so output during page load and after navigations
+        triggered by clicks and redirects is recorded too. Other browsers rely on
+        apply() after each page object navigation.
+
+        Returns:
+            ConsoleHook: self
+        """
+        if hasattr(self.driver, "execute_cdp_cmd"):
+            try:
+                self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                    "source": cdp_expression(CONSOLE_HOOK_SCRIPT)})
+                self.persistent = True
+            except Exception as e:
+                logger.warning(f"Could not register the console recorder for new documents: {e}")
+        return self
+
+    def apply(self):
+        """Install the recorder in the current document (no-op if already installed)."""
+        self.driver.execute_script(CONSOLE_HOOK_SCRIPT)
+
+
+def _snapshot_cookie(cookie, values=SNAPSHOT_COOKIE_VALUES):
+    """Keep a cookie's attributes for the snapshot, redacting its value unless values is set."""
+    # Snapshots end up in CI artefacts, where session cookie values would be usable credentials
+    kept = {field: cookie[field] for field in COOKIE_FIELDS if field in cookie}
+    kept["value"] = cookie.get("value", "") if values else REDACTED
+    return kept
+
+
+class DomSnapshotWriter:
+    """Captures DOM snapshots and writes them compressed to the artefact store in the background."""
+
+    def __init__(self, store=None):
+        """
+        Initialize the writer.
+
+        Args:
+            store: ArtefactStore receiving the snapshots (default: the shared store)
+        """
+        self.store = store or default_store
+        self._seen = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dom-snapshot")
+
+    def capture(self, driver, name, extra=None):
+        """
+        Capture the current page state and schedule it to be written.
+
+        Identical snapshots (same URL and DOM) are only written once per
+        process; later captures return the first one. Across processes the
+        store deduplicates snapshots with identical content.
+
+        Args:
+            driver: WebDriver instance
+            name: Name recorded with the snapshot in the store's reference index
+            extra: Optional dict of additional data to store with the snapshot
+
+        Returns:
+            Artefact: (hash, path) the snapshot is (or will be) stored under, or None on failure
+        """
+        try:
+            snapshot = driver.execute_script(SNAPSHOT_SCRIPT)
+        except Exception as e:
+            logger.error(f"Failed to capture DOM snapshot: {e}")
+            return None
+        try:
+            snapshot["cookies"] = [_snapshot_cookie(cookie) for cookie in driver.get_cookies()]
+        except Exception as e:
+            logger.warning(f"Failed to read cookies for DOM snapshot: {e}")
+            snapshot["cookies"] = []
+
+        digest = hashlib.sha256(
+            f"{snapshot['url']}\n{snapshot['dom']}".encode("utf-8")
+        ).hexdigest()
+        if digest in self._seen:
+            logger.info(f"DOM unchanged, reusing snapshot: {self._seen[digest].path}")
+            return self._seen[digest]
+
+        snapshot.update(extra or {})
+        # Name and capture time live in the reference index so equal content hashes equally
+        data = json.dumps(snapshot, sort_keys=True).encode("utf-8")
+        content_digest = self.store.digest(data)
+        artefact = Artefact(content_digest, str(self.store.object_path(
+            content_digest, ".json" + self.store.compressed_extension)))
+        self._seen[digest] = artefact
+
+        self._executor.submit(self._write, data, content_digest, name)
+        logger.info(f"DOM snapshot scheduled: sha256:{content_digest[:12]} ({artefact.path})")
+        return artefact
+
+    def _write(self, data, digest, name):
+        """Compress and store a snapshot."""
+        try:
+            self.store.put(data, ".json", name=name, compressed=True, digest=digest)
+        except Exception as e:
+            logger.error(f"Failed to store DOM snapshot {name}: {e}")
+
+    def flush(self):
+        """Wait for all pending snapshot writes to finish."""
+        self._executor.shutdown(wait=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dom-snapshot")
+
+
+def load_snapshot(filepath):
+    """
+    Load a snapshot file written by DomSnapshotWriter.
+
+    Args:
+        filepath: Path to a .json.zst or .json.gz snapshot
+
+    Returns:
+        dict: The snapshot data
+    """
+    with open(filepath, "rb") as f:
+        return json.loads(decompress(f.read(), filepath))
+
+
+def render_viewer(snapshot):
+    """
+    Render a snapshot as a standalone HTML page.
+
+    The captured DOM is shown in a sandboxed iframe so its scripts do not run.
+
+    Args:
+        snapshot: Snapshot data as returned by load_snapshot
+
+    Returns:
+        str: HTML document
+    """
+    console_rows = "".join(
+        f"<li>{escape(json.dumps(entry))}</li>" for entry in snapshot.get("console", [])
+    ) or "<li>(none)</li>"
+    cookies = snapshot.get("cookies", [])
+    # Snapshots written before cookies came from WebDriver hold the document.cookie string
+    if not isinstance(cookies, str):
+        cookies = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+    browser_rows = "".join(
+        f"<li>{escape(json.dumps(entry))}</li>"
+        for entry in snapshot.get("browser_console", []) + snapshot.get("network", [])
+    ) or "<li>(none)</li>"
+    return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>DOM snapshot: {escape(snapshot.get('title') or snapshot.get('url', ''))}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; display: flex; flex-direction: column; height: 100vh; }}
+header {{ padding: 8px 12px; background: #eee; font-size: 13px; }}
+iframe {{ flex: 1; border: 0; border-top: 1px solid #ccc; }}
+</style></head>
+<body>
+<header>
+<div><b>URL:</b> {escape(snapshot.get('url', ''))}</div>
+<div><b>Title:</b> {escape(snapshot.get('title', ''))}</div>
+<div><b>Cookies:</b> {escape(cookies)}</div>
+<details><summary>Console</summary><ul>{console_rows}</ul></details>
+<details><summary>Browser logs</summary><ul>{browser_rows}</ul></details>
+</header>
+<iframe sandbox srcdoc="{escape(snapshot.get('dom', ''), quote=True)}"></iframe>
+</body>
+</html>"""
+
+
+def view_snapshot(filepath, open_browser=True):
+    """
+    Write an HTML viewer next to a snapshot file and optionally open it.
+
+    Args:
+        filepath: Path to the snapshot file
+        open_browser: Whether to open the viewer in the default browser
+
+    Returns:
+        str: Path to the generated viewer HTML file
+    """
+    snapshot = load_snapshot(filepath)
+    viewer_path = filepath.rsplit(".json", 1)[0] + ".html"
+    with open(viewer_path, "w", encoding="utf-8") as f:
+        f.write(render_viewer(snapshot))
+    if open_browser:
+        webbrowser.open(f"file://{os.path.abspath(viewer_path)}")
+    return viewer_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m utils.dom_snapshot <snapshot file>")
+        sys.exit(1)
+    print(view_snapshot(sys.argv[1]))
@@ -1,11 +1,7 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.edge.service import Service as EdgeService
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from config.config import BROWSER, HEADLESS, IMPLICIT_WAIT
+from config.config import (
+    BROWSER, HEADLESS, IMPLICIT_WAIT, BROWSER_LOGS, COMMAND_TRACKING, SCREENCAST, INPUT_MODE,
+    FREEZE_ANIMATIONS, BROWSER_CONTEXTS, SHARED_BROWSER, PROFILE_TEMPLATE, DOM_SNAPSHOTS
+)
 import logging
 
 
@@ -20,39 +16,130 @@ class DriverFactory:
         Returns:
             WebDriver: A configured Selenium WebDriver instance.
         """
+        # Selenium, webdriver_manager and the page layer are imported here rather
+        # than at module level so that collection and non-browser runs never pay
+        # for them, and only the selected browser's driver manager is loaded.
+        from selenium import webdriver
+        from utils.browser_logs import BrowserLogCollector
+        from utils.command_counter import CommandCounter
+        from pages.registry import PageRegistry
+        from utils.tracing import tracer
+        
         logging.info(f"Initializing {BROWSER} browser (headless: {HEADLESS})")
+        # Private copy of the run's profile template, removed when the session quits
+        profile_dir = None
+        use_template = PROFILE_TEMPLATE and not SHARED_BROWSER
         
         if BROWSER.lower() == "chrome":
+            from selenium.webdriver.chrome.service import Service as ChromeService
+            from webdriver_manager.chrome import ChromeDriverManager
             options = webdriver.ChromeOptions()
-            if HEADLESS:
-                options.add_argument("--headless=new")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-extensions")
-            options.add_argument("--start-maximized")
-            options.add_argument("--disable-gpu")
-            options.add_experimental_option("excludeSwitches", ["enable-logging"])
-            driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
+            if SHARED_BROWSER:
+                # Attach to the run's shared browser; launch flags do not apply
+                options.debugger_address = SHARED_BROWSER
+            else:
+                if HEADLESS:
+                    options.add_argument("--headless=new")
+                options.add_argument("--no-sandbox")
+                options.add_argument("--disable-dev-shm-usage")
+                options.add_argument("--disable-extensions")
+                options.add_argument("--start-maximized")
+                options.add_argument("--disable-gpu")
+                options.add_experimental_option("excludeSwitches", ["enable-logging"])
+            if BROWSER_LOGS:
+                options.set_capability("goog:loggingPrefs", {"browser": "ALL", "performance": "ALL"})
+            service_path = ChromeDriverManager().install()
+            
+            def start(session_options):
+                return webdriver.Chrome(service=ChromeService(service_path), options=session_options)
+            
+            if use_template:
+                from utils.browser_profiles import chromium_profile
+                profile_dir = chromium_profile("chrome", options, start)
+            driver = start(options)
         elif BROWSER.lower() == "firefox":
+            from selenium.webdriver.firefox.service import Service as FirefoxService
+            from webdriver_manager.firefox import GeckoDriverManager
             options = webdriver.FirefoxOptions()
             if HEADLESS:
                 options.add_argument("--headless")
             options.add_argument("--width=1920")
             options.add_argument("--height=1080")
-            driver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()), options=options)
+            if BROWSER_LOGS:
+                # Firefox has no log endpoint; console entries arrive over BiDi instead
+                options.enable_bidi = True
+            service_path = GeckoDriverManager().install()
+            
+            def start(session_options):
+                return webdriver.Firefox(service=FirefoxService(service_path), options=session_options)
+            
+            if use_template:
+                from utils.browser_profiles import firefox_profile
+                profile_dir = firefox_profile(options, start)
+            driver = start(options)
         elif BROWSER.lower() == "edge":
+            from selenium.webdriver.edge.service import Service as EdgeService
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
             options = webdriver.EdgeOptions()
-            if HEADLESS:
-                options.add_argument("--headless")
-            options.add_argument("--start-maximized")
-            driver = webdriver.Edge(service=EdgeService(EdgeChromiumDriverManager().install()), options=options)
+            if SHARED_BROWSER:
+                options.debugger_address = SHARED_BROWSER
+            else:
+                if HEADLESS:
+                    options.add_argument("--headless")
+                options.add_argument("--start-maximized")
+            if BROWSER_LOGS:
+                options.set_capability("ms:loggingPrefs", {"browser": "ALL", "performance": "ALL"})
+            service_path = EdgeChromiumDriverManager().install()
+            
+            def start(session_options):
+                return webdriver.Edge(service=EdgeService(service_path), options=session_options)
+            
+            if use_template:
+                from utils.browser_profiles import chromium_profile
+                profile_dir = chromium_profile("edge", options, start)
+            driver = start(options)
+        elif BROWSER.lower() == "fake":
+            # In-process WebDriver over HTML fixtures: no browser, no network
+            from utils.fake_driver import fake_driver
+            driver = fake_driver()
         else:
             raise ValueError(f"Unsupported browser: {BROWSER}")
         
+        driver.profile_dir = profile_dir
+        
         # Set implicit wait
         driver.implicitly_wait(IMPLICIT_WAIT)
         # Set window size if not already maximized in options
-        if BROWSER.lower() != "firefox":
+        # (a shared browser's windows belong to every worker and are left alone)
+        if BROWSER.lower() != "firefox" and not SHARED_BROWSER:
             driver.maximize_window()
         
+        # Page objects are created once per session and shared between steps
+        driver.pages = PageRegistry(driver)
+        
+        if BROWSER_LOGS:
+            driver.log_collector = BrowserLogCollector(driver).start()
+        if COMMAND_TRACKING:
+            driver.command_counter = CommandCounter(driver)
+        if BROWSER_CONTEXTS or SHARED_BROWSER:
+            from utils.browser_contexts import BrowserContexts
+            driver.browser_contexts = BrowserContexts(driver).start()
+        if SCREENCAST:
+            from utils.screencast import ScreencastRecorder
+            driver.screencast = ScreencastRecorder(driver).start()
+        if DOM_SNAPSHOTS:
+            # Console output recorded in the page is included in failure snapshots
+            from utils.dom_snapshot import ConsoleHook
+            driver.console_hook = ConsoleHook(driver).start()
+        if FREEZE_ANIMATIONS:
+            from utils.animations import AnimationFreezer
+            driver.animation_freezer = AnimationFreezer(driver).start()
+        if INPUT_MODE == "cdp":
+            if BROWSER.lower() == "chrome":
+                from utils.cdp_input import CdpInput
+                driver.cdp_input = CdpInput(driver)
+            else:
+                logging.info(f"CDP input is only used with Chrome; {BROWSER} uses WebDriver input")
+        tracer.instrument_driver(driver)
+        
         return driver 
\ No newline at end of file
@@ -0,0 +1,844 @@
+"""
+In-process fake WebDriver for browserless page-object tests.
+
+fake_driver() returns a real selenium Remote WebDriver whose command
+executor is FakeRemoteEnd: instead of talking to a browser it answers
+WebDriver commands from parsed HTML. BasePage, the page objects, explicit
+waits, ActionChains, command counting and tracing all run unchanged, with
+no browser binary and no network.
+
+Pages and navigation come from a FakeSite: a table of routes mapping paths
+to HTML (or handlers returning HTML or a Redirect). Clicking a link loads
+its href, submitting a form calls the route registered for its action, and
+the site's session dict plays the role of cookies. login_flow_site() scripts
+the login flow of the application under test, e.g.:
+
+    driver = fake_driver(login_flow_site())
+    driver.pages.login.navigate().login("tomsmith", "SuperSecretPassword!")
+    assert driver.current_url.endswith("/secure")
+
+BROWSER=fake runs the Gherkin scenarios against it.
+
+Supported locators: CSS selectors (compound selectors with tag, #id,
+.class and [attr], [attr=v], [attr^=v], [attr$=v], [attr*=v], [attr~=v],
+descendant and child combinators, selector lists), XPath location paths
+with /, //, tag or * node tests and predicates on @attr, text(), ., position
+and contains()/starts-with()/normalize-space(), tag name and link text.
+There is no layout or JavaScript: execute_script only understands the
+scripts the framework itself sends (see FakeRemoteEnd.SCRIPTS), and
+FakeRemoteEnd.scripts can be extended per test.
+"""
+
+import re
+import itertools
+from collections import namedtuple
+from urllib.parse import urljoin, urlparse, urlencode
+from selenium import webdriver
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.options import ArgOptions
+from selenium.webdriver.remote.command import Command
+from selenium.common.exceptions import (
+    NoSuchElementException, StaleElementReferenceException, JavascriptException, NoSuchFrameException,
+    UnknownMethodException, InvalidSelectorException
+)
+from pages.http_pages import HtmlDocument
+from pages import scripts
+from config.config import BASE_URL
+
+# W3C key of element references in commands and responses
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# 1x1 white PNG returned for screenshots
+BLANK_PNG = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGP4//8/AAX+Av4N70a4AAAAAElFTkSuQmCC"
+
+NOT_FOUND = "<html><head><title>Not Found</title></head><body><h1>Not Found</h1></body></html>"
+
+# Elements whose content is never rendered
+HIDDEN_TAGS = {"head", "script", "style", "title", "meta", "link", "template", "noscript"}
+
+# Selenium's Keys constants live in the Unicode private use area
+SPECIAL_KEYS = range(0xE000, 0xF900)
+
+# Modifier keys that stay pressed until released (or until the end of send_keys)
+MODIFIER_KEYS = {Keys.CONTROL, Keys.LEFT_CONTROL, Keys.SHIFT, Keys.LEFT_SHIFT, Keys.ALT, Keys.LEFT_ALT,
+                 Keys.META, Keys.COMMAND}
+
+Redirect = namedtuple("Redirect", ["path"])
+
+
+class FakeSite:
+    """Routes mapping paths to HTML fixtures and scripted navigation rules."""
+
+    def __init__(self, base_url=BASE_URL):
+        """
+        Initialize an empty site.
+
+        Args:
+            base_url: URL that relative navigations resolve against
+        """
+        self.base_url = base_url
+        self.routes = {}
+        # Per-browser state shared by handlers; delete_all_cookies() clears it
+        self.session = {}
+
+    def route(self, path, response, method="GET"):
+        """
+        Register a page or form handler.
+
+        Args:
+            path: URL path, e.g. "/login"
+            response: HTML string, or callable(site, fields) returning HTML or a Redirect;
+                      fields holds the submitted form or query parameters
+            method: "GET" for pages and links, "POST" for form submissions
+
+        Returns:
+            FakeSite: self, for chaining
+        """
+        self.routes[(method.upper(), path)] = response
+        return self
+
+    def respond(self, method, url, fields=None, max_redirects=10):
+        """
+        Resolve a request to its final URL and HTML, following redirects.
+
+        Args:
+            method: "GET" or "POST"
+            url: Absolute URL
+            fields: Submitted form or query parameters
+
+        Returns:
+            tuple: (final URL, HTML)
+        """
+        for _ in range(max_redirects):
+            path = urlparse(url).path or "/"
+            handler = self.routes.get((method.upper(), path))
+            if handler is None and method.upper() == "POST":
+                # Forms without a handler land on the action page, like a server rendering it
+                handler = self.routes.get(("GET", path))
+            if handler is None:
+                return url, NOT_FOUND
+            response = handler(self, fields or {}) if callable(handler) else handler
+            if not isinstance(response, Redirect):
+                return url, response
+            url, method, fields = urljoin(url, response.path), "GET", None
+        raise RuntimeError(f"Too many redirects from {url}")
+
+
+def login_flow_site(base_url=BASE_URL):
+    """
+    Build a site implementing the login flow (/login, /authenticate, /secure, /logout).
+
+    Markup, flash messages and redirects match the application under test and
+    utils.standin_server.
+
+    Args:
+        base_url: URL the pages are served under
+
+    Returns:
+        FakeSite: The scripted site
+    """
+    from utils.account_pool import valid_accounts
+    from utils.standin_server import PAGE_TEMPLATE, LOGIN_BODY, SECURE_BODY, FLASH_TEMPLATE
+
+    def render(site, body):
+        flash = ""
+        if site.session.get("flash"):
+            kind, message = site.session.pop("flash")
+            flash = FLASH_TEMPLATE.format(kind=kind, message=message)
+        return PAGE_TEMPLATE.format(flash=flash, body=body)
+
+    def secure(site, fields):
+        if site.session.get("user"):
+            return render(site, SECURE_BODY)
+        site.session["flash"] = ("error", "You must login to view the secure area!")
+        return Redirect("/login")
+
+    def authenticate(site, fields):
+        valid = next((account for account in valid_accounts() if account["username"] == fields.get("username")), None)
+        if valid is None:
+            site.session["flash"] = ("error", "Your username is invalid!")
+            return Redirect("/login")
+        if fields.get("password") != valid["password"]:
+            site.session["flash"] = ("error", "Your password is invalid!")
+            return Redirect("/login")
+        site.session["user"] = fields["username"]
+        site.session["flash"] = ("success", "You logged into a secure area!")
+        return Redirect("/secure")
+
+    def logout(site, fields):
+        site.session.pop("user", None)
+        site.session["flash"] = ("success", "You logged out of the secure area!")
+        return Redirect("/login")
+
+    return (FakeSite(base_url)
+            .route("/login", lambda site, fields: render(site, LOGIN_BODY))
+            .route("/secure", secure)
+            .route("/logout", logout)
+            .route("/authenticate", authenticate, method="POST"))
+
+
+class FakeDocument(HtmlDocument):
+    """Parsed page whose element text excludes script and style content."""
+
+    def __init__(self, html):
+        self.source = html
+        super().__init__(html)
+
+    def handle_data(self, data):
+        if self._open and self._open[-1].tag in ("script", "style"):
+            return
+        super().handle_data(data)
+
+    def ancestors(self, element):
+        """Yield the element's ancestors, nearest first."""
+        parent = element.parent
+        while parent is not None:
+            yield parent
+            parent = parent.parent
+
+    def descendants(self, element):
+        """Return the element's descendants in document order."""
+        return [candidate for candidate in self.elements
+                if any(ancestor is element for ancestor in self.ancestors(candidate))]
+
+    def children(self, element):
+        """Return the element's child elements in document order."""
+        return [candidate for candidate in self.elements if candidate.parent is element]
+
+
+# -- CSS selectors ------------------------------------------------------------------------
+
+CSS_TOKEN = re.compile(r"\s*(>)\s*|\s+|([^\s>]+(?:\[[^\]]*\])*[^\s>]*)")
+CSS_COMPOUND = re.compile(r"(?P<tag>^[a-zA-Z*][\w-]*)|#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)"
+                          r"|\[\s*(?P<attr>[\w-]+)\s*"
+                          r"(?:(?P<op>[~^$*]?=)\s*(?P<value>\"[^\"]*\"|'[^']*'|[^\]\s]*))?\s*\]")
+
+
+def _parse_compound(selector):
+    """Parse a compound selector into (tag, [(attr, op, value)]) conditions."""
+    tag, conditions, position = None, [], 0
+    for match in CSS_COMPOUND.finditer(selector):
+        if match.start() != position:
+            break
+        position = match.end()
+        if match["tag"]:
+            tag = None if match["tag"] == "*" else match["tag"].lower()
+        elif match["id"]:
+            conditions.append(("id", "=", match["id"]))
+        elif match["cls"]:
+            conditions.append(("class", "~=", match["cls"]))
+        else:
+            value = match["value"]
+            if value and value[0] in "\"'":
+                value = value[1:-1]
+            conditions.append((match["attr"], match["op"], value))
+    if position != len(selector):
+        raise InvalidSelectorException(f"Unsupported CSS selector for the fake driver: {selector}")
+    return tag, conditions
+
+
+def _attribute_matches(element, attr, op, value):
+    actual = element.attrs.get(attr)
+    if actual is None:
+        return False
+    if op is None:
+        return True
+    if op == "=":
+        return actual == value
+    if op == "~=":
+        return value in actual.split()
+    if op == "^=":
+        return actual.startswith(value)
+    if op == "$=":
+        return actual.endswith(value)
+    return value in actual
+
+
+def _compound_matches(element, compound):
+    tag, conditions = compound
+    return ((tag is None or element.tag == tag)
+            and all(_attribute_matches(element, *condition) for condition in conditions))
+
+
+def css_select(document, selector, scope=None):
+    """
+    Find the elements matching a CSS selector.
+
+    Args:
+        document: FakeDocument
+        selector: Selector list, e.g. "form button[type='submit'], #id > .class"
+        scope: Element whose descendants are searched (default: the whole document)
+
+    Returns:
+        list: Matching elements in document order
+    """
+    chains = []
+    for part in selector.split(","):
+        # [(combinator, compound)], rightmost last; the first combinator is unused
+        chain, combinator = [], " "
+        for match in CSS_TOKEN.finditer(part.strip()):
+            if match[1]:
+                combinator = ">"
+            elif match[2]:
+                chain.append((combinator, _parse_compound(match[2])))
+                combinator = " "
+        if not chain:
+            raise InvalidSelectorException(f"Empty CSS selector: {selector}")
+        chains.append(chain)
+
+    def matches_chain(element, chain):
+        if not _compound_matches(element, chain[-1][1]):
+            return False
+        if len(chain) == 1:
+            return True
+        combinator, rest = chain[-1][0], chain[:-1]
+        if combinator == ">":
+            return element.parent is not None and element.parent is not scope and matches_chain(element.parent, rest)
+        for ancestor in document.ancestors(element):
+            if ancestor is scope:
+                return False
+            if matches_chain(ancestor, rest):
+                return True
+        return False
+
+    candidates = document.descendants(scope) if scope is not None else document.elements
+    return [element for element in candidates if any(matches_chain(element, chain) for chain in chains)]
+
+
+# -- XPath --------------------------------------------------------------------------------
+
+XPATH_STEP = re.compile(r"(//|/)(\*|[a-zA-Z][\w-]*|\.)((?:\[(?:[^\[\]]|\[[^\]]*\])*\])*)")
+XPATH_PREDICATE = re.compile(r"\[((?:[^\[\]]|\[[^\]]*\])*)\]")
+XPATH_STRING = r"(?:\"([^\"]*)\"|'([^']*)')"
+XPATH_OPERAND = r"(@[\w-]+|text\(\)|\.|normalize-space\((?:text\(\)|\.)?\))"
+XPATH_CONDITIONS = [
+    (re.compile(rf"^{XPATH_OPERAND}\s*=\s*{XPATH_STRING}$"), lambda actual, value: actual == value),
+    (re.compile(rf"^contains\(\s*{XPATH_OPERAND}\s*,\s*{XPATH_STRING}\s*\)$"),
+     lambda actual, value: value in actual),
+    (re.compile(rf"^starts-with\(\s*{XPATH_OPERAND}\s*,\s*{XPATH_STRING}\s*\)$"),
+     lambda actual, value: actual.startswith(value)),
+]
+
+
+def _xpath_operand(element, operand):
+    """Evaluate @attr, text(), . or normalize-space(...) for an element (None if the attribute is absent)."""
+    if operand.startswith("@"):
+        return element.attrs.get(operand[1:])
+    raw = "".join(element.text_parts)
+    if operand.startswith("normalize-space"):
+        return " ".join(raw.split())
+    return raw
+
+
+def _xpath_predicate(element, predicate, position):
+    predicate = predicate.strip()
+    if predicate.isdigit():
+        return position == int(predicate)
+    if predicate == "last()":
+        raise InvalidSelectorException("last() is not supported by the fake driver")
+    if re.fullmatch(r"@[\w-]+", predicate):
+        return predicate[1:] in element.attrs
+    for clause in re.split(r"\s+and\s+", predicate):
+        for pattern, compare in XPATH_CONDITIONS:
+            match = pattern.match(clause.strip())
+            if match:
+                actual = _xpath_operand(element, match[1])
+                value = match[2] if match[2] is not None else match[3]
+                if actual is None or not compare(actual, value):
+                    return False
+                break
+        else:
+            if re.fullmatch(r"@[\w-]+", clause.strip()):
+                if clause.strip()[1:] not in element.attrs:
+                    return False
+                continue
+            raise InvalidSelectorException(f"Unsupported XPath predicate for the fake driver: [{predicate}]")
+    return True
+
+
+def xpath_select(document, xpath, scope=None):
+    """
+    Find the elements matching an XPath location path.
+
+    Args:
+        document: FakeDocument
+        xpath: Absolute (/ or //) or relative (./ or .//) location path
+        scope: Context element for relative paths (default: the document)
+
+    Returns:
+        list: Matching elements in document order
+    """
+    path = xpath.strip()
+    if path.startswith("."):
+        path = path[1:]
+    elif scope is not None and not path.startswith("/"):
+        path = "/" + path
+    context = [scope]  # None stands for the document node
+    position = 0
+    while position < len(path):
+        match = XPATH_STEP.match(path, position)
+        if not match:
+            raise InvalidSelectorException(f"Unsupported XPath for the fake driver: {xpath}")
+        position = match.end()
+        axis, test, predicates = match[1], match[2], XPATH_PREDICATE.findall(match[3])
+        selected = []
+        for node in context:
+            if test == ".":
+                candidates = [node]
+            elif axis == "//":
+                candidates = document.elements if node is None else document.descendants(node)
+            else:
+                candidates = ([element for element in document.elements if element.parent is None]
+                              if node is None else document.children(node))
+            if test not in ("*", "."):
+                candidates = [element for element in candidates if element.tag == test.lower()]
+            for predicate in predicates:
+                candidates = [element for index, element in enumerate(candidates, 1)
+                              if _xpath_predicate(element, predicate, index)]
+            selected.extend(element for element in candidates if element is not None)
+        # Document order, each element once
+        chosen = {id(element) for element in selected}
+        context = [element for element in document.elements if id(element) in chosen]
+    return [element for element in context if element is not None]
+
+
+# -- Remote end ---------------------------------------------------------------------------
+
+def _ignore_script(remote_end, args):
+    """Script handler for scripts with no effect on a static page."""
+    return None
+
+
+class FakeRemoteEnd:
+    """Command executor answering WebDriver commands from a FakeSite."""
+
+    def __init__(self, site):
+        """
+        Initialize the remote end.
+
+        Args:
+            site: FakeSite serving the pages
+        """
+        self.site = site
+        self.url = "about:blank"
+        self.document = FakeDocument("<html><head></head><body></body></html>")
+        self.history = []
+        self.history_index = -1
+        self.focused = None
+        # Field whose whole value is selected (Ctrl+A), replaced by the next key typed
+        self.selected_all = None
+        self.values = {}
+        self.checked = {}
+        self._element_ids = {}
+        self._elements = {}
+        self._generation = itertools.count(1)
+        self._page = next(self._generation)
+        self._ids = itertools.count(1)
+        # execute_script handlers: script source -> callable(remote end, args)
+        self.scripts = dict(self.SCRIPTS)
+        self._commands = {
+            Command.NEW_SESSION: lambda params: {"sessionId": "fake-session", "capabilities": {
+                "browserName": "fake", "browserVersion": "0", "platformName": "any"}},
+            Command.QUIT: lambda params: None,
+            Command.SET_TIMEOUTS: lambda params: None,
+            Command.GET: lambda params: self.navigate("GET", params["url"]),
+            Command.GET_CURRENT_URL: lambda params: self.url,
+            Command.GET_TITLE: lambda params: self._title(),
+            Command.GET_PAGE_SOURCE: lambda params: self.document.source,
+            Command.REFRESH: lambda params: self._load(self.url, *self.site.respond("GET", self.url)[1:]),
+            Command.GO_BACK: lambda params: self._traverse(-1),
+            Command.GO_FORWARD: lambda params: self._traverse(1),
+            Command.FIND_ELEMENT: lambda params: self._find(params, single=True),
+            Command.FIND_ELEMENTS: lambda params: self._find(params, single=False),
+            Command.FIND_CHILD_ELEMENT: lambda params: self._find(params, single=True, scope=params["id"]),
+            Command.FIND_CHILD_ELEMENTS: lambda params: self._find(params, single=False, scope=params["id"]),
+            Command.GET_ELEMENT_TEXT: lambda params: self._text(self.element(params["id"])),
+            Command.GET_ELEMENT_TAG_NAME: lambda params: self.element(params["id"]).tag,
+            Command.GET_ELEMENT_ATTRIBUTE: lambda params: self.element(params["id"]).attrs.get(params["name"]),
+            Command.GET_ELEMENT_PROPERTY: lambda params: self._property(self.element(params["id"]), params["name"]),
+            Command.IS_ELEMENT_ENABLED: lambda params: "disabled" not in self.element(params["id"]).attrs,
+            Command.IS_ELEMENT_SELECTED: lambda params: self._is_checked(self.element(params["id"])),
+            Command.GET_ELEMENT_RECT: lambda params: {"x": 0, "y": 0, "width": 100, "height": 20},
+            Command.CLICK_ELEMENT: lambda params: self.click(self.element(params["id"])),
+            Command.CLEAR_ELEMENT: lambda params: self._set_value(self.element(params["id"]), ""),
+            Command.SEND_KEYS_TO_ELEMENT: lambda params: self._send_keys(self.element(params["id"]), params["text"]),
+            Command.W3C_EXECUTE_SCRIPT: lambda params: self._execute_script(params["script"], params["args"]),
+            # Scripts complete synchronously on a static page, so async scripts share the handlers
+            Command.W3C_EXECUTE_SCRIPT_ASYNC: lambda params: self._execute_script(params["script"], params["args"]),
+            Command.W3C_ACTIONS: lambda params: self._perform_actions(params["actions"]),
+            Command.W3C_CLEAR_ACTIONS: lambda params: None,
+            Command.W3C_GET_CURRENT_WINDOW_HANDLE: lambda params: "fake-window",
+            Command.W3C_GET_WINDOW_HANDLES: lambda params: ["fake-window"],
+            Command.SWITCH_TO_WINDOW: lambda params: None,
+            Command.SWITCH_TO_FRAME: lambda params: self._switch_to_frame(params.get("id")),
+            Command.SWITCH_TO_PARENT_FRAME: lambda params: None,
+            Command.W3C_MAXIMIZE_WINDOW: lambda params: {"x": 0, "y": 0, "width": 1920, "height": 1080},
+            Command.SET_WINDOW_RECT: lambda params: {"x": 0, "y": 0, "width": 1920, "height": 1080},
+            Command.GET_WINDOW_RECT: lambda params: {"x": 0, "y": 0, "width": 1920, "height": 1080},
+            Command.DELETE_ALL_COOKIES: lambda params: self.site.session.clear(),
+            Command.GET_ALL_COOKIES: lambda params: [],
+            Command.SCREENSHOT: lambda params: BLANK_PNG,
+            Command.ELEMENT_SCREENSHOT: lambda params: BLANK_PNG,
+        }
+
+    # -- Command executor interface --
+
+    def execute(self, command, params):
+        """Run a WebDriver command; errors are raised as Selenium exceptions."""
+        handler = self._commands.get(command)
+        if handler is None:
+            raise UnknownMethodException(f"Command not supported by the fake driver: {command}")
+        return {"value": handler(params or {})}
+
+    def close(self):
+        """Nothing to close; present for RemoteWebDriver.quit()."""
+
+    # -- Navigation --
+
+    def navigate(self, method, url, fields=None):
+        """Load a URL through the site and make it the current page."""
+        if url == "about:blank":
+            final_url, html = url, "<html><head></head><body></body></html>"
+        else:
+            url = urljoin(self.url if self.url != "about:blank" else self.site.base_url, url)
+            final_url, html = self.site.respond(method, url, fields)
+        del self.history[self.history_index + 1:]
+        self.history.append((final_url, html))
+        self.history_index = len(self.history) - 1
+        self._load(final_url, html)
+
+    def _load(self, url, html):
+        self.url = url
+        self.document = FakeDocument(html)
+        # References to elements of the previous page become stale
+        self._page = next(self._generation)
+        self._element_ids.clear()
+        self.values.clear()
+        self.checked.clear()
+        self.focused = None
+        self.selected_all = None
+
+    def _traverse(self, delta):
+        index = self.history_index + delta
+        if 0 <= index < len(self.history):
+            self.history_index = index
+            self._load(*self.history[index])
+
+    def _switch_to_frame(self, frame):
+        if frame is not None:
+            raise NoSuchFrameException("Frames are not supported by the fake driver")
+
+    def _title(self):
+        title = next((element for element in self.document.elements if element.tag == "title"), None)
+        return title.text if title else ""
+
+    # -- Elements --
+
+    def reference(self, element):
+        """Return the W3C reference for an element of the current page."""
+        element_id = self._element_ids.get(id(element))
+        if element_id is None:
+            element_id = f"{self._page}-{next(self._ids)}"
+            self._element_ids[id(element)] = element_id
+            self._elements[element_id] = (self._page, element)
+        return {ELEMENT_KEY: element_id}
+
+    def element(self, element_id):
+        """Resolve an element id or reference, raising if it belongs to a previous page."""
+        if isinstance(element_id, dict):
+            element_id = element_id[ELEMENT_KEY]
+        page, element = self._elements.get(element_id, (None, None))
+        if page != self._page:
+            raise StaleElementReferenceException(f"Element {element_id} is not attached to the current page")
+        return element
+
+    def select(self, using, value, scope=None):
+        """Find elements of the current page by a W3C locator strategy."""
+        document = self.document
+        if using == "css selector":
+            return css_select(document, value, scope)
+        if using == "xpath":
+            return xpath_select(document, value, scope)
+        candidates = document.descendants(scope) if scope is not None else document.elements
+        if using == "tag name":
+            return [element for element in candidates if element.tag == value.lower()]
+        if using in ("link text", "partial link text"):
+            return [element for element in candidates if element.tag == "a" and (
+                element.text == value if using == "link text" else value in element.text)]
+        raise InvalidSelectorException(f"Unsupported locator strategy for the fake driver: {using}")
+
+    def _find(self, params, single, scope=None):
+        scope = self.element(scope) if scope is not None else None
+        elements = self.select(params["using"], params["value"], scope)
+        if single:
+            if not elements:
+                raise NoSuchElementException(f"No element matches {params['using']}={params['value']!r}")
+            return self.reference(elements[0])
+        return [self.reference(element) for element in elements]
+
+    def is_displayed(self, element):
+        """Approximate visibility: hidden tags, hidden inputs, the hidden attribute and inline styles."""
+        for node in itertools.chain((element,), self.document.ancestors(element)):
+            style = node.attrs.get("style", "").replace(" ", "").lower()
+            if (node.tag in HIDDEN_TAGS or "hidden" in node.attrs or "display:none" in style
+                    or "visibility:hidden" in style):
+                return False
+        return not (element.tag == "input" and element.attrs.get("type", "").lower() == "hidden")
+
+    def _text(self, element):
+        return element.text if self.is_displayed(element) else ""
+
+    def value(self, element):
+        """Return the current value of a form control."""
+        if element in self.values:
+            return self.values[element]
+        if element.tag == "textarea":
+            return "".join(element.text_parts)
+        return element.attrs.get("value", "")
+
+    def _set_value(self, element, value):
+        self.values[element] = value
+
+    def _is_checked(self, element):
+        if element in self.checked:
+            return self.checked[element]
+        return "checked" in element.attrs or "selected" in element.attrs
+
+    def _property(self, element, name):
+        if name == "value":
+            return self.value(element)
+        if name == "checked":
+            return self._is_checked(element)
+        if name in ("textContent", "innerText"):
+            return element.text
+        if name == "tagName":
+            return element.tag.upper()
+        return element.attrs.get(name)
+
+    def attribute(self, element, name):
+        """Selenium's getAttribute semantics: live value/checked state, then the markup attribute."""
+        if name == "value":
+            return self.value(element)
+        if name in ("checked", "selected"):
+            return "true" if self._is_checked(element) else None
+        if name == "disabled":
+            return "true" if "disabled" in element.attrs else None
+        return element.attrs.get(name)
+
+    # -- Interaction --
+
+    def click(self, element):
+        """Click an element: follow links, toggle checkboxes and submit forms."""
+        if "disabled" in element.attrs:
+            return
+        self.focused = element
+        link = next((node for node in itertools.chain((element,), self.document.ancestors(element))
+                     if node.tag == "a" and node.attrs.get("href")), None)
+        if link is not None:
+            if not link.attrs["href"].startswith("#"):
+                self.navigate("GET", link.attrs["href"])
+            return
+        kind = element.attrs.get("type", "").lower()
+        if element.tag == "input" and kind in ("checkbox", "radio"):
+            self.checked[element] = not self._is_checked(element) if kind == "checkbox" else True
+            return
+        button = next((node for node in itertools.chain((element,), self.document.ancestors(element))
+                       if node.tag == "button"
+                       or (node.tag == "input" and node.attrs.get("type") in ("submit", "image"))), None)
+        if button is not None and button.attrs.get("type", "submit").lower() == "submit":
+            self.submit(button)
+
+    def submit(self, element):
+        """Submit the form containing an element, as the given submitter."""
+        form = next((node for node in itertools.chain((element,), self.document.ancestors(element))
+                     if node.tag == "form"), None)
+        if form is None:
+            return
+        fields = {}
+        for control in self.document.descendants(form):
+            name = control.attrs.get("name")
+            if not name or "disabled" in control.attrs:
+                continue
+            kind = control.attrs.get("type", "text").lower()
+            if control.tag == "input" and kind in ("checkbox", "radio"):
+                if self._is_checked(control):
+                    fields[name] = control.attrs.get("value", "on")
+            elif control.tag == "input" and kind in ("submit", "button", "image", "reset"):
+                if control is element:
+                    fields[name] = control.attrs.get("value", "")
+            elif control.tag in ("input", "textarea"):
+                fields[name] = self.value(control)
+            elif control.tag == "select":
+                options = [node for node in self.document.descendants(control) if node.tag == "option"]
+                chosen = next((option for option in options if self._is_checked(option)),
+                              options[0] if options else None)
+                if chosen is not None:
+                    fields[name] = chosen.attrs.get("value", chosen.text)
+        method = form.attrs.get("method", "get").upper()
+        action = form.attrs.get("action") or self.url
+        if method == "GET":
+            self.navigate("GET", f"{urljoin(self.url, action).split('?')[0]}?{urlencode(fields)}", fields)
+        else:
+            self.navigate("POST", action, fields)
+
+    def _send_keys(self, element, text):
+        self.focused = element
+        self._type(text)
+
+    def _type(self, text, held=None):
+        """Type characters into the focused element, handling the keys BasePage sends."""
+        held = set() if held is None else held
+        for char in text:
+            element = self.focused
+            if char == Keys.NULL:
+                held.clear()
+            elif char in MODIFIER_KEYS:
+                held.add(char)
+            elif element is None:
+                continue
+            elif held & {Keys.CONTROL, Keys.LEFT_CONTROL, Keys.COMMAND, Keys.META} and char.lower() == "a":
+                self.values.setdefault(element, self.value(element))
+                self.selected_all = element
+            elif char in (Keys.DELETE, Keys.BACKSPACE):
+                if self.selected_all is element:
+                    self._set_value(element, "")
+                elif char == Keys.BACKSPACE:
+                    self._set_value(element, self.value(element)[:-1])
+                self.selected_all = None
+            elif char in (Keys.ENTER, Keys.RETURN, "\n", "\r"):
+                if element.tag == "input":
+                    self.submit(element)
+                else:
+                    self._set_value(element, self.value(element) + "\n")
+            elif ord(char) in SPECIAL_KEYS:
+                # Other special keys (arrows, tab, function keys) do not change the value
+                continue
+            else:
+                current = "" if self.selected_all is element else self.value(element)
+                self.selected_all = None
+                self._set_value(element, current + (char.upper() if held & {Keys.SHIFT, Keys.LEFT_SHIFT} else char))
+        return held
+
+    def _perform_actions(self, devices):
+        """Replay W3C actions tick by tick: pointer clicks and key presses."""
+        held = set()
+        pointer_target = None
+        pressed_on = None
+        for tick in itertools.zip_longest(*(device["actions"] for device in devices)):
+            for device, action in zip(devices, tick):
+                if action is None:
+                    continue
+                if device["type"] == "pointer":
+                    if action["type"] == "pointerMove" and isinstance(action.get("origin"), dict):
+                        pointer_target = self.element(action["origin"])
+                    elif action["type"] == "pointerDown":
+                        pressed_on = pointer_target
+                    elif action["type"] == "pointerUp" and pressed_on is not None and pressed_on is pointer_target:
+                        self.click(pointer_target)
+                        pressed_on = None
+                elif device["type"] == "key":
+                    if action["type"] == "keyDown":
+                        held = self._type(action["value"], held)
+                    elif action["type"] == "keyUp":
+                        held.discard(action["value"])
+
+    # -- Scripts --
+
+    def _execute_script(self, script, args):
+        handler = self.scripts.get(script)
+        if handler is None:
+            handler = next((handler for prefix, handler in self.SCRIPT_PREFIXES if script.startswith(prefix)), None)
+        if handler is None:
+            raise JavascriptException(f"Script not supported by the fake driver: {script.strip()[:80]!r}")
+        return handler(self, args)
+
+    def _resolve(self, locator):
+        by, value = locator
+        if by == "id":
+            by, value = "css selector", f'[id="{value}"]'
+        elif by == "name":
+            by, value = "css selector", f'[name="{value}"]'
+        elif by == "class name":
+            by, value = "css selector", f".{value}"
+        elements = self.select(by, value)
+        return elements[0] if elements else None
+
+    def _find_all_script(self, args):
+        return [None if element is None else self.reference(element)
+                for element in (self._resolve(locator) for locator in args[0])]
+
+    def _fill_form_script(self, args):
+        fields, submit = args
+        elements = [self._resolve(field[:2]) for field in fields]
+        missing = [index for index, element in enumerate(elements) if element is None]
+        submit_element = self._resolve(submit) if submit else None
+        if missing or (submit and submit_element is None):
+            return {"missing": missing, "submitMissing": bool(submit) and submit_element is None}
+        for element, field in zip(elements, fields):
+            self._set_value(element, field[2])
+        if submit_element is not None:
+            self.click(submit_element)
+        return {"missing": [], "submitMissing": False}
+
+    def _page_timing_script(self, args):
+        # Served from memory: everything happens at time zero
+        return {"url": self.url, "navigation": {"responseStart": 0, "domContentLoadedEventEnd": 0,
+                                                "loadEventEnd": 0, "transferSize": len(self.document.source)},
+                "paint": [], "resources": []}
+
+    def _snapshot_script(self, args):
+        return {"url": self.url, "title": self._title(), "dom": self.document.source, "console": []}
+
+    SCRIPTS = {
+        "return document.readyState": lambda remote_end, args: "complete",
+        "arguments[0].click();": lambda remote_end, args: remote_end.click(remote_end.element(args[0])),
+        "arguments[0].scrollIntoView(true);": _ignore_script,
+        "return arguments[0][arguments[1]]":
+            lambda remote_end, args: remote_end._property(remote_end.element(args[0]), args[1]),
+        scripts.FIND_ALL: _find_all_script,
+        scripts.FILL_FORM: _fill_form_script,
+        scripts.PAGE_TIMING: _page_timing_script,
+        scripts.FREEZE_ANIMATIONS: _ignore_script,
+        scripts.READINESS_TRACKER: _ignore_script,
+        # Nothing loads in the background of a static page: it is idle as soon as it is parsed
+        scripts.READINESS_WAIT: lambda remote_end, args: {
+            "ready": True, "readiness": 0.0, "inflight": 0, "url": remote_end.url},
+    }
+
+    # Selenium's atoms are sent with a marker comment in front of the minified source
+    SCRIPT_PREFIXES = (
+        ("/* getAttribute */", lambda remote_end, args: remote_end.attribute(remote_end.element(args[0]), args[1])),
+        ("/* isDisplayed */", lambda remote_end, args: remote_end.is_displayed(remote_end.element(args[0]))),
+    )
+
+
+def _register_framework_scripts():
+    """Add scripts defined outside the page layer, imported lazily to avoid cycles."""
+    from utils.dom_snapshot import SNAPSHOT_SCRIPT, CONSOLE_HOOK_SCRIPT
+    FakeRemoteEnd.SCRIPTS[SNAPSHOT_SCRIPT] = FakeRemoteEnd._snapshot_script
+    FakeRemoteEnd.SCRIPTS[CONSOLE_HOOK_SCRIPT] = _ignore_script
+
+
+_register_framework_scripts()
+
+
+def fake_driver(site=None):
+    """
+    Create a WebDriver backed by a FakeRemoteEnd.
+
+    Args:
+        site: FakeSite to serve (default: login_flow_site())
+
+    Returns:
+        WebDriver: Selenium Remote WebDriver with ``pages`` attached, like DriverFactory sessions;
+        ``driver.command_executor`` is the FakeRemoteEnd
+    """
+    # Imported per call so a watch-mode reload of the page layer is picked up
+    from pages.registry import PageRegistry
+
+    remote_end = FakeRemoteEnd(site or login_flow_site())
+    driver = webdriver.Remote(command_executor=remote_end, options=ArgOptions())
+    # The DOM only changes in response to commands, so waiting for a condition cannot help
+    driver.static_dom = True
+    driver.pages = PageRegistry(driver)
+    return driver
@@ -0,0 +1,162 @@
+"""
+Persistent cache for parsed Gherkin features.
+
+pytest-bdd only memoizes parsed features within a single process, so every
+run and every xdist worker parses every feature file again. This module
+stores parsed features on disk keyed by the file's path and content hash
+(plus the pytest-bdd and Python versions, since the pickles hold pytest-bdd
+objects). Only the latest entry per feature file is kept.
+
+Collection reads features through this cache; no separate scenario index is
+persisted. scenario_bindings() maps each scenario's steps to their step
+definitions in memory for watch mode.
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+import importlib
+import pkgutil
+from importlib import metadata
+import pytest_bdd.feature
+from pytest_bdd.parser import FeatureParser
+from config.config import ROOT_DIR, FEATURE_CACHE_DIR
+
+FEATURES_DIR = ROOT_DIR / 'features'
+STEPS_PACKAGE = 'features.steps'
+# Pickled features are only valid for the pytest-bdd and Python versions that wrote them
+ENVIRONMENT_KEY = f"pytest-bdd {metadata.version('pytest-bdd')}, Python {sys.version}".encode('utf-8')
+
+
+def _path_key(path):
+    """Hash a feature file's absolute path; shared by all cache entries of the file."""
+    return hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+
+
+def _file_key(path):
+    """Hash a feature file's absolute path and content, and the parser environment."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    return hashlib.sha256(ENVIRONMENT_KEY + b'\0' + os.path.abspath(path).encode('utf-8')
+                          + b'\0' + content).hexdigest()
+
+
+def get_cached_feature(base_path, filename, encoding='utf-8'):
+    """
+    Drop-in replacement for pytest_bdd.feature.get_feature backed by the disk cache.
+
+    Args:
+        base_path: Base feature directory
+        filename: Feature file name, relative to base_path
+        encoding: Feature file encoding
+
+    Returns:
+        Feature: The parsed feature
+    """
+    full_name = os.path.abspath(os.path.join(base_path, filename))
+    feature = pytest_bdd.feature.features.get(full_name)
+    if feature:
+        return feature
+
+    path_key = _path_key(full_name)
+    cache_file = FEATURE_CACHE_DIR / f"{path_key}-{_file_key(full_name)}.pickle"
+    try:
+        with open(cache_file, 'rb') as f:
+            feature = pickle.load(f)
+    except Exception:
+        # Missing, truncated or written by incompatible code: any failure is a cache miss
+        feature = FeatureParser(base_path, filename, encoding).parse()
+        FEATURE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(feature, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic so concurrent xdist workers never read a partial file
+        os.replace(tmp_file, cache_file)
+        _evict_stale(path_key, cache_file)
+
+    pytest_bdd.feature.features[full_name] = feature
+    return feature
+
+
+def _evict_stale(path_key, current):
+    """Remove the entries of a feature file other than its current one."""
+    for stale in FEATURE_CACHE_DIR.glob(f"{path_key}-*.pickle"):
+        if stale != current:
+            try:
+                stale.unlink()
+            except OSError:
+                # Already removed by another worker
+                pass
+
+
+def install():
+    """Route pytest-bdd feature loading through the disk cache."""
+    # pytest_bdd.scenario is shadowed by the scenario() function, so fetch the module itself
+    scenario_module = importlib.import_module('pytest_bdd.scenario')
+    pytest_bdd.feature.get_feature = get_cached_feature
+    scenario_module.get_feature = get_cached_feature
+
+
+def load_step_definitions(package=STEPS_PACKAGE):
+    """
+    Import all step modules and collect their step definitions.
+
+    Args:
+        package: Dotted name of the step definitions package
+
+    Returns:
+        list: (step type, parser, "module:function") tuples
+    """
+    definitions = []
+    steps_package = importlib.import_module(package)
+    for module_info in pkgutil.iter_modules(steps_package.__path__, f"{package}."):
+        module = importlib.import_module(module_info.name)
+        for value in vars(module).values():
+            context = getattr(value, '_pytest_bdd_step_context', None)
+            if context:
+                definitions.append((context.type, context.parser,
+                                    f"{module.__name__}:{context.step_func.__name__}"))
+    return definitions
+
+
+def _bind(step, definitions):
+    """Find the step definition matching a step, mirroring pytest-bdd's type rules."""
+    for step_type, parser, target in definitions:
+        if step_type in (None, step.type) and parser.is_matching(step.name):
+            return target
+    return None
+
+
+def scenario_bindings(features_dir=FEATURES_DIR):
+    """
+    Bind the steps of every scenario to the step definitions that run them.
+
+    Features come from the parse cache, so unchanged files are not parsed
+    again. The result is computed in memory each call; watch mode compares
+    two of them to find scenarios affected by a step definition change.
+
+    Args:
+        features_dir: Directory searched recursively for *.feature files
+
+    Returns:
+        dict: {relative feature path: {"name", "scenarios"}}
+    """
+    definitions = load_step_definitions()
+    bindings = {}
+    for path in sorted(features_dir.rglob('*.feature')):
+        feature = get_cached_feature(str(path.parent), path.name)
+        bindings[path.relative_to(ROOT_DIR).as_posix()] = {
+            'name': feature.name,
+            'scenarios': [
+                {
+                    'name': scenario.name,
+                    'steps': [
+                        {'type': step.type, 'text': step.name, 'binding': _bind(step, definitions)}
+                        for step in scenario.steps
+                    ],
+                }
+                for scenario in feature.scenarios.values()
+            ],
+        }
+    return bindings
@@ -0,0 +1,237 @@
+"""
+Protocol-level load mode for Gherkin scenarios.
+
+Runs a scenario from a feature file as N concurrent virtual users, each
+with its own HttpDriver (pooled keep-alive connections, separate cookies)
+instead of a browser. Steps are bound to the regular step definitions in
+features/steps, which work unchanged because they only talk to page objects
+through ``driver.pages``. Reports throughput and latency percentiles for the
+whole scenario and for each step.
+"""
+
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils import feature_cache
+from utils.logger import get_logger
+from pages.http_pages import HttpDriver
+from utils.account_pool import AccountPool, AccountLeases
+from config.config import BASE_URL
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def load_scenario(feature_file, scenario_name):
+    """
+    Parse a scenario and bind each step to its step definition.
+
+    Args:
+        feature_file: Feature file path, absolute or relative to the features directory
+        scenario_name: Scenario name as written in the feature file
+
+    Returns:
+        list: (step text, step function, parsed arguments) tuples
+    """
+    path = Path(feature_file)
+    if not path.is_absolute():
+        path = feature_cache.FEATURES_DIR / path
+    feature = feature_cache.get_cached_feature(str(path.parent), path.name)
+    scenario = feature.scenarios.get(scenario_name)
+    if scenario is None:
+        raise ValueError(f"Scenario '{scenario_name}' not found in {path}; "
+                         f"available: {', '.join(feature.scenarios)}")
+
+    definitions = feature_cache.load_step_definitions()
+    steps = []
+    for step in scenario.steps:
+        # Same matching rule as feature_cache.scenario_bindings
+        binding = next(((parser, target) for step_type, parser, target in definitions
+                        if step_type in (None, step.type) and parser.is_matching(step.name)), None)
+        if binding is None:
+            raise ValueError(f"No step definition for: {step.keyword} {step.name}")
+        parser, target = binding
+        module_name, function_name = target.split(":")
+        step_func = getattr(importlib.import_module(module_name), function_name)
+        steps.append((f"{step.keyword} {step.name}", step_func, parser.parse_arguments(step.name) or {}))
+    return steps
+
+
+class LoadRunner:
+    """Runs one scenario repeatedly on concurrent virtual users."""
+
+    def __init__(self, steps, users, iterations=None, duration=None, base_url=BASE_URL):
+        """
+        Initialize the runner.
+
+        Args:
+            steps: Bound steps as returned by load_scenario()
+            users: Number of concurrent virtual users
+            iterations: Scenario runs per user (default 10 unless duration is given)
+            duration: Run for this many seconds instead of a fixed number of iterations
+            base_url: Base URL of the application under test
+        """
+        self.steps = steps
+        self.users = users
+        self.iterations = iterations if iterations or duration else 10
+        self.duration = duration
+        self.base_url = base_url
+        self.scenario_times = []
+        self.step_times = {text: [] for text, _, _ in steps}
+        self.errors = {}
+        self.requests_made = 0
+        self.account_pool = AccountPool()
+        self._lock = threading.Lock()
+
+    def _virtual_user(self, deadline):
+        """Run scenario iterations for one user and record timings."""
+        driver = HttpDriver(self.base_url)
+        # Each virtual user keeps its pooled accounts for all of its iterations
+        driver.accounts = AccountLeases(self.account_pool, f"load user {threading.current_thread().name}")
+        completed = 0
+        try:
+            while (completed < self.iterations) if self.iterations else (time.perf_counter() < deadline):
+                driver.reset()
+                step_times = []
+                scenario_start = time.perf_counter()
+                error = None
+                for text, step_func, arguments in self.steps:
+                    step_start = time.perf_counter()
+                    try:
+                        step_func(driver, **arguments)
+                    except Exception as e:
+                        error = f"{text}: {type(e).__name__}: {e}"
+                        break
+                    step_times.append((text, time.perf_counter() - step_start))
+                scenario_time = time.perf_counter() - scenario_start
+                completed += 1
+                with self._lock:
+                    for text, elapsed in step_times:
+                        self.step_times[text].append(elapsed)
+                    if error:
+                        self.errors[error] = self.errors.get(error, 0) + 1
+                    else:
+                        self.scenario_times.append(scenario_time)
+        finally:
+            with self._lock:
+                self.requests_made += driver.requests_made
+            driver.accounts.release()
+            driver.quit()
+
+    def run(self):
+        """
+        Run all virtual users to completion.
+
+        Returns:
+            dict: Summary as built by summary()
+        """
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        with ThreadPoolExecutor(max_workers=self.users, thread_name_prefix="vu") as executor:
+            for future in [executor.submit(self._virtual_user, deadline) for _ in range(self.users)]:
+                future.result()
+        return self.summary(time.perf_counter() - start)
+
+    def summary(self, elapsed):
+        """
+        Build throughput and latency statistics.
+
+        Args:
+            elapsed: Wall-clock duration of the run in seconds
+
+        Returns:
+            dict: Counts, rates and {name: {"p50": ms, ...}} latency percentiles
+        """
+        def latency(values):
+            values = sorted(values)
+            stats = {f"p{pct}": percentile(values, pct) * 1000 for pct in PERCENTILES}
+            stats["max"] = values[-1] * 1000 if values else 0.0
+            return stats
+
+        passed = len(self.scenario_times)
+        failed = sum(self.errors.values())
+        return {
+            "users": self.users,
+            "elapsed": elapsed,
+            "passed": passed,
+            "failed": failed,
+            "requests": self.requests_made,
+            "scenarios_per_second": (passed + failed) / elapsed if elapsed else 0.0,
+            "requests_per_second": self.requests_made / elapsed if elapsed else 0.0,
+            "scenario_latency": latency(self.scenario_times),
+            "step_latency": {text: latency(values) for text, values in self.step_times.items()},
+            "errors": dict(self.errors),
+        }
+
+
+def format_summary(summary):
+    """Format a load run summary as a text report."""
+    header = "".join(f"{f'p{pct}':>9}" for pct in PERCENTILES) + f"{'max':>9}"
+    lines = [
+        f"{summary['users']} virtual users, {summary['elapsed']:.1f}s: "
+        f"{summary['passed']} passed, {summary['failed']} failed, {summary['requests']} HTTP requests",
+        f"Throughput: {summary['scenarios_per_second']:.1f} scenarios/s, "
+        f"{summary['requests_per_second']:.1f} requests/s",
+        "",
+        f"{'latency (ms)':<50}{header}",
+    ]
+    rows = [("scenario", summary["scenario_latency"])] + list(summary["step_latency"].items())
+    for name, stats in rows:
+        values = "".join(f"{stats[f'p{pct}']:9.1f}" for pct in PERCENTILES) + f"{stats['max']:9.1f}"
+        lines.append(f"{name[:49]:<50}{values}")
+    if summary["errors"]:
+        lines.append("")
+        lines.append("Errors:")
+        for error, count in sorted(summary["errors"].items(), key=lambda item: -item[1]):
+            lines.append(f"  {count:>6}x {error}")
+    return "\n".join(lines)
+
+
+def run_load(feature_file, scenario_name, users, iterations=None, duration=None, base_url=BASE_URL,
+             standin=False):
+    """
+    Load-test a scenario and print the report.
+
+    Args:
+        feature_file: Feature file, relative to the features directory or absolute
+        scenario_name: Scenario to run
+        users: Number of concurrent virtual users
+        iterations: Scenario runs per user
+        duration: Seconds to run instead of a fixed number of iterations
+        base_url: Base URL of the application under test
+        standin: Run against a local stand-in server instead of base_url
+
+    Returns:
+        int: 0 if every scenario run passed, 1 otherwise
+    """
+    steps = load_scenario(feature_file, scenario_name)
+
+    server = None
+    if standin:
+        from utils.standin_server import start_server
+        server, base_url = start_server()
+
+    # Per-step INFO logging would dominate the timings of thousands of iterations
+    framework_logger = get_logger()
+    previous_level = framework_logger.level
+    framework_logger.setLevel(logging.WARNING)
+    try:
+        logging.info(f"Load testing '{scenario_name}' against {base_url} with {users} virtual users")
+        summary = LoadRunner(steps, users, iterations, duration, base_url).run()
+    finally:
+        framework_logger.setLevel(previous_level)
+        if server:
+            server.shutdown()
+
+    print(format_summary(summary))
+    return 1 if summary["failed"] else 0
@@ -1,6 +1,24 @@
 import logging
+import logging.handlers
 import os
+import gzip
+import shutil
 import datetime
+from config.config import LOGS_DIR, LOG_MAX_BYTES
+
+
+def _rotated_name(default_name):
+    """Name rotated logs by time so each rotation gets its own compressed file."""
+    base = default_name.rsplit(".log", 1)[0]
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return f"{base}_{timestamp}.log.gz"
+
+
+def _compress_rotated(source, dest):
+    """Gzip the rotated log file and remove the uncompressed original."""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
 
 
 def setup_logger(log_level=logging.INFO):
@@ -14,9 +32,7 @@ def setup_logger(log_level=logging.INFO):
         The configured logger instance
     """
     # Create logs directory if it doesn't exist
-    logs_dir = os.path.join(os.getcwd(), "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
+    LOGS_DIR.mkdir(exist_ok=True)
     
     # Configure logger
     logger = logging.getLogger("test_framework")
@@ -26,10 +42,13 @@ def setup_logger(log_level=logging.INFO):
     if logger.handlers:
         logger.handlers.clear()
     
-    # Create file handler for output to file
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(logs_dir, f"test_log_{timestamp}.log")
-    file_handler = logging.FileHandler(log_file)
+    # One appending log per xdist or pool worker, gzip-compressed when it rotates at LOG_MAX_BYTES;
+    # processes sharing a RotatingFileHandler's file would rotate it under each other
+    worker = os.environ.get("PYTEST_XDIST_WORKER") or os.environ.get("POOL_WORKER")
+    log_file = LOGS_DIR / (f"test_framework_{worker}.log" if worker else "test_framework.log")
+    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=1)
+    file_handler.namer = _rotated_name
+    file_handler.rotator = _compress_rotated
     file_handler.setLevel(log_level)
     
     # Create console handler for output to console
@@ -53,7 +72,13 @@ def get_logger():
     """
     Get a configured logger instance.
     
+    The logger is set up on first use and shared afterwards, so page objects
+    and modules calling this do not each create a new log file.
+    
     Returns:
         Logger: A configured logger instance
     """
+    logger = logging.getLogger("test_framework")
+    if logger.handlers:
+        return logger
     return setup_logger() 
\ No newline at end of file
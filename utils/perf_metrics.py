@@ -0,0 +1,165 @@
+"""
+Front-end performance metrics from the browser's Navigation, Paint and
+Resource Timing APIs.
+
+Page objects collect the timing entries of the current document in one
+script call, reduce them to a flat set of millisecond metrics, append them
+to a per-run JSON Lines file in reports/perf and check them against the
+per-URL budgets in PERF_BUDGETS. Pages using the network-idle readiness
+engine (utils.readiness) add the time they went quiet ("readiness") and how
+long the step waited for it ("readiness_wait").
+"""
+
+import os
+import sys
+import json
+import time
+from urllib.parse import urlparse
+from config.config import PERF_DIR, PERF_BUDGETS, RUN_ID
+
+# Metrics checked by budgets, in report order
+METRICS = ("ttfb", "dom_content_loaded", "load", "first_paint", "first_contentful_paint",
+           "resource_count", "transfer_bytes", "readiness", "readiness_wait")
+
+
+def extract_metrics(timing):
+    """
+    Reduce raw timing entries to flat metrics.
+
+    Args:
+        timing: Result of the PAGE_TIMING script
+
+    Returns:
+        dict: Millisecond timings relative to navigation start, plus resource
+        count, transferred bytes and the slowest resources
+    """
+    navigation = timing["navigation"]
+    paints = {entry["name"]: entry["startTime"] for entry in timing.get("paint", [])}
+    resources = timing.get("resources", [])
+    slowest = sorted(resources, key=lambda entry: entry["duration"], reverse=True)[:3]
+    return {
+        "url": timing["url"],
+        "ttfb": round(navigation["responseStart"], 1),
+        "dom_content_loaded": round(navigation["domContentLoadedEventEnd"], 1),
+        "load": round(navigation["loadEventEnd"], 1),
+        "first_paint": round(paints["first-paint"], 1) if "first-paint" in paints else None,
+        "first_contentful_paint": (round(paints["first-contentful-paint"], 1)
+                                   if "first-contentful-paint" in paints else None),
+        "resource_count": len(resources),
+        "transfer_bytes": navigation.get("transferSize", 0) + sum(entry["transferSize"] for entry in resources),
+        "slowest_resources": [
+            {"name": entry["name"], "duration": round(entry["duration"], 1)} for entry in slowest
+        ],
+    }
+
+
+def budget_for(url, budgets=None):
+    """
+    Look up the budgets that apply to a URL.
+
+    Budgets are keyed by URL path; entries under "default" apply to every
+    page unless the path overrides them.
+
+    Args:
+        url: Page URL
+        budgets: Budget table (default: PERF_BUDGETS)
+
+    Returns:
+        dict: {metric: limit}
+    """
+    budgets = PERF_BUDGETS if budgets is None else budgets
+    path = urlparse(url).path.rstrip("/") or "/"
+    return {**budgets.get("default", {}), **budgets.get(path, {})}
+
+
+def check_budgets(metrics, budget):
+    """
+    Compare metrics against a budget.
+
+    Args:
+        metrics: Result of extract_metrics
+        budget: {metric: limit}
+
+    Returns:
+        list: Human-readable descriptions of exceeded limits (empty if within budget)
+    """
+    violations = []
+    for metric, limit in budget.items():
+        value = metrics.get(metric)
+        if value is not None and value > limit:
+            unit = "" if metric in ("resource_count", "transfer_bytes") else " ms"
+            violations.append(f"{metric} {value}{unit} exceeds budget {limit}{unit}")
+    return violations
+
+
+def record(metrics, test=None):
+    """
+    Append metrics to this run's metrics file.
+
+    Args:
+        metrics: Result of extract_metrics
+        test: Node id of the test that collected them
+
+    Returns:
+        Path: The metrics file
+    """
+    PERF_DIR.mkdir(parents=True, exist_ok=True)
+    path = PERF_DIR / f"metrics_{RUN_ID}.jsonl"
+    line = json.dumps({"timestamp": time.time(), "test": test, **metrics}) + "\n"
+    # A single small append is atomic, so concurrent workers do not interleave lines
+    with open(path, "a") as f:
+        f.write(line)
+    return path
+
+
+def load_run(path):
+    """
+    Load the metrics recorded in a run file.
+
+    Args:
+        path: Path to a metrics_<run>.jsonl file
+
+    Returns:
+        list: Metric dicts in recording order
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(entries):
+    """
+    Summarize metrics per URL path.
+
+    Args:
+        entries: Metric dicts, e.g. from load_run
+
+    Returns:
+        dict: {path: {metric: (median, max)}}
+    """
+    by_path = {}
+    for entry in entries:
+        path = urlparse(entry["url"]).path or "/"
+        for metric in METRICS:
+            if entry.get(metric) is not None:
+                by_path.setdefault(path, {}).setdefault(metric, []).append(entry[metric])
+    return {
+        path: {metric: (sorted(values)[len(values) // 2], max(values)) for metric, values in metrics.items()}
+        for path, metrics in by_path.items()
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_file = sys.argv[1]
+    else:
+        runs = sorted(PERF_DIR.glob("metrics_*.jsonl"), key=os.path.getmtime)
+        if not runs:
+            sys.exit("No performance metrics recorded yet")
+        run_file = runs[-1]
+    print(f"Performance metrics from {run_file} (median / max)")
+    for path, metrics in sorted(summarize(load_run(run_file)).items()):
+        print(path)
+        for metric in METRICS:
+            if metric in metrics:
+                median, maximum = metrics[metric]
+                print(f"  {metric:<24} {median:>10} / {maximum}")
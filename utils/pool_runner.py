@@ -0,0 +1,323 @@
+"""
+Process-pool test runner.
+
+Collects the suite once in the parent process, then forks workers that
+inherit the already-imported framework modules (pages, steps, config). Each
+worker runs one pytest session, so session hooks, the browser session
+supervisor and history batching work as in a normal run. A worker is
+spawned with a batch of node ids reserved for it (at most its test limit,
+and smaller as the queue drains so the last batches stay balanced) and only
+collects those, so neither workers nor their replacements collect the whole
+suite again. Its runtestloop asks the parent for the next node id, and the
+parent hands out the worker's reserved tests one at a time and tracks the
+assignments. If a worker dies, its unfinished test is reported as an error
+and its other assigned and reserved tests go back into the queue. Results
+are streamed back to the parent and printed as live progress. Each worker
+exits after a fixed number of tests and is replaced, which bounds memory
+growth.
+"""
+
+import os
+import sys
+import time
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+from collections import deque
+import pytest
+from utils.tracing import merge_parts
+from utils.session_supervisor import summary_lines
+
+
+class _CollectPlugin:
+    """Pytest plugin that records the collected node ids."""
+
+    def __init__(self):
+        self.node_ids = []
+
+    def pytest_collection_finish(self, session):
+        self.node_ids = [item.nodeid for item in session.items]
+
+
+class _ResultPlugin:
+    """Pytest plugin that sends per-test results to the parent process."""
+
+    def __init__(self, connection, worker_id):
+        self.connection = connection
+        self.worker_id = worker_id
+        self.outcome = None
+        self.duration = 0.0
+        self.longrepr = ""
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self.outcome = None
+        self.duration = 0.0
+        self.longrepr = ""
+
+    def pytest_runtest_logreport(self, report):
+        self.duration += report.duration
+        if report.failed:
+            self.outcome = "failed" if report.when == "call" else "error"
+            self.longrepr = str(report.longrepr)
+        elif report.skipped and self.outcome is None:
+            self.outcome = "skipped"
+        elif report.when == "call" and self.outcome is None:
+            self.outcome = "passed"
+
+    def pytest_runtest_logfinish(self, nodeid, location):
+        self.connection.send(("result", self.worker_id, nodeid, self.outcome or "error",
+                              self.duration, self.longrepr))
+
+
+def collect(pytest_args):
+    """
+    Collect test node ids once in the current process.
+
+    Importing the test modules here means forked workers inherit them.
+
+    Args:
+        pytest_args: Arguments selecting the tests (path, markers, ...)
+
+    Returns:
+        list: Collected node ids
+    """
+    plugin = _CollectPlugin()
+    exit_code = pytest.main(["--collect-only", "-qq", "-p", "no:cacheprovider"] + pytest_args,
+                            plugins=[plugin])
+    if exit_code not in (pytest.ExitCode.OK, pytest.ExitCode.NO_TESTS_COLLECTED):
+        raise RuntimeError(f"Test collection failed with exit code {exit_code}")
+    return plugin.node_ids
+
+
+class _TaskPlugin:
+    """Pytest plugin that runs the tests the parent assigns to this worker, in one session."""
+
+    def __init__(self, worker_id, connection, max_tests):
+        self.worker_id = worker_id
+        self.connection = connection
+        self.max_tests = max_tests
+        self.requested = 0
+        self.ran = 0
+        # Filled by conftest hooks at session end and sent to the parent, as with xdist workers
+        self.workeroutput = {}
+
+    def pytest_configure(self, config):
+        config.workeroutput = self.workeroutput
+
+    def _next_node_id(self):
+        """Ask the parent for the next test; None when there is none or max_tests is reached."""
+        if self.requested >= self.max_tests:
+            return None
+        self.requested += 1
+        self.connection.send(("ready", self.worker_id))
+        return self.connection.recv()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        items = {item.nodeid: item for item in session.items}
+        node_id = self._next_node_id()
+        while node_id is not None:
+            # Fetched before running the current test so fixtures shared with it are not torn down
+            next_node_id = self._next_node_id()
+            item = items.get(node_id)
+            self.connection.send(("start", self.worker_id, node_id))
+            if item is None:
+                self.connection.send(("result", self.worker_id, node_id, "error", 0.0,
+                                      f"{node_id} was not collected by worker {self.worker_id}"))
+            else:
+                item.config.hook.pytest_runtest_protocol(item=item, nextitem=items.get(next_node_id))
+            self.ran += 1
+            node_id = next_node_id
+        return True
+
+
+def _quiet_logging():
+    """Give this worker its own log file and drop console handlers; the parent reports progress."""
+    from utils.logger import setup_logger
+
+    framework_logger = setup_logger(logging.getLogger("test_framework").level)
+    # Framework records also propagate to the root handler run_tests.py configures
+    for logger in (framework_logger, logging.getLogger()):
+        for handler in list(logger.handlers):
+            if not isinstance(handler, logging.FileHandler):
+                logger.removeHandler(handler)
+
+
+def _worker(worker_id, connection, pytest_args, node_ids, max_tests):
+    """Run the tests the parent assigns from node_ids in one pytest session, until told to stop."""
+    # Progress is reported by the parent; keep worker terminal output quiet
+    sys.stdout = open(os.devnull, "w")
+    # Lets per-process artefacts (e.g. trace parts, log files) tell workers from the parent
+    os.environ["POOL_WORKER"] = f"pw{worker_id}"
+    _quiet_logging()
+    tasks = _TaskPlugin(worker_id, connection, max_tests)
+    pytest.main(["-qq", "-p", "no:cacheprovider"] + pytest_args + list(node_ids),
+                plugins=[tasks, _ResultPlugin(connection, worker_id)])
+    connection.send(("exit", worker_id, tasks.ran, tasks.workeroutput))
+
+
+class PoolRunner:
+    """Runs collected tests on a pool of forked, periodically recycled workers."""
+
+    def __init__(self, workers, max_tests_per_worker=50, pytest_args=None):
+        """
+        Initialize the runner.
+
+        Args:
+            workers: Number of concurrent worker processes
+            max_tests_per_worker: Tests a worker runs before it is replaced
+            pytest_args: Extra pytest arguments passed to every worker run
+        """
+        self.workers = workers
+        self.max_tests_per_worker = max_tests_per_worker
+        self.pytest_args = pytest_args or []
+        self.context = multiprocessing.get_context("fork")
+        self.results = {}
+        # Browser sessions reported by the workers
+        self.sessions = []
+
+    def run(self, node_ids):
+        """
+        Run the given tests and print live progress.
+
+        Args:
+            node_ids: Node ids to run, as returned by collect()
+
+        Returns:
+            int: 0 if all tests passed or were skipped, 1 otherwise
+        """
+        total = len(node_ids)
+        if total == 0:
+            logging.warning("No tests collected")
+            return 0
+
+        pending = deque(node_ids)
+        processes = {}
+        connections = {}
+        # Tests handed to each worker and not yet reported, in the order it runs them
+        assigned = {}
+        # Tests collected by each worker and not yet handed to it
+        reserved = {}
+        running = {}
+        asked = set()
+        next_worker_id = 0
+        start_time = time.time()
+
+        def spawn():
+            nonlocal next_worker_id
+            next_worker_id += 1
+            # Split what is left evenly over the pool so a worker spawned late does not get a long tail
+            size = min(self.max_tests_per_worker, -(-len(pending) // self.workers))
+            batch = [pending.popleft() for _ in range(size)]
+            parent_end, child_end = self.context.Pipe()
+            process = self.context.Process(
+                target=_worker,
+                args=(next_worker_id, child_end, self.pytest_args, batch, self.max_tests_per_worker),
+                # Not daemonic: daemonic processes cannot start children, e.g. the screencast encoder
+                daemon=False,
+            )
+            process.start()
+            child_end.close()
+            processes[next_worker_id] = process
+            connections[next_worker_id] = parent_end
+            assigned[next_worker_id] = deque()
+            reserved[next_worker_id] = deque(batch)
+
+        def retire(worker_id, ran=None):
+            process = processes.pop(worker_id)
+            process.join()
+            connections.pop(worker_id).close()
+            if ran is None:
+                # Died without reporting: fail the test it was running and hand
+                # its other assigned and reserved tests to the remaining workers
+                node_id = running.get(worker_id)
+                if node_id:
+                    self._record(node_id, "error", 0.0, f"Worker {worker_id} crashed", worker_id, total)
+                    assigned[worker_id].remove(node_id)
+                logging.warning(f"Worker {worker_id} died (exit code {process.exitcode}); "
+                                f"requeued {len(assigned[worker_id]) + len(reserved[worker_id])} tests")
+            elif pending:
+                logging.debug(f"Recycling worker {worker_id} after {ran} tests")
+            pending.extendleft(reversed(list(assigned.pop(worker_id)) + list(reserved.pop(worker_id))))
+            running.pop(worker_id, None)
+            if worker_id not in asked and pending:
+                # The session ended before asking for a test (e.g. a usage error); replacements would too
+                for node_id in pending:
+                    self._record(node_id, "error", 0.0, f"Worker {worker_id} could not run tests",
+                                 worker_id, total)
+                pending.clear()
+
+        def handle(message):
+            kind, worker_id = message[0], message[1]
+            if kind == "ready":
+                asked.add(worker_id)
+                node_id = reserved[worker_id].popleft() if reserved[worker_id] else None
+                if node_id is not None:
+                    assigned[worker_id].append(node_id)
+                connections[worker_id].send(node_id)
+            elif kind == "start":
+                running[worker_id] = message[2]
+            elif kind == "result":
+                running.pop(worker_id, None)
+                assigned[worker_id].remove(message[2])
+                self._record(message[2], message[3], message[4], message[5], worker_id, total)
+            elif kind == "exit":
+                self.sessions.extend(dict(session, worker=f"pw{worker_id}")
+                                     for session in message[3].get("browser_sessions", []))
+                retire(worker_id, message[2])
+
+        try:
+            while pending and len(processes) < self.workers:
+                spawn()
+            while processes:
+                owners = {process.sentinel: worker_id for worker_id, process in processes.items()}
+                owners.update({connection: worker_id for worker_id, connection in connections.items()})
+                for ready in wait(list(owners)):
+                    worker_id = owners[ready]
+                    if worker_id not in processes:
+                        continue
+                    # Messages are sent synchronously, so everything a worker sent before dying can still be read
+                    connection = connections[worker_id]
+                    try:
+                        while worker_id in processes and connection.poll():
+                            handle(connection.recv())
+                    except (EOFError, OSError):
+                        # The worker closed its end or died before reading its next test
+                        retire(worker_id)
+                        continue
+                    if worker_id in processes and not processes[worker_id].is_alive():
+                        retire(worker_id)
+                while pending and len(processes) < self.workers:
+                    spawn()
+        finally:
+            # Workers are not daemonic (they start encoder processes), so stop any left on an interrupt
+            for process in processes.values():
+                process.terminate()
+                process.join()
+
+        trace_path = merge_parts()
+        if trace_path:
+            print(f"Trace written to {trace_path}")
+        return self._print_summary(time.time() - start_time)
+
+    def _record(self, node_id, outcome, duration, longrepr, worker_id, total):
+        """Store a result and print a progress line."""
+        self.results[node_id] = {"outcome": outcome, "duration": duration,
+                                 "longrepr": longrepr, "worker": worker_id}
+        print(f"[{len(self.results)}/{total}] {outcome.upper():<7} {node_id} "
+              f"({duration:.2f}s, worker {worker_id})", flush=True)
+
+    def _print_summary(self, elapsed):
+        """Print failures and totals; return the process exit code."""
+        counts = {}
+        for node_id, result in self.results.items():
+            counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+            if result["outcome"] in ("failed", "error"):
+                print(f"\n{'=' * 20} {node_id} {'=' * 20}\n{result['longrepr']}")
+        lines = summary_lines(self.sessions)
+        if lines:
+            print(f"\n{'=' * 20} browser sessions {'=' * 20}")
+            print("\n".join(lines))
+        totals = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+        print(f"\n{totals} in {elapsed:.2f}s")
+        return 1 if counts.get("failed") or counts.get("error") else 0
@@ -0,0 +1,99 @@
+"""
+Network-idle readiness engine for page loads.
+
+document.readyState == "complete" is reached too early on pages that render
+from fetch/XHR responses after the load event, and too late on pages that
+wait for images or third-party assets the test does not care about. Pages
+that select the "network_idle" readiness instead are considered ready once
+the document is parsed, no fetch/XHR request is in flight and the DOM has not
+changed for a quiet window (READINESS_QUIET_MS).
+
+A tracker script wraps fetch and XMLHttpRequest and observes DOM mutations.
+On Chromium it is registered for every new document, so requests started
+while the page loads are counted too; other browsers get it after each page
+object navigation. The wait itself runs in the page as an async script that
+returns the moment the quiet window ends, instead of polling from Python.
+"""
+
+import time
+from selenium.common.exceptions import JavascriptException, TimeoutException
+from utils.logger import get_logger
+from utils.cdp_input import cdp_expression
+from pages import scripts
+
+logger = get_logger()
+
+# Longest single in-page wait; kept below Selenium's default 30 s script timeout
+MAX_SCRIPT_WAIT = 5.0
+
+
+class ReadinessTracker:
+    """Injects the readiness tracker into the documents of one session and waits for network idle."""
+
+    def __init__(self, driver):
+        """
+        Initialize the tracker.
+
+        Args:
+            driver: WebDriver instance
+        """
+        self.driver = driver
+        # True once the script is registered for every new document (Chromium only)
+        self.persistent = False
+
+    def start(self):
+        """
+        Register the tracker for all future documents where the browser supports it.
+
+        Returns:
+            ReadinessTracker: self
+        """
+        if hasattr(self.driver, "execute_cdp_cmd"):
+            try:
+                self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                    "source": cdp_expression(scripts.READINESS_TRACKER)})
+                self.persistent = True
+            except Exception as e:
+                logger.warning(f"Could not register the readiness tracker for new documents: {e}")
+        return self
+
+    def apply(self):
+        """Install the tracker in the current document (no-op if already installed)."""
+        self.driver.execute_script(scripts.READINESS_TRACKER)
+
+    def wait(self, quiet_ms, timeout):
+        """
+        Wait until the current page is network idle.
+
+        Args:
+            quiet_ms: How long the page must stay without requests and DOM changes
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            dict: url, readiness (ms from navigation start until the page went quiet)
+            and waited (ms spent in this call)
+        """
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        state = None
+        while True:
+            chunk = max(0.0, min(deadline - time.monotonic(), MAX_SCRIPT_WAIT))
+            try:
+                state = self.driver.execute_async_script(scripts.READINESS_WAIT, quiet_ms, chunk * 1000)
+            except (JavascriptException, TimeoutException) as e:
+                # The document was replaced while waiting (a navigation) or the script timeout is
+                # shorter than the chunk; wait again
+                logger.debug(f"Readiness wait interrupted: {e.msg}")
+                state = None
+                time.sleep(0.05)
+            if state and state["ready"]:
+                break
+            if time.monotonic() >= deadline:
+                inflight = state["inflight"] if state else "unknown"
+                raise TimeoutException(f"Page did not become network idle within {timeout}s "
+                                       f"({inflight} requests in flight)")
+        return {
+            "url": state["url"],
+            "readiness": round(state["readiness"], 1),
+            "waited": round((time.perf_counter() - started) * 1000, 1),
+        }
@@ -0,0 +1,350 @@
+"""
+SQLite-backed history of test runs.
+
+Every worker process buffers its scenario and step results in memory and
+writes them in one transaction per batch (and at session end), so parallel
+workers rarely contend for the database lock. The query functions answer
+the questions the scheduler and rerun decisions need: which scenarios are
+slowest, how their durations trend, and how flaky they are over the last N
+runs.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from config.config import RUN_HISTORY, RUN_HISTORY_DB, RUN_ID, BROWSER, ENV
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    browser TEXT,
+    env TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    nodeid TEXT NOT NULL,
+    scenario TEXT,
+    attempt INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    worker TEXT,
+    browser TEXT,
+    started REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS results_nodeid ON results(nodeid);
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    result_id INTEGER NOT NULL REFERENCES results(id),
+    position INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS steps_result ON steps(result_id);
+"""
+
+
+def current_worker():
+    """Return the xdist or pool worker id of this process, or 'main'."""
+    return os.environ.get("PYTEST_XDIST_WORKER") or os.environ.get("POOL_WORKER") or "main"
+
+
+def connect(path=RUN_HISTORY_DB):
+    """
+    Open the history database, creating the schema if needed.
+
+    Args:
+        path: Database file
+
+    Returns:
+        sqlite3.Connection: Connection in WAL mode with a generous busy timeout
+    """
+    path = str(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30)
+    # WAL lets readers (e.g. the history CLI) run while workers write
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class HistoryRecorder:
+    """Buffers results of the current process and writes them in batches."""
+
+    def __init__(self, enabled=RUN_HISTORY, path=RUN_HISTORY_DB, run_id=RUN_ID, batch_size=50):
+        """
+        Initialize the recorder.
+
+        Args:
+            enabled: Whether results are recorded
+            path: Database file
+            run_id: Identifier shared by all workers of the run
+            batch_size: Results buffered before a transaction is written
+        """
+        self.enabled = enabled
+        self.path = path
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.pending = []
+        self._current = {}
+        self._lock = threading.Lock()
+
+    def start_test(self, nodeid):
+        """Begin accumulating one attempt of a test."""
+        if not self.enabled:
+            return
+        self._current[nodeid] = {"scenario": None, "outcome": None, "duration": 0.0,
+                                 "started": time.time(), "attempt": 0, "steps": [],
+                                 "step_started": None}
+
+    def set_scenario(self, nodeid, scenario):
+        """Record the Gherkin scenario name of a test."""
+        if nodeid in self._current:
+            self._current[nodeid]["scenario"] = scenario
+
+    def start_step(self, nodeid):
+        """Mark the start of a step."""
+        if nodeid in self._current:
+            self._current[nodeid]["step_started"] = time.perf_counter()
+
+    def end_step(self, nodeid, step, outcome):
+        """Record a finished step."""
+        current = self._current.get(nodeid)
+        if current and current["step_started"] is not None:
+            current["steps"].append((step, outcome, time.perf_counter() - current["step_started"]))
+            current["step_started"] = None
+
+    def add_report(self, report):
+        """Fold a setup/call/teardown report into the current attempt."""
+        current = self._current.get(report.nodeid)
+        if current is None:
+            return
+        current["duration"] += report.duration
+        current["attempt"] = getattr(report, "rerun", 0)
+        if report.outcome == "rerun":
+            current["outcome"] = "rerun"
+        elif report.failed:
+            current["outcome"] = "failed" if report.when == "call" else "error"
+        elif report.skipped and current["outcome"] is None:
+            current["outcome"] = "skipped"
+        elif report.when == "call" and current["outcome"] is None:
+            current["outcome"] = "passed"
+
+    def finish_test(self, nodeid):
+        """Queue the finished attempt, writing a batch when the buffer is full."""
+        current = self._current.pop(nodeid, None)
+        if current is None:
+            return
+        with self._lock:
+            self.pending.append((nodeid, current))
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered results in a single transaction."""
+        with self._lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return
+        # Resolved at write time: pool workers are forked after this object is created
+        worker = current_worker()
+        connection = connect(self.path)
+        try:
+            # BEGIN IMMEDIATE takes the write lock once for the whole batch
+            connection.execute("BEGIN IMMEDIATE")
+            started = min(current["started"] for _, current in pending)
+            connection.execute(
+                "INSERT INTO runs (run_id, started, finished, browser, env) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET started = MIN(started, excluded.started), "
+                "finished = MAX(finished, excluded.finished)",
+                (self.run_id, started, time.time(), BROWSER, ENV),
+            )
+            for nodeid, current in pending:
+                cursor = connection.execute(
+                    "INSERT INTO results (run_id, nodeid, scenario, attempt, outcome, duration, worker, "
+                    "browser, started) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.run_id, nodeid, current["scenario"], current["attempt"],
+                     current["outcome"] or "error", current["duration"], worker, BROWSER,
+                     current["started"]),
+                )
+                connection.executemany(
+                    "INSERT INTO steps (result_id, position, step, outcome, duration) VALUES (?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, position, step, outcome, duration)
+                     for position, (step, outcome, duration) in enumerate(current["steps"])],
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+
+def _recent_runs(connection, runs):
+    """Return the ids of the last N runs, oldest first."""
+    rows = connection.execute("SELECT run_id FROM runs ORDER BY started DESC LIMIT ?", (runs,)).fetchall()
+    return [row[0] for row in reversed(rows)]
+
+
+def _placeholders(values):
+    return ",".join("?" * len(values))
+
+
+def slowest(connection, runs=10, limit=10):
+    """
+    Slowest tests by mean duration of their passing attempts.
+
+    Args:
+        connection: History database connection
+        runs: Number of recent runs to consider
+        limit: Number of tests to return
+
+    Returns:
+        list: (nodeid, scenario, runs, mean seconds, max seconds) tuples
+    """
+    run_ids = _recent_runs(connection, runs)
+    if not run_ids:
+        return []
+    return connection.execute(
+        f"SELECT nodeid, MAX(scenario), COUNT(DISTINCT run_id), AVG(duration), MAX(duration) "
+        f"FROM results WHERE outcome = 'passed' AND run_id IN ({_placeholders(run_ids)}) "
+        f"GROUP BY nodeid ORDER BY AVG(duration) DESC LIMIT ?",
+        run_ids + [limit],
+    ).fetchall()
+
+
+def durations_by_run(connection, runs=10):
+    """
+    Duration of each test in each of the last N runs.
+
+    Args:
+        connection: History database connection
+        runs: Number of recent runs to consider
+
+    Returns:
+        tuple: (run ids oldest first, {nodeid: {run_id: seconds}}) using the final attempt's duration
+    """
+    run_ids = _recent_runs(connection, runs)
+    series = {}
+    if run_ids:
+        rows = connection.execute(
+            f"SELECT r.nodeid, r.run_id, r.duration FROM results r "
+            f"JOIN (SELECT run_id, nodeid, MAX(attempt) AS attempt FROM results "
+            f"      WHERE run_id IN ({_placeholders(run_ids)}) GROUP BY run_id, nodeid) last "
+            f"ON r.run_id = last.run_id AND r.nodeid = last.nodeid AND r.attempt = last.attempt",
+            run_ids,
+        ).fetchall()
+        for nodeid, run_id, duration in rows:
+            series.setdefault(nodeid, {})[run_id] = duration
+    return run_ids, series
+
+
+def trends(connection, runs=10, limit=10):
+    """
+    Tests whose duration changed most between the older and newer half of the last N runs.
+
+    Args:
+        connection: History database connection
+        runs: Number of recent runs to consider
+        limit: Number of tests to return
+
+    Returns:
+        list: (nodeid, older mean, newer mean, relative change, [durations oldest first]) tuples
+    """
+    run_ids, series = durations_by_run(connection, runs)
+    middle = len(run_ids) // 2
+    rows = []
+    for nodeid, by_run in series.items():
+        older = [by_run[run_id] for run_id in run_ids[:middle] if run_id in by_run]
+        newer = [by_run[run_id] for run_id in run_ids[middle:] if run_id in by_run]
+        if not older or not newer:
+            continue
+        older_mean = sum(older) / len(older)
+        newer_mean = sum(newer) / len(newer)
+        change = (newer_mean - older_mean) / older_mean if older_mean else 0.0
+        rows.append((nodeid, older_mean, newer_mean, change,
+                     [by_run.get(run_id) for run_id in run_ids]))
+    rows.sort(key=lambda row: abs(row[3]), reverse=True)
+    return rows[:limit]
+
+
+def flakiness(connection, runs=10, limit=10):
+    """
+    Flakiness of tests over the last N runs.
+
+    A run is flaky for a test when it failed and then passed on a rerun.
+    Flips count changes between passing and failing final outcomes from one
+    run to the next.
+
+    Args:
+        connection: History database connection
+        runs: Number of recent runs to consider
+        limit: Number of tests to return
+
+    Returns:
+        list: (nodeid, runs, failed runs, flaky runs, flips, flaky rate) tuples, flakiest first
+    """
+    run_ids = _recent_runs(connection, runs)
+    if not run_ids:
+        return []
+    rows = connection.execute(
+        f"SELECT run_id, nodeid, attempt, outcome FROM results "
+        f"WHERE run_id IN ({_placeholders(run_ids)}) ORDER BY nodeid, attempt",
+        run_ids,
+    ).fetchall()
+    attempts = {}
+    for run_id, nodeid, attempt, outcome in rows:
+        attempts.setdefault(nodeid, {}).setdefault(run_id, []).append(outcome)
+
+    stats = []
+    for nodeid, by_run in attempts.items():
+        finals = [by_run[run_id][-1] for run_id in run_ids if run_id in by_run]
+        flaky = sum(1 for outcomes in by_run.values()
+                    if outcomes[-1] == "passed" and any(o in ("rerun", "failed", "error") for o in outcomes[:-1]))
+        failed = sum(1 for final in finals if final in ("failed", "error"))
+        results = [final == "passed" for final in finals if final != "skipped"]
+        flips = sum(1 for previous, current in zip(results, results[1:]) if previous != current)
+        stats.append((nodeid, len(finals), failed, flaky, flips, flaky / len(finals) if finals else 0.0))
+    stats.sort(key=lambda row: (row[5], row[4], row[2]), reverse=True)
+    return stats[:limit]
+
+
+def print_report(report, runs=10, limit=10, path=RUN_HISTORY_DB):
+    """
+    Print a history report.
+
+    Args:
+        report: "slowest", "trends" or "flaky"
+        runs: Number of recent runs to consider
+        limit: Number of tests to show
+        path: Database file
+    """
+    if not os.path.exists(path):
+        print(f"No run history yet ({path})")
+        return
+    connection = connect(path)
+    try:
+        if report == "slowest":
+            print(f"Slowest tests over the last {runs} runs (passing attempts)")
+            print(f"{'mean':>9} {'max':>9} {'runs':>5}  test")
+            for nodeid, scenario, run_count, mean, maximum in slowest(connection, runs, limit):
+                print(f"{mean:8.2f}s {maximum:8.2f}s {run_count:>5}  {nodeid}"
+                      + (f" ({scenario})" if scenario else ""))
+        elif report == "trends":
+            print(f"Duration trends over the last {runs} runs (older half vs newer half)")
+            print(f"{'older':>9} {'newer':>9} {'change':>8}  test / durations oldest first")
+            for nodeid, older, newer, change, durations in trends(connection, runs, limit):
+                series = " ".join("-" if value is None else f"{value:.1f}" for value in durations)
+                print(f"{older:8.2f}s {newer:8.2f}s {change:+7.0%}  {nodeid}\n{'':30}{series}")
+        elif report == "flaky":
+            print(f"Flakiness over the last {runs} runs")
+            print(f"{'flaky':>6} {'rate':>6} {'flips':>6} {'failed':>7} {'runs':>5}  test")
+            for nodeid, run_count, failed, flaky, flips, rate in flakiness(connection, runs, limit):
+                print(f"{flaky:>6} {rate:6.0%} {flips:>6} {failed:>7} {run_count:>5}  {nodeid}")
+        else:
+            raise ValueError(f"Unknown history report: {report}")
+    finally:
+        connection.close()
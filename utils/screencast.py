@@ -0,0 +1,248 @@
+"""
+Failure-only screencast recording for Chromium browsers.
+
+ScreencastRecorder opens its own DevTools connection to the session's page
+and runs Page.startScreencast, keeping the last SCREENCAST_SECONDS of JPEG
+frames in a bounded in-memory ring buffer. Nothing touches the disk while
+tests pass. When a test fails, the buffered frames are handed to
+ScreencastEncoder, which turns them into an animated WebP (GIF if Pillow
+lacks WebP support) in a separate process and stores it in the artefact
+store.
+"""
+
+import json
+import time
+import base64
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from utils.logger import get_logger
+from utils.artefact_store import store as default_store, ArtefactStore
+from config.config import SCREENCAST_SECONDS, SCREENCAST_MAX_FRAMES, SCREENCAST_QUALITY, SCREENCAST_MAX_WIDTH
+
+logger = get_logger()
+
+# Capabilities holding the DevTools address of Chromium browsers
+DEBUGGER_CAPABILITIES = ("goog:chromeOptions", "ms:edgeOptions")
+
+
+def debugger_address(driver):
+    """
+    Return the DevTools host:port of a Chromium session.
+
+    Args:
+        driver: WebDriver instance
+
+    Returns:
+        str: Debugger address, or None for browsers without DevTools
+    """
+    for capability in DEBUGGER_CAPABILITIES:
+        address = driver.capabilities.get(capability, {}).get("debuggerAddress")
+        if address:
+            return address
+    return None
+
+
+class ScreencastRecorder:
+    """Buffers the most recent screencast frames of one browser session."""
+
+    def __init__(self, driver, seconds=SCREENCAST_SECONDS, max_frames=SCREENCAST_MAX_FRAMES):
+        """
+        Initialize the recorder.
+
+        Args:
+            driver: WebDriver instance of a Chromium browser
+            seconds: Length of the window of frames kept
+            max_frames: Hard cap on buffered frames, bounding memory
+        """
+        self.driver = driver
+        self.seconds = seconds
+        self.frames = deque(maxlen=max_frames)
+        self._lock = threading.Lock()
+        self._socket = None
+        self._timeout_error = None
+        self._thread = None
+        self._running = False
+        self._ids = itertools.count(1)
+
+    def start(self):
+        """
+        Connect to the current page over DevTools and start the screencast.
+
+        Returns:
+            ScreencastRecorder: self, or None if screencasting is unavailable
+        """
+        # websocket-client ships with Selenium; imported here so non-recording runs skip it
+        import websocket
+        import urllib.request
+
+        address = debugger_address(self.driver)
+        if not address:
+            logger.info("Screencast recording needs a Chromium browser; disabled for this session")
+            return None
+        try:
+            with urllib.request.urlopen(f"http://{address}/json/list", timeout=5) as response:
+                targets = json.loads(response.read())
+            pages = [target for target in targets if target.get("type") == "page"]
+            # chromedriver window handles are DevTools target ids
+            page = next((target for target in pages if target["id"] == self.driver.current_window_handle),
+                        pages[0])
+            # suppress_origin: DevTools rejects websocket clients sending an Origin header
+            self._socket = websocket.create_connection(page["webSocketDebuggerUrl"], timeout=5,
+                                                       suppress_origin=True)
+            self._send("Page.startScreencast", {"format": "jpeg", "quality": SCREENCAST_QUALITY,
+                                                "maxWidth": SCREENCAST_MAX_WIDTH,
+                                                "maxHeight": SCREENCAST_MAX_WIDTH})
+        except Exception as e:
+            logger.warning(f"Screencast recording unavailable: {e}")
+            return None
+
+        self._timeout_error = websocket.WebSocketTimeoutException
+        self._running = True
+        self._thread = threading.Thread(target=self._receive, name="screencast", daemon=True)
+        self._thread.start()
+        return self
+
+    def _send(self, method, params=None):
+        self._socket.send(json.dumps({"id": next(self._ids), "method": method, "params": params or {}}))
+
+    def _receive(self):
+        """Store incoming frames and acknowledge them so the browser keeps sending."""
+        self._socket.settimeout(1)
+        while self._running:
+            try:
+                message = json.loads(self._socket.recv())
+            except self._timeout_error:
+                continue
+            except Exception as e:
+                if self._running:
+                    logger.debug(f"Screencast connection closed: {e}")
+                break
+            if message.get("method") != "Page.screencastFrame":
+                continue
+            params = message["params"]
+            try:
+                self._send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})
+            except Exception:
+                break
+            timestamp = params["metadata"].get("timestamp") or time.time()
+            with self._lock:
+                self.frames.append((timestamp, params["data"]))
+                # Drop frames that fell out of the time window
+                while self.frames and timestamp - self.frames[0][0] > self.seconds:
+                    self.frames.popleft()
+
+    def clear(self):
+        """Drop buffered frames, e.g. at the start of a test."""
+        with self._lock:
+            self.frames.clear()
+
+    def snapshot(self):
+        """
+        Copy the buffered frames.
+
+        Returns:
+            list: (timestamp seconds, base64 JPEG) tuples, oldest first
+        """
+        with self._lock:
+            return list(self.frames)
+
+    def stop(self):
+        """Stop the screencast and close the DevTools connection."""
+        self._running = False
+        if self._socket:
+            try:
+                self._send("Page.stopScreencast")
+                self._socket.close()
+            except Exception:
+                pass
+        if self._thread:
+            self._thread.join(timeout=2)
+        self.clear()
+
+
+def encode_frames(frames, extension):
+    """
+    Encode frames into an animated image. Runs in the encoder process.
+
+    Args:
+        frames: (timestamp seconds, base64 JPEG) tuples, oldest first
+        extension: ".webp" or ".gif"
+
+    Returns:
+        bytes: The encoded animation
+    """
+    import io
+    from PIL import Image
+
+    images = [Image.open(io.BytesIO(base64.b64decode(data))).convert("RGB") for _, data in frames]
+    # Show each frame until the next one arrived; hold the last frame for a second
+    durations = [max(20, int((frames[i + 1][0] - frames[i][0]) * 1000)) for i in range(len(frames) - 1)]
+    durations.append(1000)
+    output = io.BytesIO()
+    if extension == ".webp":
+        images[0].save(output, format="WEBP", save_all=True, append_images=images[1:], duration=durations,
+                       loop=0, quality=SCREENCAST_QUALITY)
+    else:
+        images[0].save(output, format="GIF", save_all=True, append_images=images[1:], duration=durations,
+                       loop=0, optimize=True)
+    return output.getvalue()
+
+
+def _encode_and_store(frames, extension, name, store_root):
+    """Encoder process entry point: encode frames and put the result in the store under its own hash."""
+    return ArtefactStore(store_root).put(encode_frames(frames, extension), extension, name=name)
+
+
+def _log_encode_failure(future):
+    if future.exception():
+        logger.error(f"Failed to encode screencast: {future.exception()}")
+
+
+class ScreencastEncoder:
+    """Encodes failure screencasts in a background process."""
+
+    def __init__(self, store=None):
+        """
+        Initialize the encoder; the process is only started on first use.
+
+        Args:
+            store: ArtefactStore receiving the animations (default: the shared store)
+        """
+        self.store = store or default_store
+        self._executor = None
+        self._extension = None
+
+    def submit(self, frames, name):
+        """
+        Schedule frames for encoding.
+
+        Like every store object, the animation is addressed by the hash of its
+        encoded bytes, which is only known once encoding finishes; until then
+        it can be found by name (python -m utils.artefact_store find <name>).
+
+        Args:
+            frames: Frames from ScreencastRecorder.snapshot()
+            name: Name recorded in the store's reference index
+
+        Returns:
+            Future: Resolves to the stored Artefact (hash, path), or None without frames
+        """
+        if not frames:
+            return None
+        if self._executor is None:
+            from PIL import features
+            self._extension = ".webp" if features.check("webp") else ".gif"
+            # spawn: the test process runs threads (screencast, snapshot writer) that fork would copy mid-state
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        future = self._executor.submit(_encode_and_store, frames, self._extension, name, self.store.root)
+        future.add_done_callback(_log_encode_failure)
+        return future
+
+    def flush(self):
+        """Wait for pending encodes to finish and stop the encoder process."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import psutil
+from utils.logger import get_logger
+from utils.driver_factory import DriverFactory
+from utils.tracing import tracer
+from config.config import SESSION_REUSE, SESSION_MAX_RSS_MB, SESSION_MAX_TESTS, BROWSER_PIDS_DIR
+
+logger = get_logger()
+
+
+class SessionSupervisor:
+    """
+    Hands out browser sessions and watches their memory.
+
+    Sessions are reused between tests when SESSION_REUSE is enabled, or when
+    each test gets its own browser context (BROWSER_CONTEXTS), and are
+    recycled once their process tree exceeds SESSION_MAX_RSS_MB, after
+    SESSION_MAX_TESTS tests, or after a failed test (unless it ran in its own
+    context, which is disposed of either way). Browser process ids are
+    recorded per worker so processes left behind by a crashed worker can be
+    reaped later.
+    """
+
+    def __init__(self, factory=DriverFactory.get_driver, reuse=SESSION_REUSE,
+                 max_rss_mb=SESSION_MAX_RSS_MB, max_tests=SESSION_MAX_TESTS):
+        """
+        Initialize the supervisor.
+
+        Args:
+            factory: Callable returning a new WebDriver instance
+            reuse: Whether sessions are kept alive between tests
+            max_rss_mb: RSS of the driver process tree that triggers a recycle (0 to disable)
+            max_tests: Number of tests after which a session is recycled (0 to disable)
+        """
+        self.factory = factory
+        self.reuse = reuse
+        self.max_rss_mb = max_rss_mb
+        self.max_tests = max_tests
+        self.driver = None
+        self.tests_in_session = 0
+        self.sessions = []
+        # Sessions reported by xdist or pool worker processes, each tagged with its worker id
+        self.worker_sessions = []
+        self._tracked = {}
+
+    def acquire(self):
+        """
+        Get a driver for the next test, starting a session if needed.
+
+        Returns:
+            WebDriver: A ready-to-use driver
+        """
+        if self.driver is None:
+            started = time.perf_counter()
+            with tracer.span("browser launch", "session"):
+                self.driver = self.factory()
+            self.tests_in_session = 0
+            self.sessions.append({"tests": 0, "peak_rss_mb": 0.0, "recycle_reason": None,
+                                  "launch_s": time.perf_counter() - started})
+            self._track(self.driver)
+        contexts = getattr(self.driver, "browser_contexts", None)
+        if contexts:
+            with tracer.span("browser context open", "session"):
+                contexts.open()
+            self._attach_to_context(self.driver)
+        return self.driver
+
+    @staticmethod
+    def _attach_to_context(driver):
+        """Point per-page DevTools features at the context's new page."""
+        freezer = getattr(driver, "animation_freezer", None)
+        if freezer:
+            freezer.start()
+        console_hook = getattr(driver, "console_hook", None)
+        if console_hook:
+            console_hook.start()
+        readiness_tracker = getattr(driver, "readiness_tracker", None)
+        if readiness_tracker:
+            readiness_tracker.start()
+        screencast = getattr(driver, "screencast", None)
+        if screencast:
+            from utils.screencast import ScreencastRecorder
+            screencast.stop()
+            driver.screencast = ScreencastRecorder(driver).start()
+
+    def release(self, driver, failed=False):
+        """
+        Return a driver after a test and decide whether to keep the session.
+
+        Args:
+            driver: Driver returned by acquire()
+            failed: Whether the test failed, leaving the session in an unknown state
+        """
+        self.tests_in_session += 1
+        session = self.sessions[-1]
+        session["tests"] = self.tests_in_session
+        rss_mb = self.sample_rss_mb(driver)
+        session["peak_rss_mb"] = max(session["peak_rss_mb"], rss_mb)
+
+        contexts = getattr(driver, "browser_contexts", None)
+        if not self.reuse and not contexts:
+            reason = "not reused"
+        elif failed and not contexts:
+            reason = "test failed"
+        elif self.max_rss_mb and rss_mb > self.max_rss_mb:
+            reason = f"RSS {rss_mb:.0f} MB over {self.max_rss_mb} MB"
+        elif self.max_tests and self.tests_in_session >= self.max_tests:
+            reason = f"reached {self.max_tests} tests"
+        else:
+            reason = None
+
+        if reason:
+            session["recycle_reason"] = reason
+            self.quit(driver)
+        else:
+            self._reset(driver)
+
+    def quit(self, driver):
+        """
+        Quit a session and stop tracking its processes.
+
+        Args:
+            driver: Driver to quit
+        """
+        pages = getattr(driver, "pages", None)
+        if pages:
+            pages.clear()
+        screencast = getattr(driver, "screencast", None)
+        if screencast:
+            screencast.stop()
+        contexts = getattr(driver, "browser_contexts", None)
+        if contexts:
+            contexts.stop()
+        try:
+            with tracer.span("browser quit", "session"):
+                driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting browser: {e}")
+        profile_dir = getattr(driver, "profile_dir", None)
+        if profile_dir:
+            from utils.browser_profiles import remove_copy
+            remove_copy(profile_dir)
+        self._tracked.pop(id(driver), None)
+        self._write_pid_file()
+        if driver is self.driver:
+            self.driver = None
+
+    def _reset(self, driver):
+        """Clear browser state so the next test starts clean on the reused session."""
+        contexts = getattr(driver, "browser_contexts", None)
+        if contexts:
+            logger.debug("Disposing of the test's browser context")
+            with tracer.span("browser context close", "session"):
+                contexts.close()
+        else:
+            logger.debug("Resetting reused browser session")
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+        pages = getattr(driver, "pages", None)
+        if pages:
+            pages.clear()
+        collector = getattr(driver, "log_collector", None)
+        if collector:
+            collector.reset()
+
+    @staticmethod
+    def _process_tree(driver):
+        """Get the driver service process and all its descendants."""
+        try:
+            root = psutil.Process(driver.service.process.pid)
+            return [root] + root.children(recursive=True)
+        except (AttributeError, psutil.Error):
+            return []
+
+    def sample_rss_mb(self, driver):
+        """
+        Sample the resident memory of a driver's process tree.
+
+        Args:
+            driver: WebDriver instance
+
+        Returns:
+            float: Total RSS in megabytes, 0 if it cannot be determined
+        """
+        total = 0
+        for process in self._process_tree(driver):
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+
+    def _track(self, driver):
+        """Record the session's process ids so they can be reaped after a crash."""
+        self._tracked[id(driver)] = [
+            {"pid": process.pid, "create_time": process.create_time()}
+            for process in self._process_tree(driver)
+        ]
+        self._write_pid_file()
+
+    def _write_pid_file(self):
+        """Persist tracked process ids for this worker."""
+        # Resolved on every write since workers may be forked after construction
+        BROWSER_PIDS_DIR.mkdir(parents=True, exist_ok=True)
+        entries = [entry for entries in self._tracked.values() for entry in entries]
+        pid_file = BROWSER_PIDS_DIR / f"{os.getpid()}.json"
+        pid_file.write_text(json.dumps({"owner": os.getpid(), "processes": entries}))
+
+    def shutdown(self):
+        """Quit the current session, then reap processes left by this and crashed workers."""
+        if self.driver is not None:
+            self.quit(self.driver)
+        reap_orphans(include_own=True)
+
+    def add_worker_sessions(self, worker, sessions):
+        """
+        Record the sessions a worker process reported, so the summary covers the whole run.
+
+        Args:
+            worker: Worker id, e.g. "gw0"
+            sessions: The worker supervisor's sessions list
+        """
+        self.worker_sessions.extend(dict(session, worker=worker) for session in sessions)
+
+    def summary_lines(self):
+        """
+        Summarise session launch times and memory usage of this process and its workers.
+
+        Returns:
+            list: Human-readable summary lines
+        """
+        return summary_lines(self.sessions + self.worker_sessions)
+
+
+def summary_lines(sessions):
+    """
+    Summarise session launch times and memory usage.
+
+    Args:
+        sessions: Session records of SessionSupervisor.sessions, optionally tagged with a worker id
+
+    Returns:
+        list: Human-readable summary lines
+    """
+    if not sessions:
+        return []
+    peak = max(session["peak_rss_mb"] for session in sessions)
+    recycled = [s for s in sessions if s["recycle_reason"] and s["recycle_reason"] != "not reused"]
+    launch = sum(session["launch_s"] for session in sessions) / len(sessions)
+    lines = [f"Browser sessions: {len(sessions)}, peak RSS {peak:.0f} MB, "
+             f"recycled {len(recycled)}, mean launch {launch:.2f}s"]
+    for index, session in enumerate(sessions, 1):
+        worker = f" ({session['worker']})" if session.get("worker") else ""
+        lines.append(f"  session {index}{worker}: {session['tests']} tests, launch {session['launch_s']:.2f}s, "
+                     f"peak {session['peak_rss_mb']:.0f} MB"
+                     + (f", recycled: {session['recycle_reason']}" if session["recycle_reason"] else ""))
+    return lines
+
+
+def reap_orphans(include_own=False):
+    """
+    Kill browser processes recorded by workers that are no longer running.
+
+    Args:
+        include_own: Also reap processes recorded by the current process
+
+    Returns:
+        int: Number of processes killed
+    """
+    killed = 0
+    if not BROWSER_PIDS_DIR.exists():
+        return killed
+    for pid_file in BROWSER_PIDS_DIR.glob("*.json"):
+        try:
+            data = json.loads(pid_file.read_text())
+        except (OSError, ValueError):
+            continue
+        owner = data.get("owner")
+        if owner == os.getpid():
+            if not include_own:
+                continue
+        elif psutil.pid_exists(owner):
+            continue
+        for entry in data.get("processes", []):
+            try:
+                process = psutil.Process(entry["pid"])
+                # Guard against the pid having been reused by an unrelated process
+                if abs(process.create_time() - entry["create_time"]) < 1:
+                    process.kill()
+                    killed += 1
+            except psutil.Error:
+                pass
+        pid_file.unlink(missing_ok=True)
+    if killed:
+        logger.warning(f"Reaped {killed} orphaned browser processes")
+    return killed
@@ -0,0 +1,352 @@
+"""
+Cross-machine sharding balanced by historical durations.
+
+`--shard I/N` runs the I-th of N shards of the collected tests. Every
+machine computes the same split independently: tests are ordered by
+(expected duration descending, node id) and each is given to the shard with
+the least expected time so far (lowest index on ties). The split depends
+only on the collected node ids and the duration data, never on collection
+order, host or worker count, so shards need no coordination as long as
+they see the same SHARD_TIMINGS file. Host-local data such as the run
+history is never used. Without the file every test counts as
+DEFAULT_DURATION, so the split depends on the node ids alone; tests missing
+from the file count as the median of the known ones.
+
+Each shard writes its results to SHARDS_DIR. The merge command combines the
+shard files into one report, checks that no test ran in two shards and that
+no shard is missing, and folds the measured durations into SHARD_TIMINGS
+for the next split:
+
+    python run_tests.py --merge-shards [FILE ...]
+    python -m utils.sharding plan 2/4      # show the split without running it
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import statistics
+import pytest
+from utils.logger import get_logger
+from config.config import SHARDS_DIR, SHARD_TIMINGS, RUN_ID
+
+logger = get_logger()
+
+# Expected duration of a test when nothing is known about any test
+DEFAULT_DURATION = 1.0
+# Weight of the newest measurement when updating SHARD_TIMINGS
+TIMING_WEIGHT = 0.5
+
+
+def parse_shard(value):
+    """
+    Parse a shard specification.
+
+    Args:
+        value: "I/N" with 1 <= I <= N
+
+    Returns:
+        tuple: (index, total)
+    """
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like I/N, e.g. 2/4: {value!r}") from None
+    if not 1 <= index <= total:
+        raise ValueError(f"Shard index must be between 1 and {total}: {value!r}")
+    return index, total
+
+
+def load_durations(timings_path=SHARD_TIMINGS):
+    """
+    Load expected test durations.
+
+    Only the shared timings file is read: every machine must see the same
+    data, so local sources such as the run history would split differently.
+
+    Args:
+        timings_path: Shared timings file written by merge()
+
+    Returns:
+        dict: {nodeid: seconds}, empty without a timings file
+    """
+    if not os.path.exists(timings_path):
+        logger.warning(f"No shard timings file at {timings_path}; splitting shards by test count")
+        return {}
+    with open(timings_path) as f:
+        return json.load(f)["durations"]
+
+
+def assign(node_ids, durations, total):
+    """
+    Split tests into shards of similar expected duration.
+
+    Args:
+        node_ids: Collected node ids (any order)
+        durations: {nodeid: expected seconds}
+        total: Number of shards
+
+    Returns:
+        list: One (expected seconds, [node ids in collection order]) tuple per shard
+    """
+    known = [durations[node_id] for node_id in node_ids if node_id in durations]
+    default = statistics.median(known) if known else DEFAULT_DURATION
+    expected = {node_id: durations.get(node_id, default) for node_id in node_ids}
+    loads = [0.0] * total
+    members = [set() for _ in range(total)]
+    for node_id in sorted(expected, key=lambda node_id: (-expected[node_id], node_id)):
+        shard = min(range(total), key=lambda index: (loads[index], index))
+        loads[shard] += expected[node_id]
+        members[shard].add(node_id)
+    return [(loads[shard], [node_id for node_id in node_ids if node_id in members[shard]])
+            for shard in range(total)]
+
+
+def select(node_ids, index, total, durations=None):
+    """
+    Return the node ids of one shard, in collection order.
+
+    Args:
+        node_ids: All collected node ids
+        index: 1-based shard index
+        total: Number of shards
+        durations: {nodeid: expected seconds} (default: load_durations())
+
+    Returns:
+        tuple: (expected seconds, [node ids])
+    """
+    return assign(node_ids, load_durations() if durations is None else durations, total)[index - 1]
+
+
+def results_path(index, total, directory=SHARDS_DIR):
+    """Return where a shard writes its results."""
+    return os.path.join(directory, f"shard_{index}_of_{total}.json")
+
+
+class ShardRecorder:
+    """Pytest plugin that records the final outcome and duration of each test run by a shard."""
+
+    def __init__(self, index, total):
+        """
+        Initialize the recorder.
+
+        Args:
+            index: 1-based shard index
+            total: Number of shards
+        """
+        self.index = index
+        self.total = total
+        self.started = time.time()
+        self.results = {}
+
+    def pytest_runtest_logreport(self, report):
+        """Fold a setup/call/teardown report into the test's result."""
+        result = self.results.setdefault(report.nodeid, {"outcome": None, "duration": 0.0, "attempts": 1})
+        if report.outcome == "rerun":
+            # Only the final attempt counts; its duration starts again
+            result.update(outcome=None, duration=0.0, attempts=result["attempts"] + 1)
+            return
+        result["duration"] += report.duration
+        if report.failed:
+            result["outcome"] = "failed" if report.when == "call" else "error"
+        elif report.skipped and result["outcome"] is None:
+            result["outcome"] = "skipped"
+        elif report.when == "call" and result["outcome"] is None:
+            result["outcome"] = "passed"
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session, exitstatus):
+        """Write the shard's results file."""
+        results = {node_id: {**result, "outcome": result["outcome"] or "error"}
+                   for node_id, result in self.results.items()}
+        path = write_results(self.index, self.total, results, time.time() - self.started)
+        logger.info(f"Shard {self.index}/{self.total} results written to {path}")
+
+
+def write_results(index, total, results, wall_time, directory=SHARDS_DIR):
+    """
+    Write a shard's results file.
+
+    Args:
+        index: 1-based shard index
+        total: Number of shards
+        results: {nodeid: {"outcome", "duration", ...}}
+        wall_time: Seconds the shard took
+        directory: Directory holding the shard files
+
+    Returns:
+        str: Path of the file
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = results_path(index, total, directory)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "shard": index,
+            "total": total,
+            "run_id": RUN_ID,
+            "host": os.uname().nodename if hasattr(os, "uname") else "",
+            "wall_time": round(wall_time, 3),
+            "results": {node_id: {"outcome": result["outcome"], "duration": round(result["duration"], 3),
+                                  "attempts": result.get("attempts", 1)}
+                        for node_id, result in sorted(results.items())},
+        }, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def merge(paths, timings_path=SHARD_TIMINGS, update_timings=True):
+    """
+    Combine shard result files and update the shared timings.
+
+    Args:
+        paths: Shard result files
+        timings_path: Timings file to update with the measured durations
+        update_timings: Whether to write timings_path
+
+    Returns:
+        dict: Merged report with "shards", "results", "duplicates", "missing_shards" and "problems"
+    """
+    shards = []
+    for path in paths:
+        with open(path) as f:
+            shards.append(json.load(f))
+    shards.sort(key=lambda shard: shard["shard"])
+
+    results, owners, duplicates = {}, {}, {}
+    for shard in shards:
+        for node_id, result in shard["results"].items():
+            if node_id in owners:
+                duplicates.setdefault(node_id, [owners[node_id]]).append(shard["shard"])
+            owners[node_id] = shard["shard"]
+            results[node_id] = {**result, "shard": shard["shard"]}
+
+    totals = {shard["total"] for shard in shards}
+    problems = []
+    if len(totals) > 1:
+        problems.append(f"Shard files come from different splits: {sorted(totals)} shards")
+    expected = set(range(1, max(totals) + 1)) if totals else set()
+    missing = sorted(expected - {shard["shard"] for shard in shards})
+    if missing:
+        problems.append(f"Missing results of shard(s) {', '.join(map(str, missing))}")
+    if duplicates:
+        problems.append(f"{len(duplicates)} tests ran in more than one shard (were the timings files different?)")
+
+    if update_timings and results:
+        previous = {}
+        if os.path.exists(timings_path):
+            with open(timings_path) as f:
+                previous = json.load(f)["durations"]
+        durations = dict(previous)
+        for node_id, result in results.items():
+            # Failed and skipped attempts stop early and would skew the balance
+            if result["outcome"] != "passed":
+                continue
+            old = previous.get(node_id)
+            new = result["duration"] if old is None else TIMING_WEIGHT * result["duration"] + (1 - TIMING_WEIGHT) * old
+            durations[node_id] = round(new, 2)
+        tmp_path = f"{timings_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"updated": time.strftime("%Y-%m-%dT%H:%M:%S"), "durations": dict(sorted(durations.items()))},
+                      f, indent=2)
+        os.replace(tmp_path, timings_path)
+
+    return {
+        "shards": [{key: shard.get(key) for key in ("shard", "total", "run_id", "host", "wall_time")}
+                   | {"tests": len(shard["results"]),
+                      "busy_time": round(sum(r["duration"] for r in shard["results"].values()), 3)}
+                   for shard in shards],
+        "results": dict(sorted(results.items())),
+        "duplicates": duplicates,
+        "missing_shards": missing,
+        "problems": problems,
+    }
+
+
+def print_merge_report(merged):
+    """
+    Print per-shard balance, totals and failures of a merged run.
+
+    Returns:
+        int: 0 if every test passed or was skipped and the shards are complete, 1 otherwise
+    """
+    shards = merged["shards"]
+    print(f"{'shard':>7} {'tests':>6} {'busy':>9} {'wall':>9}  host")
+    for shard in shards:
+        print(f"{shard['shard']:>3}/{shard['total']:<3} {shard['tests']:>6} {shard['busy_time']:8.1f}s "
+              f"{shard['wall_time']:8.1f}s  {shard['host'] or '-'}")
+    walls = [shard["wall_time"] for shard in shards]
+    if walls:
+        mean = sum(walls) / len(walls)
+        imbalance = (max(walls) / mean - 1) if mean else 0.0
+        print(f"Wall time: slowest shard {max(walls):.1f}s, mean {mean:.1f}s (imbalance {imbalance:+.0%})")
+
+    counts = {}
+    for node_id, result in merged["results"].items():
+        counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+        if result["outcome"] in ("failed", "error"):
+            print(f"{result['outcome'].upper():<7} {node_id} (shard {result['shard']})")
+    print(", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items())) or "No results")
+    for problem in merged["problems"]:
+        print(f"WARNING: {problem}")
+    failed = counts.get("failed") or counts.get("error")
+    return 1 if failed or merged["problems"] else 0
+
+
+def merge_command(paths=None, output=None):
+    """
+    Merge shard results, print the report and write the merged results file.
+
+    Args:
+        paths: Shard result files (default: all files in SHARDS_DIR)
+        output: Merged results file (default: SHARDS_DIR/merged.json)
+
+    Returns:
+        int: Exit code, see print_merge_report()
+    """
+    paths = paths or sorted(glob.glob(os.path.join(SHARDS_DIR, "shard_*_of_*.json")))
+    if not paths:
+        print(f"No shard result files found in {SHARDS_DIR}")
+        return 1
+    merged = merge(paths)
+    output = output or os.path.join(SHARDS_DIR, "merged.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(merged, f, indent=2)
+    exit_code = print_merge_report(merged)
+    print(f"Merged results written to {output}; timings updated in {SHARD_TIMINGS}")
+    return exit_code
+
+
+def _print_plan(shard):
+    """Collect the suite and print the expected split."""
+    from utils.pool_runner import collect
+
+    index, total = parse_shard(shard)
+    node_ids = collect(["tests"])
+    durations = load_durations()
+    for number, (expected, members) in enumerate(assign(node_ids, durations, total), 1):
+        marker = "*" if number == index else " "
+        print(f"{marker}{number}/{total}: {len(members)} tests, expected {expected:.1f}s")
+        if number == index:
+            for node_id in members:
+                known = f"{durations[node_id]:.1f}s" if node_id in durations else "no data"
+                print(f"      {node_id} ({known})")
+    return pytest.ExitCode.OK
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan shards and merge shard results")
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan_parser = commands.add_parser("plan", help="Show the split of the suite into shards")
+    plan_parser.add_argument("shard", help="Shard to list in detail, as I/N")
+    merge_parser = commands.add_parser("merge", help="Merge shard result files")
+    merge_parser.add_argument("files", nargs="*", help="Shard result files (default: all in the shards directory)")
+    merge_parser.add_argument("--output", help="Merged results file")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        sys.exit(int(_print_plan(args.shard)))
+    sys.exit(merge_command(args.files, args.output))
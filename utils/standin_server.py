@@ -0,0 +1,166 @@
+"""
+Local stand-in for the login flow of the application under test.
+
+Implements GET /login, POST /authenticate and GET /secure with the same
+markup and redirects as the-internet.herokuapp.com, so the HTTP backend and
+load mode can be validated without network access. Every valid_user account
+of the account pool (ACCOUNTS_FILE) can log in:
+
+    python -m utils.standin_server [port]
+"""
+
+import sys
+import html
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+from utils.account_pool import valid_accounts
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>The Internet</title></head>
+<body>
+<div class="row">
+  <div id="flash-messages" class="large-12 columns">{flash}</div>
+</div>
+<div class="row">
+  <div id="content" class="large-12 columns">
+    <div class="example">
+{body}
+    </div>
+  </div>
+</div>
+</body>
+</html>
+"""
+
+LOGIN_BODY = """      <h2>Login Page</h2>
+      <form name="login" method="post" action="/authenticate">
+        <div class="row"><div class="large-6 small-12 columns">
+          <label for="username">Username</label>
+          <input type="text" name="username" id="username">
+        </div></div>
+        <div class="row"><div class="large-6 small-12 columns">
+          <label for="password">Password</label>
+          <input type="password" name="password" id="password">
+        </div></div>
+        <button class="radius" type="submit"><i class="fa fa-2x fa-sign-in"> Login</i></button>
+      </form>"""
+
+SECURE_BODY = """      <h2><i class="icon-lock"></i> Secure Area</h2>
+      <h4 class="subheader">Welcome to the Secure Area. When you are done click logout below.</h4>
+      <a class="button secondary radius" href="/logout"><i class="icon-2x icon-signout"> Logout</i></a>"""
+
+FLASH_TEMPLATE = '<div data-alert id="flash" class="flash {kind}">\n {message}\n <a href="#" class="close">x</a>\n</div>'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Request handler serving the login flow pages."""
+
+    # Keep-alive, so pooled clients reuse connections as they would against the real site
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add ~40 ms per response
+    disable_nagle_algorithm = True
+    # session id -> {"user": str or None, "flash": (kind, message) or None}
+    sessions = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        """Stay quiet; load runs would otherwise flood stderr."""
+
+    def _session(self):
+        """Return (session id, session state), creating a session if needed."""
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        session_id = cookie["rack.session"].value if "rack.session" in cookie else None
+        with self.lock:
+            if session_id not in self.sessions:
+                session_id = secrets.token_hex(16)
+                self.sessions[session_id] = {"user": None, "flash": None}
+            return session_id, self.sessions[session_id]
+
+    def _send(self, status, session_id, body=b"", location=None):
+        self.send_response(status)
+        self.send_header("Set-Cookie", f"rack.session={session_id}; path=/; HttpOnly")
+        if location:
+            self.send_header("Location", location)
+        self.send_header("Content-Type", "text/html;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _render(self, session_id, state, body):
+        flash = ""
+        if state["flash"]:
+            kind, message = state["flash"]
+            flash = FLASH_TEMPLATE.format(kind=kind, message=html.escape(message))
+            state["flash"] = None
+        self._send(200, session_id, PAGE_TEMPLATE.format(flash=flash, body=body).encode("utf-8"))
+
+    def do_GET(self):
+        session_id, state = self._session()
+        path = self.path.split("?")[0]
+        if path == "/login":
+            self._render(session_id, state, LOGIN_BODY)
+        elif path == "/secure":
+            if state["user"]:
+                self._render(session_id, state, SECURE_BODY)
+            else:
+                state["flash"] = ("error", "You must login to view the secure area!")
+                self._send(302, session_id, location="/login")
+        elif path == "/logout":
+            state["user"] = None
+            state["flash"] = ("success", "You logged out of the secure area!")
+            self._send(302, session_id, location="/login")
+        else:
+            self._send(404, session_id, b"Not Found")
+
+    def do_POST(self):
+        session_id, state = self._session()
+        if self.path.split("?")[0] != "/authenticate":
+            self._send(404, session_id, b"Not Found")
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        username = form.get("username", [""])[0]
+        password = form.get("password", [""])[0]
+        valid = next((account for account in valid_accounts() if account["username"] == username), None)
+        if valid is None:
+            state["flash"] = ("error", "Your username is invalid!")
+            self._send(302, session_id, location="/login")
+        elif password != valid["password"]:
+            state["flash"] = ("error", "Your password is invalid!")
+            self._send(302, session_id, location="/login")
+        else:
+            state["user"] = username
+            state["flash"] = ("success", "You logged into a secure area!")
+            self._send(302, session_id, location="/secure")
+
+
+def start_server(port=0, host="127.0.0.1"):
+    """
+    Start the stand-in server on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        host: Interface to bind
+
+    Returns:
+        tuple: (server, base URL); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="standin-server", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", int(sys.argv[1]) if len(sys.argv) > 1 else 8000),
+                                 StandInHandler)
+    print(f"Serving the login flow on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,243 @@
+"""
+Chrome Trace Event export of test execution.
+
+Records spans for browser launch, fixture setup, pytest phases, Gherkin
+steps, page object methods and raw WebDriver commands, tagged with process
+(worker) and thread ids. Each process writes its own part file, named by
+the run id; the controlling process merges the parts of its run into a
+single JSON file that opens in Perfetto (ui.perfetto.dev) or chrome://tracing.
+
+When tracing is disabled, span() returns a shared no-op context manager and
+nothing is instrumented, so the overhead is a single attribute check.
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import functools
+import threading
+from contextlib import nullcontext
+from config.config import TRACE, TRACES_DIR, RUN_ID
+
+_NULL_SPAN = nullcontext()
+
+
+def _now_us():
+    """Wall-clock microseconds, comparable across worker processes."""
+    return time.time_ns() // 1000
+
+
+class _Span:
+    """Context manager recording one complete ('X') event."""
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        self.tracer.add(self.name, self.category, self.start, _now_us() - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """Collects trace events for the current process."""
+
+    def __init__(self, enabled=TRACE):
+        """
+        Initialize the tracer.
+
+        Args:
+            enabled: Whether spans are recorded
+        """
+        self.enabled = enabled
+        self.events = []
+        self._open = {}
+        self._parts_written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def worker(self):
+        """str: xdist or pool worker id, or 'main' for the controlling process."""
+        return os.environ.get("PYTEST_XDIST_WORKER") or os.environ.get("POOL_WORKER") or "main"
+
+    def span(self, name, category="framework", args=None):
+        """
+        Record the duration of a with-block.
+
+        Args:
+            name: Span name shown in the timeline
+            category: Event category, e.g. "step" or "webdriver"
+            args: Optional dict of details shown when the span is selected
+
+        Returns:
+            Context manager; a shared no-op when tracing is disabled
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def begin(self, key, name, category="framework", args=None):
+        """
+        Open a span that is closed later by end(), e.g. from a pair of hooks.
+
+        Args:
+            key: Identifier passed to end()
+            name: Span name
+            category: Event category
+            args: Optional dict of details
+        """
+        if self.enabled:
+            self._open[key] = (name, category, args, _now_us())
+
+    def end(self, key, **extra_args):
+        """
+        Close a span opened by begin().
+
+        Args:
+            key: Identifier passed to begin()
+            **extra_args: Details added to the span, e.g. outcome="failed"
+        """
+        if not self.enabled:
+            return
+        opened = self._open.pop(key, None)
+        if opened:
+            name, category, args, start = opened
+            if extra_args:
+                args = dict(args or {}, **extra_args)
+            self.add(name, category, start, _now_us() - start, args)
+
+    def add(self, name, category, start_us, duration_us, args=None):
+        """Append a complete event."""
+        event = {"name": name, "cat": category, "ph": "X", "ts": start_us, "dur": duration_us,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def write_part(self):
+        """
+        Write this process's events to a part file for later merging.
+
+        Returns:
+            str: Path of the part file, or None if there is nothing to write
+        """
+        if not self.enabled or not self.events:
+            return None
+        TRACES_DIR.mkdir(parents=True, exist_ok=True)
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": os.getpid(),
+             "args": {"name": f"worker {self.worker} (pid {os.getpid()})"}},
+        ]
+        # A process can run several pytest sessions (watch mode), so number the parts
+        self._parts_written += 1
+        path = TRACES_DIR / f"part_{RUN_ID}_{self.worker}_{os.getpid()}_{self._parts_written}.json"
+        with open(path, "w") as f:
+            json.dump(metadata + self.events, f)
+        self.events = []
+        return str(path)
+
+    def trace_method(self, func, category="page"):
+        """
+        Wrap a function so each call is recorded as a span.
+
+        Args:
+            func: Function to wrap
+            category: Event category
+
+        Returns:
+            function: The wrapped function
+        """
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(self, name, category, None):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def instrument_class(self, cls, category="page"):
+        """
+        Record spans for every public method defined directly on a class.
+
+        Args:
+            cls: Class to instrument in place
+            category: Event category
+        """
+        if not self.enabled:
+            return
+        for attr, value in list(vars(cls).items()):
+            if inspect.isfunction(value) and not attr.startswith("_"):
+                setattr(cls, attr, self.trace_method(value, category))
+
+    def instrument_driver(self, driver):
+        """
+        Record a span for every raw WebDriver command issued by a driver.
+
+        Args:
+            driver: WebDriver instance
+        """
+        if not self.enabled:
+            return
+        original_execute = driver.execute
+
+        def execute(driver_command, params=None):
+            with _Span(self, driver_command, "webdriver", None):
+                return original_execute(driver_command, params)
+
+        driver.execute = execute
+
+
+def merge_parts(output_path=None, run_id=RUN_ID):
+    """
+    Merge the part files of a run into a single Chrome Trace Event JSON file.
+
+    Parts of other runs (e.g. an interrupted or concurrent one) are left alone.
+
+    Args:
+        output_path: Destination file (default: reports/traces/trace_<timestamp>.json)
+        run_id: Run whose parts are merged (default: the current run); None merges all parts
+
+    Returns:
+        str: Path of the merged trace, or None if there were no parts
+    """
+    parts = sorted(TRACES_DIR.glob(f"part_{run_id}_*.json" if run_id else "part_*.json"))
+    if not parts:
+        return None
+    events = []
+    for part in parts:
+        with open(part) as f:
+            events.extend(json.load(f))
+        part.unlink()
+    if output_path is None:
+        output_path = TRACES_DIR / f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return str(output_path)
+
+
+# Shared tracer for the current process
+tracer = Tracer()
+
+
+if __name__ == "__main__":
+    # Run by hand to recover the parts of interrupted runs:
+    # python -m utils.tracing [run_id] [output.json] merges the given run, or all parts
+    if len(sys.argv) > 3:
+        print("Usage: python -m utils.tracing [run_id] [output.json]")
+        sys.exit(1)
+    merged = merge_parts(output_path=sys.argv[2] if len(sys.argv) > 2 else None,
+                         run_id=sys.argv[1] if len(sys.argv) > 1 else None)
+    print(merged or "No trace parts found")
@@ -0,0 +1,167 @@
+import os
+import io
+from functools import lru_cache
+import numpy as np
+from PIL import Image
+from utils.logger import get_logger
+from config.config import (
+    BASELINES_DIR, VISUAL_DIFFS_DIR, VISUAL_TOLERANCE, VISUAL_PIXEL_THRESHOLD,
+    VISUAL_CACHE_SIZE, UPDATE_BASELINES
+)
+
+logger = get_logger()
+
+# Luma weights so that differences are judged roughly as the eye perceives them
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def decode_png(png_bytes):
+    """
+    Decode PNG bytes into an RGB pixel array.
+
+    Args:
+        png_bytes: Raw PNG data
+
+    Returns:
+        numpy.ndarray: Array of shape (height, width, 3) with dtype uint8
+    """
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+@lru_cache(maxsize=VISUAL_CACHE_SIZE)
+def _load_baseline(path, mtime_ns):
+    """Decode a baseline file; the mtime in the key invalidates stale entries."""
+    with open(path, "rb") as f:
+        pixels = decode_png(f.read())
+    pixels.setflags(write=False)
+    return pixels
+
+
+def load_baseline(path):
+    """
+    Load a decoded baseline image, using the in-memory LRU cache.
+
+    Args:
+        path: Path to the baseline PNG
+
+    Returns:
+        numpy.ndarray: Read-only RGB pixel array
+    """
+    return _load_baseline(str(path), os.stat(path).st_mtime_ns)
+
+
+def build_ignore_mask(shape, ignore_regions):
+    """
+    Build a boolean mask of pixels to exclude from comparison.
+
+    Args:
+        shape: (height, width) of the images
+        ignore_regions: Iterable of (x, y, width, height) rectangles
+
+    Returns:
+        numpy.ndarray: Boolean mask, True where pixels are ignored
+    """
+    mask = np.zeros(shape, dtype=bool)
+    for x, y, width, height in ignore_regions or ():
+        mask[max(y, 0):y + height, max(x, 0):x + width] = True
+    return mask
+
+
+def compare_images(actual, baseline, pixel_threshold=VISUAL_PIXEL_THRESHOLD, ignore_regions=None):
+    """
+    Compare two RGB pixel arrays.
+
+    A pixel counts as different when its luma-weighted channel difference
+    exceeds pixel_threshold (0-255 scale).
+
+    Args:
+        actual: RGB array of the current screenshot
+        baseline: RGB array of the baseline
+        pixel_threshold: Per-pixel perceptual tolerance
+        ignore_regions: Iterable of (x, y, width, height) rectangles to skip
+
+    Returns:
+        tuple: (mismatch ratio between 0 and 1, boolean mask of differing pixels)
+    """
+    if actual.shape != baseline.shape:
+        logger.info(f"Image size differs: {actual.shape} vs baseline {baseline.shape}")
+        return 1.0, np.ones(actual.shape[:2], dtype=bool)
+
+    delta = np.abs(actual.astype(np.int16) - baseline.astype(np.int16)).astype(np.float32)
+    diff_mask = (delta @ LUMA_WEIGHTS) > pixel_threshold
+
+    ignore_mask = build_ignore_mask(diff_mask.shape, ignore_regions)
+    diff_mask &= ~ignore_mask
+
+    compared = diff_mask.size - np.count_nonzero(ignore_mask)
+    if compared == 0:
+        return 0.0, diff_mask
+    return np.count_nonzero(diff_mask) / compared, diff_mask
+
+
+def write_diff_image(actual, diff_mask, path):
+    """
+    Write a diff image highlighting differing pixels in red.
+
+    Args:
+        actual: RGB array of the current screenshot
+        diff_mask: Boolean mask of differing pixels
+        path: Destination PNG path
+
+    Returns:
+        str: The path written
+    """
+    highlighted = (actual // 3).copy()
+    highlighted[diff_mask] = (255, 0, 0)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(highlighted).save(path)
+    return str(path)
+
+
+def check_against_baseline(png_bytes, name, tolerance=VISUAL_TOLERANCE,
+                           pixel_threshold=VISUAL_PIXEL_THRESHOLD, ignore_regions=None):
+    """
+    Compare a screenshot with its named baseline.
+
+    With UPDATE_BASELINES set the screenshot becomes the baseline. A missing
+    baseline otherwise fails the check, so a fresh checkout cannot pass
+    without baselines; the screenshot is saved next to the diffs as a
+    candidate to review and copy into BASELINES_DIR. A diff image is only
+    written when the comparison fails.
+
+    Args:
+        png_bytes: Raw PNG screenshot data
+        name: Baseline name (file name without extension)
+        tolerance: Maximum allowed ratio of differing pixels
+        pixel_threshold: Per-pixel perceptual tolerance
+        ignore_regions: Iterable of (x, y, width, height) rectangles to skip
+
+    Returns:
+        dict: Result with 'passed', 'missing', 'mismatch', 'baseline' and 'diff' keys;
+        for a missing baseline 'diff' is the saved candidate screenshot
+    """
+    baseline_path = BASELINES_DIR / f"{name}.png"
+    if UPDATE_BASELINES:
+        BASELINES_DIR.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_bytes(png_bytes)
+        logger.info(f"Baseline saved: {baseline_path}")
+        return {"passed": True, "missing": False, "mismatch": 0.0, "baseline": str(baseline_path), "diff": None}
+    if not baseline_path.exists():
+        VISUAL_DIFFS_DIR.mkdir(parents=True, exist_ok=True)
+        candidate = VISUAL_DIFFS_DIR / f"{name}_candidate.png"
+        candidate.write_bytes(png_bytes)
+        logger.error(f"Visual baseline '{name}' is missing ({baseline_path}); candidate saved to {candidate}, "
+                     f"rerun with UPDATE_BASELINES=true to accept it")
+        return {"passed": False, "missing": True, "mismatch": 1.0, "baseline": str(baseline_path),
+                "diff": str(candidate)}
+
+    actual = decode_png(png_bytes)
+    mismatch, diff_mask = compare_images(actual, load_baseline(baseline_path),
+                                         pixel_threshold, ignore_regions)
+    result = {"passed": mismatch <= tolerance, "missing": False, "mismatch": mismatch,
+              "baseline": str(baseline_path), "diff": None}
+    if not result["passed"]:
+        result["diff"] = write_diff_image(actual, diff_mask, VISUAL_DIFFS_DIR / f"{name}_diff.png")
+        logger.error(f"Visual mismatch for '{name}': {mismatch:.2%} > {tolerance:.2%}, diff: {result['diff']}")
+    return result
@@ -0,0 +1,402 @@
+"""
+Watch mode: rerun affected scenarios in a warm process when files change.
+
+run_tests.py --watch keeps one interpreter with the framework, pytest and a
+browser session loaded, polls features/, pages/ and tests/ for changes and
+reruns only the scenarios a change can affect:
+
+- feature files: scenarios whose tags, steps or examples changed, or that are new
+- step definitions: scenarios with a step bound to a changed, added or removed definition
+- page objects: tests that used a page class defined in (or depending on) the changed module
+- test modules: the tests in the module
+
+Changed modules are reloaded in place with their dependents; pytest-bdd's
+in-memory feature cache is refreshed and affected test modules are
+re-imported. The browser session is reused between runs (it is replaced
+after a failed test, as with SESSION_REUSE). Changes to conftest.py, config/
+and utils/ need a restart.
+"""
+
+import os
+import sys
+import time
+import types
+import hashlib
+import inspect
+import logging
+import linecache
+import importlib
+import pytest
+import pytest_bdd.feature
+from utils import feature_cache
+from config.config import ROOT_DIR
+
+# Directories watched for changes, relative to the project root
+WATCHED_DIRS = ("features", "pages", "tests")
+WATCHED_SUFFIXES = (".py", ".feature")
+
+# Seconds between scans of the watched directories
+POLL_INTERVAL = 0.2
+# A change is acted on once files have been quiet this long (editors write in several steps)
+SETTLE_TIME = 0.1
+
+# pytest-bdd is already imported when pytest's assertion rewriter looks for it on repeated runs
+PYTEST_OPTIONS = ["-p", "no:cacheprovider", "-W", "ignore::pytest.PytestAssertRewriteWarning"]
+
+
+def module_name(path):
+    """Return the dotted module name of a Python file under the project root."""
+    parts = list(path.relative_to(ROOT_DIR).with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _watched_files():
+    """Return {path: mtime} for the watched source and feature files."""
+    files = {}
+    for directory in WATCHED_DIRS:
+        for path in (ROOT_DIR / directory).rglob("*"):
+            if path.suffix in WATCHED_SUFFIXES and "__pycache__" not in path.parts:
+                try:
+                    files[path] = path.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+    return files
+
+
+def _scenario_signature(scenario):
+    """Summarise what a scenario runs, ignoring its position in the file."""
+    steps = [(step.type, step.name, step.docstring) for step in scenario.steps]
+    return repr((sorted(scenario.tags), steps, scenario.examples))
+
+
+def _step_sources():
+    """Hash the source of every step definition, keyed by "module:function"."""
+    sources = {}
+    for name, module in list(sys.modules.items()):
+        if not name.startswith(f"{feature_cache.STEPS_PACKAGE}.") or module is None:
+            continue
+        for value in vars(module).values():
+            context = getattr(value, "_pytest_bdd_step_context", None)
+            if context:
+                function = context.step_func
+                try:
+                    source = inspect.getsource(function)
+                except (OSError, TypeError):
+                    source = ""
+                key = f"{module.__name__}:{function.__name__}"
+                sources[key] = hashlib.sha256(f"{context.type}|{context.parser.name}|{source}".encode()).hexdigest()
+    return sources
+
+
+def _dependents(names):
+    """
+    Extend a set of watched modules with the loaded watched modules that import from them.
+
+    Returns:
+        set: The modules and their transitive dependents
+    """
+    affected = set(names)
+    watched = {name: module for name, module in sys.modules.items()
+               if module is not None and name.split(".")[0] in WATCHED_DIRS}
+    changed = True
+    while changed:
+        changed = False
+        for name, module in watched.items():
+            if name in affected:
+                continue
+            for value in vars(module).values():
+                source = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+                if source in affected:
+                    affected.add(name)
+                    changed = True
+                    break
+    return affected
+
+
+def _reload_order(names):
+    """Order modules so that each is reloaded after the modules it imports from."""
+    ordered = []
+
+    def visit(name, trail):
+        if name in ordered or name in trail:
+            return
+        module = sys.modules.get(name)
+        for value in vars(module).values() if module else ():
+            source = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+            if source in names and source != name:
+                visit(source, trail | {name})
+        ordered.append(name)
+
+    for name in sorted(names):
+        visit(name, frozenset())
+    return ordered
+
+
+def _bind_console_logging():
+    """
+    Point the framework logger's console handler at the current sys.stderr.
+
+    The handler keeps the stream it was created with, which in a repeated
+    pytest.main() is the capture of a run that has since been closed.
+    """
+    for handler in logging.getLogger("test_framework").handlers:
+        if type(handler) is logging.StreamHandler:
+            # Not setStream(): it flushes the old stream, which may be closed
+            handler.stream = sys.stderr
+
+
+class _SessionPlugin:
+    """Rebinds console logging to each run's output capture, as a fresh process would have it."""
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_load_initial_conftests(self, early_config, parser, args):
+        # Global capture has started; a fresh process imports conftest (and creates the handler) here
+        _bind_console_logging()
+
+
+class _CollectPlugin(_SessionPlugin):
+    """Records the scenario and module behind every collected test."""
+
+    def __init__(self):
+        self.tests = {}
+
+    def pytest_collection_finish(self, session):
+        for item in session.items:
+            scenario = getattr(getattr(item, "obj", None), "__scenario__", None)
+            feature = scenario.feature.filename if scenario else None
+            self.tests[item.nodeid] = {
+                "module": item.module.__name__ if getattr(item, "module", None) else None,
+                "feature": feature,
+                "scenario": scenario.name if scenario else None,
+            }
+
+
+class _PageUsagePlugin(_SessionPlugin):
+    """Records which page object modules each test used."""
+
+    def __init__(self, usage):
+        self.usage = usage
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield
+        # Page objects are dropped when the driver fixture is released, so look before teardown
+        pages = getattr(getattr(item, "driver", None), "pages", None)
+        if pages is None:
+            return
+        # Steps reach their page objects through the session's registry
+        modules = {"pages.registry"}
+        for page_class in getattr(pages, "_instances", {}):
+            modules.update(cls.__module__ for cls in page_class.__mro__ if cls.__module__.startswith("pages."))
+        self.usage[item.nodeid] = modules
+
+
+class WatchRunner:
+    """Runs the selected tests, then reruns the affected ones on every change."""
+
+    def __init__(self, select_args, pytest_args=None):
+        """
+        Initialize the runner.
+
+        Args:
+            select_args: Arguments selecting the tests (path, markers, ...)
+            pytest_args: Extra pytest arguments passed to every run
+        """
+        self.select_args = select_args
+        self.pytest_args = pytest_args or []
+        self.tests = {}
+        # nodeid -> page object modules the test used in its last run
+        self.page_usage = {}
+        self.features = {}
+        self.step_sources = {}
+        self.bindings = {}
+
+    def collect(self):
+        """Collect the selected tests and remember their scenarios."""
+        plugin = _CollectPlugin()
+        pytest.main(["--collect-only", "-qq"] + PYTEST_OPTIONS + self.select_args, plugins=[plugin])
+        self.tests = plugin.tests
+
+    def run_tests(self, node_ids):
+        """
+        Run tests in this process, reusing the warm browser session.
+
+        Returns:
+            int: pytest exit code
+        """
+        started = time.perf_counter()
+        # Node ids replace the selected paths; marker and tag options still apply
+        options = [arg for arg in self.select_args if arg.startswith("-")]
+        exit_code = pytest.main(["-q"] + PYTEST_OPTIONS + self.pytest_args + options + list(node_ids),
+                                plugins=[_PageUsagePlugin(self.page_usage)])
+        print(f"[watch] {len(node_ids)} tests in {time.perf_counter() - started:.2f}s, exit code {int(exit_code)}; "
+              f"watching {', '.join(WATCHED_DIRS)} (Ctrl+C to stop)", flush=True)
+        return exit_code
+
+    def _snapshot_bindings(self):
+        """Remember parsed features, step sources and step bindings to diff against after a change."""
+        self.features = {feature.filename: feature for feature in pytest_bdd.feature.features.values()}
+        self.step_sources = _step_sources()
+        self.bindings = feature_cache.scenario_bindings()
+
+    def _bound_scenarios(self, definitions, bindings):
+        """Return (feature path, scenario name) pairs with a step bound to one of the definitions."""
+        bound = set()
+        for rel_path, entry in bindings.items():
+            for scenario in entry["scenarios"]:
+                if any(step["binding"] in definitions for step in scenario["steps"]):
+                    bound.add((str(ROOT_DIR / rel_path), scenario["name"]))
+        return bound
+
+    def apply_changes(self, paths):
+        """
+        Reload what changed and work out which tests to rerun.
+
+        Args:
+            paths: Changed, added or deleted files
+
+        Returns:
+            list: Node ids to run
+        """
+        modules = {module_name(path) for path in paths if path.suffix == ".py"}
+        feature_files = {str(path) for path in paths if path.suffix == ".feature"}
+        step_modules = {name for name in modules if name.startswith("features.steps.")}
+        page_modules = {name for name in modules if name.startswith("pages.")}
+        changed_tests = {name for name in modules if name.startswith("tests.")}
+        test_modules = set(changed_tests)
+
+        # Reload pages and steps in place, dependents after their dependencies
+        reload = _dependents(page_modules | step_modules) - {name for name in sys.modules if name.startswith("tests.")}
+        for name in _reload_order(reload):
+            if name not in sys.modules:
+                continue
+            linecache.checkcache(sys.modules[name].__file__)
+            importlib.reload(sys.modules[name])
+        if page_modules:
+            self._refresh_page_registry()
+
+        # Features are parsed when test modules are imported: drop both and collect again
+        changed_scenarios = set()
+        for filename in feature_files:
+            old = self.features.get(filename)
+            pytest_bdd.feature.features.pop(filename, None)
+            test_modules.update(test["module"] for test in self.tests.values() if test["feature"] == filename)
+            new = None
+            try:
+                new = feature_cache.get_cached_feature(os.path.dirname(filename), os.path.basename(filename))
+            except Exception as e:
+                print(f"[watch] Cannot parse {filename}: {e}", flush=True)
+            old_scenarios = {name: _scenario_signature(s) for name, s in (old.scenarios.items() if old else ())}
+            for name, scenario in (new.scenarios.items() if new else ()):
+                if old_scenarios.get(name) != _scenario_signature(scenario):
+                    changed_scenarios.add((filename, name))
+        for name in test_modules:
+            sys.modules.pop(name, None)
+        self.collect()
+
+        previous_sources, previous_bindings = self.step_sources, self.bindings
+        self._snapshot_bindings()
+        if step_modules:
+            definitions = {key for key in previous_sources.keys() | self.step_sources.keys()
+                           if previous_sources.get(key) != self.step_sources.get(key)}
+            changed_scenarios |= self._bound_scenarios(definitions, previous_bindings)
+            changed_scenarios |= self._bound_scenarios(definitions, self.bindings)
+            # Steps that now bind to a different definition, e.g. after a parser changed
+            changed_scenarios |= self._rebound_scenarios(previous_bindings, self.bindings)
+
+        affected_pages = _dependents(page_modules)
+        if "pages.registry" not in page_modules:
+            # The registry imports every page class, which does not make every test depend on every page
+            affected_pages.discard("pages.registry")
+        selected = []
+        for node_id, test in self.tests.items():
+            if (test["module"] in changed_tests
+                    or (test["feature"], test["scenario"]) in changed_scenarios
+                    or (affected_pages and self.page_usage.get(node_id, affected_pages) & affected_pages)):
+                selected.append(node_id)
+        return selected
+
+    @staticmethod
+    def _rebound_scenarios(old_bindings, new_bindings):
+        """Return scenarios whose steps are bound differently in the new bindings."""
+        rebound = set()
+        for rel_path, entry in new_bindings.items():
+            old_entry = {scenario["name"]: scenario for scenario in old_bindings.get(rel_path, {}).get("scenarios", [])}
+            for scenario in entry["scenarios"]:
+                old = old_entry.get(scenario["name"])
+                bindings = [step["binding"] for step in scenario["steps"]]
+                if old and [step["binding"] for step in old["steps"]] != bindings:
+                    rebound.add((str(ROOT_DIR / rel_path), scenario["name"]))
+        return rebound
+
+    @staticmethod
+    def _refresh_page_registry():
+        """Give the warm session a registry of the reloaded page classes."""
+        supervisor = getattr(sys.modules.get("conftest"), "session_supervisor", None)
+        registry = sys.modules.get("pages.registry")
+        if supervisor and supervisor.driver is not None and registry:
+            supervisor.driver.pages = registry.PageRegistry(supervisor.driver)
+
+    def wait_for_changes(self, files):
+        """
+        Block until watched files change and stay unchanged for SETTLE_TIME.
+
+        Args:
+            files: {path: mtime} from the previous scan
+
+        Returns:
+            tuple: (new {path: mtime}, changed paths)
+        """
+        while True:
+            time.sleep(POLL_INTERVAL)
+            current = _watched_files()
+            if current == files:
+                continue
+            while True:
+                time.sleep(SETTLE_TIME)
+                settled = _watched_files()
+                if settled == current:
+                    break
+                current = settled
+            changed = {path for path in files.keys() | current.keys() if files.get(path) != current.get(path)}
+            return current, changed
+
+    def run(self):
+        """
+        Run the selected tests once, then watch for changes until interrupted.
+
+        Returns:
+            int: Exit code of the last run
+        """
+        self.collect()
+        self._snapshot_bindings()
+        exit_code = self.run_tests(list(self.tests))
+        files = _watched_files()
+        try:
+            while True:
+                files, changed = self.wait_for_changes(files)
+                detected = time.perf_counter()
+                print(f"\n[watch] Changed: {', '.join(sorted(str(p.relative_to(ROOT_DIR)) for p in changed))}",
+                      flush=True)
+                try:
+                    node_ids = self.apply_changes(changed)
+                except Exception as e:
+                    # e.g. a syntax error in the file being edited; wait for the next save
+                    print(f"[watch] Could not reload changes: {type(e).__name__}: {e}", flush=True)
+                    continue
+                if not node_ids:
+                    print("[watch] No affected tests", flush=True)
+                    continue
+                print(f"[watch] Rerunning {len(node_ids)} affected tests "
+                      f"(reloaded in {time.perf_counter() - detected:.2f}s)", flush=True)
+                exit_code = self.run_tests(node_ids)
+        except KeyboardInterrupt:
+            print("\n[watch] Stopping", flush=True)
+        finally:
+            _bind_console_logging()
+            supervisor = getattr(sys.modules.get("conftest"), "session_supervisor", None)
+            if supervisor:
+                supervisor.shutdown()
+        return int(exit_code)